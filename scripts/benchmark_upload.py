@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+向量上传/检索路径的数据转换基准
+
+对比逐行 tolist() + PointStruct 的旧写法与将连续numpy矩阵直接交给客户端列式接口的写法，
+统计耗时和峰值内存分配（tracemalloc）。请求经过真实的qdrant-client（REST）：
+客户端自己的分批转换、模型校验和JSON序列化都计入，只把网络传输替换为内存中的httpx MockTransport，
+它读取完整的请求体后返回Qdrant格式的成功响应。
+
+用法:
+    python scripts/benchmark_upload.py --rows 20000 --dim 768
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import httpx
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import PointStruct
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.config import config
+from faq_retrieval.services.qdrant_service import QdrantService
+
+
+def handle_request(request: httpx.Request) -> httpx.Response:
+    """模拟Qdrant REST接口：消费请求体，返回空的检索结果或已完成的写入操作"""
+    body = request.read()
+    if request.url.path.endswith("/points/query"):
+        result = {"points": []}
+    elif request.url.path.endswith("/points/query/batch"):
+        result = [{"points": []} for _ in json.loads(body)["searches"]]
+    else:
+        result = {"operation_id": 0, "status": "completed"}
+    return httpx.Response(200, json={"result": result, "status": "ok", "time": 0.0})
+
+
+def create_client() -> QdrantClient:
+    return QdrantClient(host="localhost", transport=httpx.MockTransport(handle_request), check_compatibility=False)
+
+
+def legacy_upsert(service: QdrantService, faqs, embeddings):
+    """旧写法：逐行转换为Python列表并构造PointStruct，按批调用upsert"""
+    points = [
+        PointStruct(
+            id=service.point_id_for(faq["id"]),
+            vector=embeddings[i].tolist(),
+            payload=service.build_payload(faq)
+        )
+        for i, faq in enumerate(faqs)
+    ]
+    batch_size = config.QDRANT_UPLOAD_BATCH_SIZE
+    for start in range(0, len(points), batch_size):
+        service.client.upsert(collection_name=service.collection_name, points=points[start:start + batch_size],
+                              wait=True)
+
+
+def measure(name: str, fn, repeat: int):
+    """先不开tracemalloc计时（取平均），再单独运行一次统计峰值内存分配"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} {elapsed * 1000:10.2f} ms   peak {peak / 1024 / 1024:8.2f} MiB")
+    return elapsed, peak
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="向量上传/检索路径转换开销基准")
+    parser.add_argument("--rows", type=int, default=20000, help="上传的点数量")
+    parser.add_argument("--dim", type=int, default=768, help="向量维度")
+    parser.add_argument("--queries", type=int, default=1000, help="检索次数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取平均耗时）")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.rows, args.dim), dtype=np.float32)
+    faqs = [{"id": f"faq_{i}", "question": f"问题{i}", "answer": f"答案{i}"} for i in range(args.rows)]
+    query = embeddings[0]
+
+    service = QdrantService()
+    service.client = create_client()
+
+    print(f"Upload {args.rows} x {args.dim} vectors (batch size {config.QDRANT_UPLOAD_BATCH_SIZE})")
+    legacy_time, legacy_peak = measure("tolist + PointStruct", lambda: legacy_upsert(service, faqs, embeddings),
+                                       args.repeat)
+    current_time, current_peak = measure("upload_collection(numpy)", lambda: service.upsert_points(faqs, embeddings),
+                                         args.repeat)
+    print(f"speedup {legacy_time / current_time:.2f}x, peak memory {legacy_peak / max(current_peak, 1):.2f}x lower")
+
+    print(f"\nSearch {args.queries} queries")
+    search_params = service._search_params()
+    list_time, _ = measure("query_points(tolist)", lambda: [
+        service.client.query_points(service.collection_name, query=query.tolist(), limit=5,
+                                    search_params=search_params)
+        for _ in range(args.queries)
+    ], args.repeat)
+    numpy_time, _ = measure("query_points(numpy)", lambda: [
+        service.client.query_points(service.collection_name, query=query, limit=5,
+                                    search_params=search_params)
+        for _ in range(args.queries)
+    ], args.repeat)
+    print(f"speedup {list_time / numpy_time:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
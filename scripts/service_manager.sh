@@ -161,8 +161,12 @@ initialize_data() {
     print_info "调用初始化接口..."
     init_response=$(curl -s -w "%{http_code}" -X POST http://localhost:5000/api/v1/faqs/initialize \
         -H "Content-Type: application/json")
+    curl_status=$?
     
-    if [[ $? -eq 0 ]] && [[ "${init_response: -3}" == "200" ]]; then
+    if [[ $curl_status -eq 0 ]] && [[ "${init_response: -3}" == "202" ]]; then
+        print_info "✅ 数据初始化任务已启动，可通过 GET /api/v1/jobs/<job_id> 查看进度"
+        print_info "响应: ${init_response%???}"  # 移除状态码部分
+    elif [[ $curl_status -eq 0 ]] && [[ "${init_response: -3}" == "200" ]]; then
         print_info "✅ 数据初始化成功"
         print_info "响应: ${init_response%???}"  # 移除状态码部分
     else
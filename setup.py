@@ -38,6 +38,9 @@ setup(
     entry_points={
         "console_scripts": [
             "faq-service=faq_retrieval.app:main",
+            "faq-service-async=faq_retrieval.async_app:main",
+            "faq-service-prefork=faq_retrieval.prefork:main",
+            "faq-admin=faq_retrieval.cli:main",
         ],
     },
     include_package_data=True,
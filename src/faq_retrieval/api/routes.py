@@ -1,26 +1,261 @@
 """
 API路由定义
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
+from werkzeug.local import LocalProxy
+import hmac
+import json
 import logging
+import os
+import threading
+import time
+from faq_retrieval import metrics, profiler, timing
+from faq_retrieval.config import config
+from faq_retrieval.startup import get_startup_timings
 from faq_retrieval.services.faq_service import FAQService
+from faq_retrieval.services.health_monitor import HealthMonitor
+from faq_retrieval.services.job_manager import JobManager, JobConflictError
 from faq_retrieval.services.model_manager import model_manager
+from faq_retrieval.services.process_stats import read_memory_usage
 
 logger = logging.getLogger(__name__)
 
 # 创建蓝图
 api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
 legacy_bp = Blueprint('legacy', __name__)
+probe_bp = Blueprint('probes', __name__)
 
-# 初始化FAQ服务
-faq_service = FAQService()
+# FAQ服务在首次请求时创建：导入本模块不建立任何网络客户端，
+# 预fork启动时各工作进程在fork之后各自创建自己的MySQL连接池和Qdrant客户端
+_faq_service = None
+_job_manager = None
+_health_monitor = None
+_services_lock = threading.RLock()
+
+
+def get_faq_service() -> FAQService:
+    global _faq_service
+    if _faq_service is None:
+        with _services_lock:
+            if _faq_service is None:
+                _faq_service = FAQService()
+    return _faq_service
+
+
+def get_job_manager() -> JobManager:
+    global _job_manager
+    if _job_manager is None:
+        with _services_lock:
+            if _job_manager is None:
+                service = get_faq_service()
+                _job_manager = JobManager(
+                    service,
+                    history_size=config.JOB_HISTORY_SIZE,
+                    store=service.shared_state.jobs if service.shared_state is not None else None,
+                    sync_interval=config.JOB_STATE_SYNC_INTERVAL
+                )
+    return _job_manager
+
+
+def get_health_monitor() -> HealthMonitor:
+    global _health_monitor
+    if _health_monitor is None:
+        with _services_lock:
+            if _health_monitor is None:
+                _health_monitor = HealthMonitor(
+                    get_faq_service().get_system_status,
+                    interval=config.HEALTH_REFRESH_INTERVAL,
+                    stale_after=config.HEALTH_STALE_AFTER
+                )
+    return _health_monitor
+
+
+def _warm_up():
+    service = get_faq_service()
+    if config.VECTOR_BACKEND.lower() == "numpy":
+        # 进程内向量库启动时为空，加载成功（同时重建精确匹配索引）前 /readyz 返回503
+        while not service.hydrate_vector_store()["success"]:
+            time.sleep(config.NUMPY_HYDRATE_RETRY_INTERVAL)
+    elif config.EXACT_MATCH_ENABLED:
+        service.refresh_exact_match_index()
+
+
+def start_background_warmup():
+    """在后台创建FAQ服务并加载数据（NumPy后端的向量、精确匹配索引），首个检索请求无需等待"""
+    threading.Thread(target=_warm_up, name="service-warmup", daemon=True).start()
+
+
+def _reset_services_after_fork():
+    """子进程不能沿用父进程的连接和锁，丢弃后按需重新创建（父进程的后台线程不会被复制）"""
+    global _faq_service, _job_manager, _health_monitor, _services_lock
+    _faq_service = None
+    _job_manager = None
+    _health_monitor = None
+    _services_lock = threading.RLock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_services_after_fork)
+
+faq_service = LocalProxy(get_faq_service)
+job_manager = LocalProxy(get_job_manager)
+
+
+def _validate_search_params(query_text, limit, similarity_threshold, hnsw_ef=None, exact=False):
+    """校验检索参数，返回错误信息，合法时返回None"""
+    if not isinstance(query_text, str) or not query_text.strip():
+        return "text field is required"
+    
+    if isinstance(limit, bool) or not isinstance(limit, int) or not (1 <= limit <= 50):
+        return "limit must be between 1 and 50"
+    
+    if isinstance(similarity_threshold, bool) or not isinstance(similarity_threshold, (int, float)) \
+            or not (0.0 <= similarity_threshold <= 1.0):
+        return "similarity must be between 0.0 and 1.0"
+    
+    if hnsw_ef is not None and (isinstance(hnsw_ef, bool) or not isinstance(hnsw_ef, int)
+                                or not (1 <= hnsw_ef <= 4096)):
+        return "hnsw_ef must be an integer between 1 and 4096"
+    
+    if not isinstance(exact, bool):
+        return "exact must be a boolean"
+    
+    return None
+
+
+def parse_search_request(data: dict):
+    """
+    解析单条检索请求体
+    
+    Returns:
+        (search_faqs的关键字参数, 错误信息)，参数非法时参数为None
+    """
+    query_text = data.get('text', '')
+    limit = data.get('limit', 5)
+    similarity_threshold = data.get('similarity', 0.0)
+    hnsw_ef = data.get('hnsw_ef')
+    exact_search = data.get('exact', False)
+    
+    error = _validate_search_params(query_text, limit, similarity_threshold, hnsw_ef, exact_search)
+    if error:
+        return None, error
+    
+    return {
+        "query": query_text.strip(),
+        "limit": limit,
+        "similarity_threshold": similarity_threshold,
+        "exact_match": data.get('exact_match'),
+        "hnsw_ef": hnsw_ef,
+        "exact_search": exact_search
+    }, None
+
+
+def parse_batch_search_request(data: dict):
+    """
+    解析批量检索请求体
+    
+    Returns:
+        (search_faqs_batch的查询列表, 错误信息)，参数非法时查询列表为None
+    """
+    raw_queries = data.get('queries')
+    if not isinstance(raw_queries, list) or not raw_queries:
+        return None, "queries must be a non-empty list"
+    
+    if len(raw_queries) > config.SEARCH_BATCH_MAX_QUERIES:
+        return None, f"At most {config.SEARCH_BATCH_MAX_QUERIES} queries are allowed per request"
+    
+    default_limit = data.get('limit', 5)
+    default_similarity = data.get('similarity', 0.0)
+    
+    queries = []
+    for index, raw_query in enumerate(raw_queries):
+        if not isinstance(raw_query, dict):
+            return None, f"queries[{index}] must be an object"
+        
+        query_text = raw_query.get('text', '')
+        limit = raw_query.get('limit', default_limit)
+        similarity_threshold = raw_query.get('similarity', default_similarity)
+        hnsw_ef = raw_query.get('hnsw_ef')
+        exact_search = raw_query.get('exact', False)
+        error = _validate_search_params(query_text, limit, similarity_threshold, hnsw_ef, exact_search)
+        if error:
+            return None, f"queries[{index}]: {error}"
+        
+        queries.append({
+            "text": query_text.strip(),
+            "limit": limit,
+            "similarity": similarity_threshold,
+            "exact_match": raw_query.get('exact_match'),
+            "hnsw_ef": hnsw_ef,
+            "exact": exact_search
+        })
+    
+    return queries, None
+
+def debug_timing_requested(headers, args, data=None) -> bool:
+    """请求头 X-Debug-Timing、查询参数或请求体中的 debug_timing 为1/true时返回各阶段耗时"""
+    if not config.DEBUG_TIMING_ENABLED:
+        return False
+    flag = headers.get('X-Debug-Timing') or args.get('debug_timing')
+    if flag is None and isinstance(data, dict):
+        flag = data.get('debug_timing')
+    return str(flag).lower() in ('1', 'true')
+
+def attach_debug_timing(payload: dict, request_timing: timing.RequestTiming, dumps=json.dumps) -> dict:
+    """
+    把各阶段耗时附加到响应体
+    
+    serialize阶段为不含耗时信息的响应体单独序列化一次的耗时（仅开启计时的请求多序列化一次）
+    """
+    start = time.perf_counter()
+    dumps(payload)
+    request_timing.add("serialize", time.perf_counter() - start)
+    return dict(payload, debug_timing=request_timing.to_dict())
+
+def _search_response(payload: dict, status_code: int, request_timing):
+    """检索接口响应，开启分阶段计时时附加耗时并设置Server-Timing响应头"""
+    if request_timing is None:
+        return jsonify(payload), status_code
+    response = jsonify(attach_debug_timing(payload, request_timing, dumps=current_app.json.dumps))
+    response.headers['Server-Timing'] = request_timing.server_timing_header()
+    return response, status_code
+
+def admin_request_allowed() -> bool:
+    """管理接口鉴权：配置了ADMIN_TOKEN时校验X-Admin-Token请求头，否则只允许本机请求"""
+    if config.ADMIN_TOKEN:
+        token = request.headers.get('X-Admin-Token', '')
+        return hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode())
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+def get_health_status(deep: bool = False):
+    """
+    健康检查结果
+    
+    Args:
+        deep: True时同步执行完整检查（同时更新快照），否则返回后台刷新的最近一次快照
+        
+    Returns:
+        (状态字典, HTTP状态码)
+    """
+    monitor = get_health_monitor()
+    if deep:
+        monitor.refresh()
+    status = monitor.get_snapshot()
+    healthy = status["success"] and not status["stale"]
+    return status, 200 if healthy else 503
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
-    """健康检查接口"""
+    """
+    健康检查接口
+    
+    Query参数:
+        deep: 为1/true时同步执行完整检查（MySQL计数、Qdrant集合信息），默认返回后台刷新的快照及其时效
+    """
     try:
-        status = faq_service.get_system_status()
-        return jsonify(status), 200 if status["success"] else 503
+        deep = request.args.get('deep', '').lower() in ('1', 'true')
+        status, status_code = get_health_status(deep)
+        return jsonify(status), status_code
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         return jsonify({
@@ -35,15 +270,42 @@ def initialize_faqs():
     
     Body参数:
     {
-        "recreate_collection": true  // 可选，是否重新创建集合，默认true
+        "recreate_collection": true,  // 可选，是否重新创建集合，默认true
+        "incremental": false,         // 可选，是否只同步新增、变化和删除的FAQ，默认false
+        "async": true                 // 可选，是否以后台任务方式运行（立即返回job_id），默认见配置
     }
     """
     try:
-        data = request.get_json() or {}
+        data = request.get_json(silent=True) or {}
         recreate_collection = data.get('recreate_collection', True)
+        incremental = data.get('incremental', False)
+        run_async = data.get('async', config.INIT_ASYNC_BY_DEFAULT)
         
-        logger.info(f"Starting full FAQ initialization, recreate_collection: {recreate_collection}")
-        result = faq_service.initialize_full_data(recreate_collection)
+        if run_async:
+            try:
+                job = job_manager.start_initialization(recreate_collection, incremental)
+            except JobConflictError as e:
+                return jsonify({
+                    "success": False,
+                    "message": str(e)
+                }), 409
+            
+            return jsonify({
+                "success": True,
+                "message": "Initialization job started",
+                "job_id": job.job_id,
+                "job": job.to_dict()
+            }), 202
+        
+        if faq_service.is_initializing() or job_manager.get_active_job() is not None:
+            return jsonify({
+                "success": False,
+                "message": "Another initialization is already running"
+            }), 409
+        
+        logger.info(f"Starting FAQ initialization, recreate_collection: {recreate_collection}, "
+                    f"incremental: {incremental}")
+        result = faq_service.initialize_full_data(recreate_collection, incremental)
         
         status_code = 200 if result["success"] else 500
         return jsonify(result), status_code
@@ -57,6 +319,52 @@ def initialize_faqs():
             "total_count": 0
         }), 500
 
+@api_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """获取初始化任务列表接口"""
+    return jsonify({
+        "success": True,
+        "jobs": [job.to_dict() for job in job_manager.list_jobs()]
+    }), 200
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """获取初始化任务进度接口"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "message": f"Job not found: {job_id}"
+        }), 404
+    
+    return jsonify({
+        "success": True,
+        "job": job.to_dict()
+    }), 200
+
+@api_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消初始化任务接口"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "message": f"Job not found: {job_id}"
+        }), 404
+    
+    if not job.is_active:
+        return jsonify({
+            "success": False,
+            "message": f"Job {job_id} is not running (status: {job.status})",
+            "job": job.to_dict()
+        }), 409
+    
+    return jsonify({
+        "success": True,
+        "message": "Cancellation requested",
+        "job": job.to_dict()
+    }), 202
+
 @api_bp.route('/faqs', methods=['POST'])
 def add_faq():
     """
@@ -100,62 +408,105 @@ def add_faq():
             "message": f"Failed to add FAQ: {str(e)}"
         }), 500
 
-@api_bp.route('/faqs/search', methods=['POST'])
-def search_faqs():
+@api_bp.route('/faqs/bulk', methods=['POST'])
+def add_faqs_bulk():
     """
-    搜索FAQ接口
+    批量添加FAQ接口
     
     Body参数:
     {
-        "text": "如何维修电脑？",      // 必需，查询文本
-        "limit": 5,               // 可选，返回结果数量，默认5
-        "similarity": 0.15        // 可选，相似度阈值，默认0.0
+        "faqs": [                                                    // 必需，FAQ列表
+            {"id": "faq_001", "question": "如何重置密码？", "answer": "请联系管理员"}
+        ]
     }
+    
+    全部成功返回201，部分失败返回207（失败条目见failed），全部失败返回500
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({
                 "success": False,
                 "message": "Request body is required"
             }), 400
         
-        query_text = data.get('text', '').strip()
-        limit = data.get('limit', 5)
-        similarity_threshold = data.get('similarity', 0.0)
+        faqs = data.get('faqs')
+        if not isinstance(faqs, list) or not faqs:
+            return jsonify({
+                "success": False,
+                "message": "faqs must be a non-empty list"
+            }), 400
         
-        if not query_text:
+        if len(faqs) > config.BULK_MAX_ITEMS:
             return jsonify({
                 "success": False,
-                "message": "text field is required"
+                "message": f"At most {config.BULK_MAX_ITEMS} FAQs are allowed per request"
             }), 400
         
-        # 验证参数范围
-        if not (1 <= limit <= 50):
+        logger.info(f"Adding {len(faqs)} FAQs in bulk")
+        result = faq_service.add_faqs_bulk(faqs)
+        
+        if result["success"]:
+            status_code = 201
+        elif result.get("added"):
+            status_code = 207
+        else:
+            status_code = 500
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        logger.error(f"Error in add_faqs_bulk: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Failed to add FAQs: {str(e)}"
+        }), 500
+
+@api_bp.route('/faqs/search', methods=['POST'])
+def search_faqs():
+    """
+    搜索FAQ接口
+    
+    Body参数:
+    {
+        "text": "如何维修电脑？",      // 必需，查询文本
+        "limit": 5,               // 可选，返回结果数量，默认5
+        "similarity": 0.15,       // 可选，相似度阈值，默认0.0
+        "exact_match": true,      // 可选，是否启用精确匹配快速通道，默认使用配置
+        "hnsw_ef": 128,           // 可选，HNSW检索ef，越大召回越高、延迟越高
+        "exact": false,           // 可选，是否跳过HNSW做精确向量检索，默认false
+        "debug_timing": false     // 可选，返回各阶段耗时（也可用请求头 X-Debug-Timing: 1）
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data:
             return jsonify({
                 "success": False,
-                "message": "limit must be between 1 and 50"
+                "message": "Request body is required"
             }), 400
         
-        if not (0.0 <= similarity_threshold <= 1.0):
+        params, error = parse_search_request(data)
+        if error:
             return jsonify({
                 "success": False,
-                "message": "similarity must be between 0.0 and 1.0"
+                "message": error
             }), 400
         
-        logger.info(f"Searching FAQs for query: {query_text}")
-        result = faq_service.search_faqs(query_text, limit, similarity_threshold)
+        logger.info(f"Searching FAQs for query: {params['query']}")
+        request_timing = timing.RequestTiming() if debug_timing_requested(request.headers, request.args, data) else None
+        with timing.activate(request_timing):
+            result = faq_service.search_faqs(**params)
         
         # 兼容原有API格式
         if result["success"]:
-            return jsonify({
+            return _search_response({
                 "results": result["results"]
-            }), 200
+            }, 200, request_timing)
         else:
-            return jsonify({
+            return _search_response({
                 "success": False,
                 "message": result["message"]
-            }), 500
+            }, 500, request_timing)
         
     except Exception as e:
         logger.error(f"Error in search_faqs: {e}")
@@ -164,6 +515,52 @@ def search_faqs():
             "message": f"Search failed: {str(e)}"
         }), 500
 
+@api_bp.route('/faqs/search/batch', methods=['POST'])
+def search_faqs_batch():
+    """
+    批量搜索FAQ接口，多个查询合并编码并一次检索
+    
+    Body参数:
+    {
+        "queries": [                          // 必需，查询列表
+            {"text": "如何维修电脑？", "limit": 3},
+            {"text": "如何重置密码？", "similarity": 0.3, "exact_match": false, "hnsw_ef": 128}
+        ],
+        "limit": 5,                           // 可选，各查询默认返回结果数量，默认5
+        "similarity": 0.0,                    // 可选，各查询默认相似度阈值，默认0.0
+        "debug_timing": false                 // 可选，返回各阶段耗时（也可用请求头 X-Debug-Timing: 1）
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({
+                "success": False,
+                "message": "Request body is required"
+            }), 400
+        
+        queries, error = parse_batch_search_request(data)
+        if error:
+            return jsonify({
+                "success": False,
+                "message": error
+            }), 400
+        
+        logger.info(f"Batch searching FAQs for {len(queries)} queries")
+        request_timing = timing.RequestTiming() if debug_timing_requested(request.headers, request.args, data) else None
+        with timing.activate(request_timing):
+            result = faq_service.search_faqs_batch(queries)
+        
+        status_code = 200 if result["success"] else 500
+        return _search_response(result, status_code, request_timing)
+        
+    except Exception as e:
+        logger.error(f"Error in search_faqs_batch: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Batch search failed: {str(e)}"
+        }), 500
+
 @api_bp.route('/faqs', methods=['GET'])
 def list_all_faqs():
     """获取所有FAQ数据接口"""
@@ -189,6 +586,97 @@ def list_all_faqs():
             "message": f"Failed to get FAQs: {str(e)}"
         }), 500
 
+@api_bp.route('/snapshots/export', methods=['POST'])
+def export_snapshot():
+    """
+    导出向量集合快照接口
+    
+    Body参数:
+    {
+        "name": "faq_20250808"     // 必需，快照名称（保存在服务端快照目录下）
+    }
+    """
+    try:
+        data = request.get_json() or {}
+        name = data.get('name')
+        if not name:
+            return jsonify({
+                "success": False,
+                "message": "name field is required"
+            }), 400
+        
+        logger.info(f"Exporting snapshot: {name}")
+        result = faq_service.export_snapshot(name=name)
+        
+        status_code = 200 if result["success"] else 500
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        logger.error(f"Error in export_snapshot: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Snapshot export failed: {str(e)}"
+        }), 500
+
+@api_bp.route('/snapshots/import', methods=['POST'])
+def import_snapshot():
+    """
+    从快照恢复向量集合接口
+    
+    Body参数:
+    {
+        "name": "faq_20250808",      // 必需，快照名称
+        "recreate_collection": true, // 可选，是否先重新创建集合，默认true
+        "force": false               // 可选，快照模型与当前模型不一致时是否仍然导入，默认false
+    }
+    """
+    try:
+        data = request.get_json() or {}
+        name = data.get('name')
+        if not name:
+            return jsonify({
+                "success": False,
+                "message": "name field is required"
+            }), 400
+        
+        logger.info(f"Importing snapshot: {name}")
+        result = faq_service.import_snapshot(
+            name=name,
+            recreate_collection=data.get('recreate_collection', True),
+            force=data.get('force', False)
+        )
+        
+        status_code = 200 if result["success"] else 500
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        logger.error(f"Error in import_snapshot: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Snapshot import failed: {str(e)}"
+        }), 500
+
+@api_bp.route('/collections/rollback', methods=['POST'])
+def rollback_collection():
+    """将检索切回重建前保留的旧集合（需配置QDRANT_KEEP_OLD_COLLECTIONS > 0）"""
+    try:
+        if faq_service.is_initializing():
+            return jsonify({
+                "success": False,
+                "message": "An initialization is already running"
+            }), 409
+        
+        result = faq_service.rollback_collection()
+        status_code = 200 if result["success"] else 409
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        logger.error(f"Error in rollback_collection: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Rollback failed: {str(e)}"
+        }), 500
+
 @api_bp.route('/model/info', methods=['GET'])
 def get_model_info():
     """获取模型信息接口"""
@@ -196,7 +684,8 @@ def get_model_info():
         model_info = model_manager.get_model_info()
         return jsonify({
             "success": True,
-            "model_info": model_info
+            "model_info": model_info,
+            "process": read_memory_usage()
         }), 200
     except Exception as e:
         logger.error(f"Error getting model info: {e}")
@@ -205,6 +694,97 @@ def get_model_info():
             "message": f"Failed to get model info: {str(e)}"
         }), 500
 
+@api_bp.route('/admin/profile', methods=['POST'])
+def capture_profile():
+    """
+    按需剖析：阻塞采集指定时长后返回剖析文件（同一时间只允许一个采集）
+    需要PROFILING_ENABLED；配置了ADMIN_TOKEN时需带 X-Admin-Token 请求头，否则只接受本机请求
+    
+    Body参数（也可用同名查询参数）:
+    {
+        "seconds": 10,          // 可选，采集时长，默认10，最大PROFILE_MAX_SECONDS
+        "type": "cpu",          // 可选，"cpu"采样所有线程的Python调用栈（折叠栈文本）；
+                                //       "torch"记录窗口内模型编码的torch profiler trace（Chrome trace JSON）
+        "interval_ms": 5,       // 可选，cpu采样间隔（毫秒）
+        "include_idle": false   // 可选，cpu采样是否保留阻塞等待中的线程
+    }
+    """
+    try:
+        if not config.PROFILING_ENABLED:
+            return jsonify({
+                "success": False,
+                "message": "Profiling is disabled"
+            }), 404
+        if not admin_request_allowed():
+            return jsonify({
+                "success": False,
+                "message": "Admin token required"
+            }), 403
+        
+        options = dict(request.args.items())
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            options.update(data)
+        try:
+            seconds = float(options.get('seconds', 10))
+            interval_ms = float(options.get('interval_ms', config.PROFILE_SAMPLE_INTERVAL_MS))
+        except (TypeError, ValueError):
+            return jsonify({
+                "success": False,
+                "message": "seconds and interval_ms must be numbers"
+            }), 400
+        if not (0 < seconds <= config.PROFILE_MAX_SECONDS):
+            return jsonify({
+                "success": False,
+                "message": f"seconds must be between 0 and {config.PROFILE_MAX_SECONDS}"
+            }), 400
+        if not (0.1 <= interval_ms <= 1000):
+            return jsonify({
+                "success": False,
+                "message": "interval_ms must be between 0.1 and 1000"
+            }), 400
+        
+        profile_type = options.get('type', 'cpu')
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if profile_type == 'cpu':
+            include_idle = str(options.get('include_idle', False)).lower() in ('1', 'true')
+            content, stats = profiler.sample_cpu_profile(seconds, interval_ms / 1000.0, include_idle)
+            filename = f"cpu-profile-{os.getpid()}-{stamp}.folded"
+            mimetype = "text/plain"
+        elif profile_type == 'torch':
+            backend = model_manager.encoder_backend or config.ENCODER_BACKEND
+            if backend not in ("torch", "torch-int8") or config.ENCODER_WORKERS > 0:
+                return jsonify({
+                    "success": False,
+                    "message": "torch profiling requires the torch or torch-int8 backend without encoder workers"
+                }), 400
+            content, stats = profiler.capture_torch_trace(seconds)
+            filename = f"torch-trace-{os.getpid()}-{stamp}.json"
+            mimetype = "application/json"
+        else:
+            return jsonify({
+                "success": False,
+                "message": "type must be 'cpu' or 'torch'"
+            }), 400
+        
+        logger.info(f"Captured {profile_type} profile: {stats}")
+        response = Response(content, mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['X-Profile-Stats'] = json.dumps(stats)
+        return response, 200
+        
+    except profiler.ProfilerBusyError as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 409
+    except Exception as e:
+        logger.error(f"Error capturing profile: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Profile capture failed: {str(e)}"
+        }), 500
+
 # 兼容旧版API
 @legacy_bp.route('/search', methods=['POST'])
 def legacy_search():
@@ -220,3 +800,45 @@ def legacy_list_all():
 def legacy_health():
     """兼容旧版健康检查接口"""
     return health_check()
+
+# 存活/就绪探针
+@probe_bp.route('/livez', methods=['GET'])
+def liveness():
+    """存活探针：进程能处理请求即返回200，不检查任何依赖"""
+    return jsonify({
+        "success": True,
+        "message": "alive"
+    }), 200
+
+@probe_bp.route('/readyz', methods=['GET'])
+def readiness():
+    """就绪探针：模型加载完成且向量库可用（短超时实际探测）时返回200，否则返回503；NumPy后端还要求启动加载已完成（数据库为空时也算完成）"""
+    checks = {
+        "model": model_manager.load_state,
+        "vector_store": False
+    }
+    try:
+        checks["vector_store"] = faq_service.vector_service.ping()
+        if config.VECTOR_BACKEND.lower() == "numpy":
+            checks["hydration"] = faq_service.hydration_state
+            checks["vector_store"] = checks["vector_store"] and faq_service.hydration_state == "loaded"
+    except Exception as e:
+        logger.warning(f"Readiness check failed to probe vector store: {e}")
+    
+    ready = model_manager.is_model_loaded() and checks["vector_store"]
+    return jsonify({
+        "success": ready,
+        "message": "ready" if ready else "not ready",
+        "checks": checks,
+        "startup": get_startup_timings()
+    }), 200 if ready else 503
+
+@probe_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """监控指标（Prometheus文本格式），只包含当前进程的统计"""
+    if not config.METRICS_ENABLED:
+        return jsonify({
+            "success": False,
+            "message": "Metrics are disabled"
+        }), 404
+    return Response(metrics.render(), mimetype=None, content_type=metrics.CONTENT_TYPE)
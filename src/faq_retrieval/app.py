@@ -1,9 +1,10 @@
 """
 FAQ检索API服务主应用
 """
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request
 import logging
 import sys
+import time
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -11,8 +12,9 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 sys.path.insert(0, str(project_root / "src"))
 
+from faq_retrieval import metrics, startup
 from faq_retrieval.config import config
-from faq_retrieval.api.routes import api_bp, legacy_bp
+from faq_retrieval.api.routes import api_bp, legacy_bp, probe_bp, start_background_warmup
 from faq_retrieval.services.model_manager import model_manager
 
 # 配置日志
@@ -21,25 +23,45 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+startup.record_phase("imports", startup.elapsed())
 
-def create_app():
-    """应用工厂函数"""
+def _register_metrics_hooks(app):
+    """按路由统计请求数、5xx错误数和总耗时"""
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+    
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else None
+            metrics.record_request(request.method, rule, response.status_code, time.perf_counter() - start)
+        return response
+
+def create_app(preload_model: bool = True):
+    """
+    应用工厂函数
+    
+    Args:
+        preload_model: 是否在后台线程中预加载模型和精确匹配索引（预fork启动时由主进程决定何时加载）
+    """
+    start = time.perf_counter()
     app = Flask(__name__)
     
     # 注册蓝图
     app.register_blueprint(api_bp)
     app.register_blueprint(legacy_bp)
+    app.register_blueprint(probe_bp)
+    
+    if config.METRICS_ENABLED:
+        _register_metrics_hooks(app)
     
-    # 在应用上下文中预加载模型
-    with app.app_context():
-        logger.info("Initializing embedding model on application startup...")
-        try:
-            if model_manager.load_model():
-                logger.info("Model loaded successfully on startup")
-            else:
-                logger.warning("Failed to load model on startup")
-        except Exception as e:
-            logger.error(f"Error loading model on startup: {e}")
+    # 模型在后台加载，端口无需等待模型加载完成即可打开；加载完成前 /readyz 返回503
+    if preload_model:
+        logger.info("Loading embedding model in background...")
+        model_manager.start_background_load()
+        start_background_warmup()
     
     # 错误处理
     @app.errorhandler(404)
@@ -57,6 +79,7 @@ def create_app():
             "message": "Internal server error"
         }), 500
     
+    startup.record_phase("create_app", time.perf_counter() - start)
     return app
 
 def main():
@@ -70,6 +93,7 @@ def main():
     logger.info(f"Model: {config.MODEL_NAME}")
     logger.info(f"Database: {config.MYSQL_HOST}:{config.MYSQL_PORT}/{config.MYSQL_DATABASE}")
     logger.info(f"Qdrant: {config.QDRANT_HOST}:{config.QDRANT_PORT}")
+    logger.info(f"Binding {flask_config['HOST']}:{flask_config['PORT']} {startup.elapsed():.3f}s after start")
     
     app.run(
         host=flask_config['HOST'], 
@@ -0,0 +1,231 @@
+"""
+FAQ检索API服务 asyncio入口（Quart + Hypercorn）
+检索和健康检查接口以协程实现：Qdrant使用异步客户端，模型编码在有界线程池中执行，
+MySQL访问放到线程池；其余/api/v1接口和旧版接口仍由Flask应用处理，在线程池中执行
+"""
+import asyncio
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, g, jsonify, request
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+
+from faq_retrieval import metrics, timing
+from faq_retrieval.config import config
+from faq_retrieval.app import create_app
+from faq_retrieval.api.routes import (attach_debug_timing, debug_timing_requested, faq_service, get_health_status,
+                                     parse_batch_search_request, parse_search_request)
+from faq_retrieval.services.async_search import AsyncSearchService, InferenceBusyError, InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class FallbackDispatcher:
+    """ASGI分发：Quart应用中注册了的路由由协程处理，其余请求转交Flask应用"""
+
+    def __init__(self, async_app: Quart, wsgi_app):
+        self.async_app = async_app
+        self.wsgi_app = AsyncioWSGIMiddleware(wsgi_app, max_body_size=config.ASYNC_MAX_BODY_SIZE)
+
+    def _is_async_route(self, scope) -> bool:
+        adapter = self.async_app.url_map.bind("")
+        try:
+            adapter.match(scope["path"], method=scope["method"])
+            return True
+        except (NotFound, MethodNotAllowed):
+            return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not self._is_async_route(scope):
+            await self.wsgi_app(scope, receive, send)
+        else:
+            await self.async_app(scope, receive, send)
+
+
+def create_async_app():
+    """
+    asyncio应用工厂函数
+
+    Returns:
+        ASGI应用（可交给Hypercorn等ASGI服务器运行）
+    """
+    flask_app = create_app()
+    app = Quart(__name__)
+
+    inference = InferenceExecutor(
+        max_workers=config.ASYNC_INFERENCE_WORKERS,
+        max_pending=config.ASYNC_INFERENCE_MAX_PENDING
+    )
+    search_service = AsyncSearchService(faq_service, inference)
+
+    @app.before_serving
+    async def configure_executor():
+        # run_in_executor(None, ...)及转交Flask的请求都使用默认线程池
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=config.ASYNC_IO_WORKERS, thread_name_prefix="blocking-io")
+        )
+
+    @app.after_serving
+    async def shutdown():
+        inference.shutdown()
+        close_async_client = getattr(faq_service.vector_service, "close_async_client", None)
+        if close_async_client is not None:
+            await close_async_client()
+
+    if config.METRICS_ENABLED:
+        # 转交Flask的请求由Flask应用自己的钩子统计
+        @app.before_request
+        async def start_request_timer():
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        async def record_request_metrics(response):
+            start = g.pop("request_start", None)
+            if start is not None:
+                rule = request.url_rule.rule if request.url_rule is not None else None
+                metrics.record_request(request.method, rule, response.status_code, time.perf_counter() - start)
+            return response
+
+    def search_response(payload: dict, status_code: int, request_timing):
+        if request_timing is None:
+            return jsonify(payload), status_code
+        response = jsonify(attach_debug_timing(payload, request_timing, dumps=app.json.dumps))
+        response.headers['Server-Timing'] = request_timing.server_timing_header()
+        return response, status_code
+
+    def busy_response(e: InferenceBusyError):
+        logger.warning(f"Rejected search request: {e}")
+        return jsonify({
+            "success": False,
+            "message": "Server is busy, please retry later"
+        }), 503
+
+    @app.route('/api/v1/health', methods=['GET'])
+    @app.route('/health', methods=['GET'])
+    async def health_check():
+        """健康检查接口（deep=1时同步执行完整检查）"""
+        try:
+            deep = request.args.get('deep', '').lower() in ('1', 'true')
+            loop = asyncio.get_running_loop()
+            status, status_code = await loop.run_in_executor(None, get_health_status, deep)
+            status["inference_executor"] = inference.get_stats()
+            return jsonify(status), status_code
+        except Exception as e:
+            logger.error(f"Health check failed: {e}")
+            return jsonify({
+                "success": False,
+                "message": f"Health check failed: {str(e)}"
+            }), 503
+
+    @app.route('/api/v1/faqs/search', methods=['POST'])
+    @app.route('/search', methods=['POST'])
+    async def search_faqs():
+        """搜索FAQ接口（请求与响应格式同Flask版本）"""
+        try:
+            data = await request.get_json()
+            if not data:
+                return jsonify({
+                    "success": False,
+                    "message": "Request body is required"
+                }), 400
+
+            params, error = parse_search_request(data)
+            if error:
+                return jsonify({
+                    "success": False,
+                    "message": error
+                }), 400
+
+            logger.info(f"Searching FAQs for query: {params['query']}")
+            request_timing = timing.RequestTiming() if debug_timing_requested(request.headers, request.args, data) else None
+            with timing.activate(request_timing):
+                result = await search_service.search_faqs(**params)
+
+            if result["success"]:
+                return search_response({
+                    "results": result["results"]
+                }, 200, request_timing)
+            else:
+                return search_response({
+                    "success": False,
+                    "message": result["message"]
+                }, 500, request_timing)
+
+        except InferenceBusyError as e:
+            return busy_response(e)
+        except Exception as e:
+            logger.error(f"Error in search_faqs: {e}")
+            return jsonify({
+                "success": False,
+                "message": f"Search failed: {str(e)}"
+            }), 500
+
+    @app.route('/api/v1/faqs/search/batch', methods=['POST'])
+    async def search_faqs_batch():
+        """批量搜索FAQ接口（请求与响应格式同Flask版本）"""
+        try:
+            data = await request.get_json(silent=True)
+            if not data:
+                return jsonify({
+                    "success": False,
+                    "message": "Request body is required"
+                }), 400
+
+            queries, error = parse_batch_search_request(data)
+            if error:
+                return jsonify({
+                    "success": False,
+                    "message": error
+                }), 400
+
+            logger.info(f"Batch searching FAQs for {len(queries)} queries")
+            request_timing = timing.RequestTiming() if debug_timing_requested(request.headers, request.args, data) else None
+            with timing.activate(request_timing):
+                result = await search_service.search_faqs_batch(queries)
+
+            status_code = 200 if result["success"] else 500
+            return search_response(result, status_code, request_timing)
+
+        except InferenceBusyError as e:
+            return busy_response(e)
+        except Exception as e:
+            logger.error(f"Error in search_faqs_batch: {e}")
+            return jsonify({
+                "success": False,
+                "message": f"Batch search failed: {str(e)}"
+            }), 500
+
+    return FallbackDispatcher(app, flask_app)
+
+
+def main():
+    """主函数"""
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config as HypercornConfig
+
+    app = create_async_app()
+
+    flask_config = config.get_flask_config()
+    hypercorn_config = HypercornConfig()
+    hypercorn_config.bind = [f"{flask_config['HOST']}:{flask_config['PORT']}"]
+    hypercorn_config.accesslog = None
+
+    logger.info("Starting FAQ retrieval API service (asyncio)...")
+    logger.info(f"Model: {config.MODEL_NAME}")
+    logger.info(f"Database: {config.MYSQL_HOST}:{config.MYSQL_PORT}/{config.MYSQL_DATABASE}")
+    logger.info(f"Qdrant: {config.QDRANT_HOST}:{config.QDRANT_PORT}")
+
+    asyncio.run(serve(app, hypercorn_config))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+FAQ检索服务管理命令行工具
+
+用法:
+    faq-admin snapshot-export --name faq_20250808
+    faq-admin snapshot-import --path /data/backup/faq_20250808 --keep-collection
+    faq-admin sync
+    faq-admin migrate-point-ids --dry-run
+    faq-admin rollback
+    faq-admin export-onnx
+    faq-admin check-encoder --backend onnx --limit 500
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def _add_snapshot_location(parser: argparse.ArgumentParser):
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--name", help="快照名称（位于配置的快照目录下）")
+    group.add_argument("--path", help="快照目录的完整路径")
+
+
+def _print_result(result: dict) -> int:
+    print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+    return 0 if result.get("success") else 1
+
+
+def _in_process_backend_error() -> dict:
+    """NumPy后端的向量只存在于服务进程内，命令行进程中的读写对服务无效"""
+    from faq_retrieval.config import config
+    if config.VECTOR_BACKEND.lower() != "numpy":
+        return {}
+    return {
+        "success": False,
+        "message": ("The numpy vector backend keeps vectors inside the service process; "
+                    "use the HTTP API (/api/v1/faqs/initialize, /api/v1/snapshots/import) or NUMPY_SNAPSHOT_NAME instead")
+    }
+
+
+def cmd_snapshot_export(args) -> int:
+    error = _in_process_backend_error()
+    if error:
+        return _print_result(error)
+    from faq_retrieval.services.faq_service import FAQService
+    return _print_result(FAQService().export_snapshot(name=args.name, path=args.path))
+
+
+def cmd_snapshot_import(args) -> int:
+    error = _in_process_backend_error()
+    if error:
+        return _print_result(error)
+    from faq_retrieval.services.faq_service import FAQService
+    return _print_result(FAQService().import_snapshot(
+        name=args.name,
+        path=args.path,
+        recreate_collection=not args.keep_collection,
+        force=args.force
+    ))
+
+
+def cmd_sync(args) -> int:
+    error = _in_process_backend_error()
+    if error:
+        return _print_result(error)
+    from faq_retrieval.services.faq_service import FAQService
+    if args.full:
+        return _print_result(FAQService().initialize_full_data(recreate_collection=True))
+    return _print_result(FAQService().sync_incremental())
+
+
+def cmd_migrate_point_ids(args) -> int:
+    error = _in_process_backend_error()
+    if error:
+        return _print_result(error)
+    from faq_retrieval.services.faq_service import FAQService
+    return _print_result(FAQService().migrate_point_ids(dry_run=args.dry_run))
+
+
+def cmd_rollback(args) -> int:
+    error = _in_process_backend_error()
+    if error:
+        return _print_result(error)
+    from faq_retrieval.services.faq_service import FAQService
+    return _print_result(FAQService().rollback_collection())
+
+
+def cmd_export_onnx(args) -> int:
+    from faq_retrieval.config import config
+    from faq_retrieval.services.model_manager import model_manager
+    from faq_retrieval.services.onnx_encoder import export_onnx
+
+    model = model_manager.create_encoder("torch", "cpu")
+    if model is None:
+        return _print_result({"success": False, "message": "Failed to load reference model"})
+    output_dir = Path(args.output) if args.output else config.ONNX_MODEL_DIR
+    encoder_config = export_onnx(model, output_dir, quantize=not args.no_quantize)
+    return _print_result({
+        "success": True,
+        "message": f"Exported ONNX model to {output_dir}",
+        "encoder_config": encoder_config
+    })
+
+
+def _load_sample_texts(args) -> list:
+    if args.texts_file:
+        with open(args.texts_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()][:args.limit]
+    from faq_retrieval.services.database import FAQRepository
+    chunk = next(FAQRepository().iter_faq_chunks(args.limit), [])
+    return [faq["question"] for faq in chunk]
+
+
+def cmd_check_encoder(args) -> int:
+    import time
+    from faq_retrieval.config import config
+    from faq_retrieval.services.model_manager import model_manager
+    from faq_retrieval.services.onnx_encoder import cosine_agreement, top_k_overlap
+
+    texts = _load_sample_texts(args)
+    if not texts:
+        return _print_result({"success": False, "message": "No sample texts available"})
+
+    encoders = {
+        "reference": model_manager.create_encoder("torch", "cpu"),
+        "candidate": model_manager.create_encoder(args.backend)
+    }
+    vectors, timings = {}, {}
+    for name, encoder in encoders.items():
+        if encoder is None:
+            return _print_result({"success": False, "message": f"Failed to create {name} encoder"})
+        encoder.encode(texts[:args.batch_size], batch_size=args.batch_size)  # 预热
+        start = time.time()
+        vectors[name] = encoder.encode(texts, batch_size=args.batch_size, convert_to_numpy=True)
+        timings[name] = time.time() - start
+
+    agreement = cosine_agreement(vectors["reference"], vectors["candidate"])
+    return _print_result({
+        "success": agreement["mean"] >= config.ENCODER_AGREEMENT_THRESHOLD,
+        "backend": args.backend,
+        "threshold": config.ENCODER_AGREEMENT_THRESHOLD,
+        "cosine_agreement": agreement,
+        "top5_overlap": top_k_overlap(vectors["reference"], vectors["candidate"], k=5),
+        "reference_seconds": round(timings["reference"], 3),
+        "candidate_seconds": round(timings["candidate"], 3),
+        "speedup": round(timings["reference"] / max(timings["candidate"], 1e-9), 2)
+    })
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="faq-admin", description="FAQ检索服务管理工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("snapshot-export", help="导出向量集合快照")
+    _add_snapshot_location(export_parser)
+    export_parser.set_defaults(func=cmd_snapshot_export)
+
+    import_parser = subparsers.add_parser("snapshot-import", help="从快照恢复向量集合（不重新编码）")
+    _add_snapshot_location(import_parser)
+    import_parser.add_argument("--keep-collection", action="store_true",
+                               help="不重新创建集合，直接写入现有集合")
+    import_parser.add_argument("--force", action="store_true",
+                               help="快照模型与当前模型不一致时仍然导入")
+    import_parser.set_defaults(func=cmd_snapshot_import)
+
+    sync_parser = subparsers.add_parser("sync", help="将MySQL中的FAQ同步到向量库（默认增量）")
+    sync_parser.add_argument("--full", action="store_true", help="全量重建集合")
+    sync_parser.set_defaults(func=cmd_sync)
+
+    migrate_parser = subparsers.add_parser("migrate-point-ids",
+                                           help="将旧版点ID迁移为稳定ID并删除重复点（一次性）")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="只统计，不修改集合")
+    migrate_parser.set_defaults(func=cmd_migrate_point_ids)
+
+    rollback_parser = subparsers.add_parser("rollback", help="将别名切回重建前保留的旧集合")
+    rollback_parser.set_defaults(func=cmd_rollback)
+
+    export_onnx_parser = subparsers.add_parser("export-onnx", help="将编码模型导出为ONNX（默认同时生成int8量化模型）")
+    export_onnx_parser.add_argument("--output", help="输出目录，默认使用配置的ONNX_MODEL_DIR")
+    export_onnx_parser.add_argument("--no-quantize", action="store_true", help="不生成int8量化模型")
+    export_onnx_parser.set_defaults(func=cmd_export_onnx)
+
+    check_parser = subparsers.add_parser("check-encoder", help="比较候选编码后端与原始PyTorch模型的向量一致度和速度")
+    check_parser.add_argument("--backend", default="onnx", choices=["torch-int8", "onnx"], help="候选编码后端")
+    check_parser.add_argument("--texts-file", help="样本文本文件（每行一条），默认从数据库读取FAQ问题")
+    check_parser.add_argument("--limit", type=int, default=500, help="样本数量")
+    check_parser.add_argument("--batch-size", type=int, default=32, help="编码批大小")
+    check_parser.set_defaults(func=cmd_check_encoder)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
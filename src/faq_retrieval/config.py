@@ -14,6 +14,9 @@ class Config:
         # 检测操作系统
         self.OS_TYPE = platform.system().lower()
         
+        # 向量集合快照目录
+        self.SNAPSHOT_DIR = self.PROJECT_ROOT / "snapshots"
+        
         # 设置缓存目录
         self._setup_cache_dirs()
         
@@ -26,6 +29,8 @@ class Config:
         
         self.HF_CACHE_DIR = cache_base / "huggingface"
         self.TRANSFORMERS_CACHE_DIR = cache_base / "transformers"
+        # 导出的ONNX模型目录（faq-admin export-onnx 生成）
+        self.ONNX_MODEL_DIR = cache_base / "onnx" / "text2vec-base-chinese"
         
         # 创建缓存目录（如果不存在）
         self.HF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
@@ -71,11 +76,89 @@ class Config:
     # Qdrant配置
     QDRANT_HOST = "10.4.118.159"
     QDRANT_PORT = 6333
-    COLLECTION_NAME = "faq_sm06"
+    COLLECTION_NAME = "faq_sm06"  # 检索使用的别名，实际数据在 <COLLECTION_NAME>__<时间戳> 版本化集合中
+    QDRANT_KEEP_OLD_COLLECTIONS = 1  # 重建索引后保留的旧集合数量（用于回滚），0表示切换后立即删除
+    QDRANT_PREFER_GRPC = False  # 使用gRPC传输（检索单跳开销和批量写入吞吐优于REST）
+    QDRANT_GRPC_PORT = 6334
+    QDRANT_TIMEOUT = 30  # 客户端默认请求超时（秒），集合管理和写入使用
+    QDRANT_PROBE_TIMEOUT = 2  # 就绪探针和健康检查探测Qdrant的超时（秒）
+    QDRANT_SEARCH_TIMEOUT = 5  # 检索请求超时（秒）
+    QDRANT_UPLOAD_BATCH_SIZE = 256  # 批量写入时每个请求的点数量
+    QDRANT_UPLOAD_PARALLEL = 1  # 批量写入的并行进程数，1表示在当前进程中顺序上传
+    QDRANT_UPLOAD_PARALLEL_MIN_POINTS = 50000  # 单次写入达到该点数时才使用多进程上传（每次调用都会新建进程池）
+    
+    # Qdrant集合索引配置（创建新集合时生效，修改后需全量初始化重建集合）
+    QDRANT_HNSW_M = 16  # HNSW图每个节点的边数，越大召回越高、内存越多
+    QDRANT_HNSW_EF_CONSTRUCT = 100  # 建图时的候选集大小，越大建图越慢、图质量越高
+    QDRANT_VECTORS_ON_DISK = False  # 原始向量存放在磁盘（mmap）而非内存
+    QDRANT_SCALAR_QUANTIZATION = False  # 启用int8标量量化，量化向量内存约为原始向量的1/4
+    QDRANT_QUANTIZATION_QUANTILE = 0.99  # 量化时计算取值范围使用的分位数
+    QDRANT_QUANTIZATION_ALWAYS_RAM = True  # 量化向量常驻内存（原始向量可放磁盘）
+    QDRANT_QUANTIZATION_RESCORE = True  # 检索时用原始向量对量化候选重新打分
+    QDRANT_QUANTIZATION_OVERSAMPLING = 2.0  # 量化检索的候选过采样倍数
+    QDRANT_SEARCH_HNSW_EF = None  # 检索时的默认ef（None使用服务端默认值），可按请求覆盖
+    
+    # 向量检索后端: "qdrant" 使用Qdrant服务；"numpy" 使用进程内NumPy精确检索（数据保存在内存中）
+    VECTOR_BACKEND = "qdrant"
+    NUMPY_INITIAL_CAPACITY = 1024  # NumPy后端向量矩阵的初始容量（行数）
+    NUMPY_SNAPSHOT_NAME = ""  # NumPy后端启动时从SNAPSHOT_DIR下的该快照加载数据，为空时跳过
+    NUMPY_HYDRATE_FROM_MYSQL = True  # NumPy后端启动时（或快照加载失败时）从MySQL分块读取并编码
+    NUMPY_HYDRATE_RETRY_INTERVAL = 30  # 启动加载失败后的重试间隔（秒）
+    SNAPSHOT_BATCH_SIZE = 512  # 快照导出/导入时每批处理的点数量
+    
+    # 全量初始化流水线配置（分块读取 -> 编码 -> 写入并发执行）
+    INIT_CHUNK_SIZE = 512  # 每次从MySQL读取的FAQ数量
+    INIT_QUEUE_SIZE = 2  # 各阶段之间缓冲的最大分块数
+    INIT_ENCODE_BATCH_SIZE = 32  # 编码批大小
+    INIT_ASYNC_BY_DEFAULT = True  # 初始化接口默认以后台任务方式运行（请求体可用"async"覆盖）
+    JOB_HISTORY_SIZE = 20  # 保留的历史任务数量
+    JOB_STATE_SYNC_INTERVAL = 1  # 多进程部署时任务进度写入共享目录、检查跨进程取消请求的间隔（秒）
     
     # 模型配置
     MODEL_NAME = 'shibing624/text2vec-base-chinese'
     
+    # 编码后端: "torch" 原始PyTorch模型；"torch-int8" PyTorch动态int8量化（仅CPU）；
+    # "onnx" ONNX Runtime（需先执行 faq-admin export-onnx，并安装onnxruntime）
+    ENCODER_BACKEND = "torch"
+    ENCODER_NUM_THREADS = 0  # 编码使用的CPU线程数，0表示使用库的默认值
+    ONNX_QUANTIZED = True  # ONNX后端优先加载int8动态量化模型
+    ENCODER_AGREEMENT_THRESHOLD = 0.99  # 校验候选后端时要求的最低平均余弦一致度
+
+    # 编码进程池配置（每个工作进程各自加载一份模型，编码不再占用请求进程的GIL）
+    ENCODER_WORKERS = 0  # 编码工作进程数，0表示在当前进程内编码
+    ENCODER_WORKER_TORCH_THREADS = 1  # 每个工作进程的推理线程数，0表示使用库的默认值
+    ENCODER_WORKER_TIMEOUT = 60  # 等待空闲工作进程及单次编码的超时时间（秒），超时的进程会被重启
+    ENCODER_WORKER_START_TIMEOUT = 300  # 等待工作进程加载模型的超时时间（秒）
+    
+    # 查询向量缓存配置（按归一化文本+模型缓存查询向量）
+    EMBEDDING_CACHE_ENABLED = True
+    EMBEDDING_CACHE_MAX_SIZE = 10000  # 最大缓存条目数
+    EMBEDDING_CACHE_TTL = 3600  # 缓存有效期（秒），0表示不过期
+    
+    # 检索结果缓存配置（写入数据后通过集合版本号自动失效）
+    SEARCH_CACHE_ENABLED = True
+    SEARCH_CACHE_MAX_SIZE = 5000  # 最大缓存条目数
+    SEARCH_CACHE_TTL = 300  # 缓存有效期（秒），0表示不过期
+    
+    # 批量检索配置
+    SEARCH_BATCH_MAX_QUERIES = 100  # 单次批量检索请求最多包含的查询数
+    
+    # 批量导入配置
+    BULK_MAX_ITEMS = 10000  # 单次批量导入请求最多包含的FAQ数
+    BULK_CHUNK_SIZE = 256  # 每次编码并写入向量库的FAQ数
+    
+    # 查询编码微批调度配置（合并并发请求中的单条查询一起编码）
+    EMBEDDING_BATCH_ENABLED = True
+    EMBEDDING_BATCH_MAX_SIZE = 32  # 单批最大文本数
+    EMBEDDING_BATCH_MAX_WAIT_MS = 5  # 凑批最大等待时间（毫秒）
+    EMBEDDING_BATCH_QUEUE_SIZE = 1000  # 等待队列最大长度，超出时拒绝请求
+    EMBEDDING_BATCH_TIMEOUT = 30  # 调用方等待编码结果的超时时间（秒）
+    
+    # 精确匹配快速通道（查询与已有问句一致时直接返回，跳过模型和Qdrant）
+    EXACT_MATCH_ENABLED = True
+    EXACT_MATCH_INDEX_TTL = 300  # 索引定期从向量库重新加载的间隔（秒），以感知其他进程写入的数据；0表示不过期
+    EXACT_MATCH_INDEX_RETRY_INTERVAL = 10  # 从向量库加载索引失败后的重试间隔（秒）
+    
     # MySQL数据库配置
     MYSQL_HOST = "10.4.118.159"
     MYSQL_PORT = 3306
@@ -84,6 +167,42 @@ class Config:
     MYSQL_DATABASE = "anarkh"  # 请根据实际数据库名称修改
     MYSQL_CHARSET = "utf8mb4"
     
+    # MySQL连接池配置
+    MYSQL_POOL_MIN_SIZE = 1  # 空闲回收时至少保留的连接数
+    MYSQL_POOL_MAX_SIZE = 10  # 最大连接数
+    MYSQL_POOL_IDLE_TIMEOUT = 300  # 空闲连接超时关闭时间（秒）
+    MYSQL_POOL_WAIT_TIMEOUT = 10  # 连接池耗尽时等待可用连接的最长时间（秒）
+    MYSQL_POOL_PRE_PING = True  # 取出连接前是否探活
+    MYSQL_POOL_PING_INTERVAL = 30  # 空闲超过该时间（秒）的连接在取出前探活
+    
+    # 健康检查配置（完整检查在后台定期执行，接口返回最近一次结果）
+    HEALTH_REFRESH_INTERVAL = 10  # 后台刷新间隔（秒）
+    HEALTH_STALE_AFTER = 60  # 快照超过该时间（秒）未刷新时健康检查返回503
+    
+    # 监控指标配置（Prometheus文本格式，GET /metrics）
+    METRICS_ENABLED = True  # 是否记录请求指标并开放 /metrics
+    
+    # 请求分阶段计时与按需剖析配置
+    DEBUG_TIMING_ENABLED = False  # 开启后检索请求带 X-Debug-Timing: 1 时随响应返回各阶段耗时
+    PROFILING_ENABLED = False  # 是否开放 POST /api/v1/admin/profile
+    ADMIN_TOKEN = ""  # 管理接口令牌（请求头 X-Admin-Token）；为空时管理接口只接受本机请求
+    PROFILE_MAX_SECONDS = 60  # 单次剖析最长采集时间（秒）
+    PROFILE_SAMPLE_INTERVAL_MS = 5  # 采样CPU剖析默认采样间隔（毫秒）
+    
+    # asyncio入口配置（faq-service-async）
+    ASYNC_INFERENCE_WORKERS = 4  # 执行模型编码的线程数
+    ASYNC_INFERENCE_MAX_PENDING = 256  # 排队和执行中的编码请求上限，超出时返回503
+    ASYNC_IO_WORKERS = 32  # 执行MySQL等阻塞调用及其余Flask接口的线程数
+    ASYNC_MAX_BODY_SIZE = 16 * 1024 * 1024  # 转交Flask处理的请求体大小上限（字节）
+    
+    # 预fork多进程启动配置（faq-service-prefork）
+    PREFORK_WORKERS = 0  # 工作进程数，0表示CPU核数
+    PREFORK_WORKER_TORCH_THREADS = 0  # 每个工作进程的推理线程数，0表示CPU核数除以工作进程数
+    PREFORK_BACKLOG = 2048  # 监听队列长度
+    PREFORK_MEMORY_REPORT_INTERVAL = 300  # 输出各工作进程内存占用的间隔（秒），0表示不输出
+    PREFORK_SHUTDOWN_TIMEOUT = 10  # 停止时等待工作进程退出的时间（秒）
+    SHARED_STATE_DIR = ""  # 同机多进程共享的状态目录（集合版本号、初始化锁、任务状态），为空时预fork启动自动创建临时目录
+    
     def get_flask_config(self):
         """获取Flask应用配置"""
         return {
@@ -0,0 +1,314 @@
+"""
+进程内监控指标 - 计数器、直方图和仪表，以Prometheus文本格式从 /metrics 输出
+记录一次观测只做一次字典查找、一次二分查找和一次加锁累加，可以放在检索热路径上；
+不依赖prometheus_client。多进程部署（预fork、gunicorn）时每个进程各自统计。
+"""
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import timing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 延迟直方图默认分桶（秒），覆盖精确匹配/缓存命中的亚毫秒级到全量重建的数十秒级
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1,
+                   0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric(abc.ABC):
+    """指标基类：按标签值缓存子指标"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """创建一个标签组合对应的子指标"""
+
+    def labels(self, *values):
+        """按标签值取子指标（首次使用时创建）"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    @abc.abstractmethod
+    def _samples(self) -> List[Tuple[str, str, float]]:
+        """(指标名后缀, 标签字符串, 值)"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def _samples(self):
+        return [("", _format_labels(self.labelnames, key), child.get())
+                for key, child in sorted(self._children.items())]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def set_function(self, fn: Callable[[], float]):
+        """输出时调用fn取值，适合队列深度、是否已加载等随时可读的状态"""
+        self._fn = fn
+
+    def get(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return float("nan")
+        return self._value
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, fn: Callable[[], float]):
+        self._default().set_function(fn)
+
+    def _samples(self):
+        return [("", _format_labels(self.labelnames, key), child.get())
+                for key, child in sorted(self._children.items())]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        """计时上下文，退出时记录耗时（秒），异常退出也会记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    """分桶直方图，输出累计桶计数、总和与总数，可在Prometheus中用histogram_quantile计算p99"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bucket) for bucket in buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _samples(self):
+        samples = []
+        bucket_names = self.labelnames + ("le",)
+        for key, child in sorted(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", _format_labels(bucket_names, key + (_format_value(bound),)), cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus文本格式（0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "faq_http_requests_total", "HTTP requests by route and status code",
+    ("method", "route", "status")
+)
+HTTP_ERRORS = registry.counter(
+    "faq_http_request_errors_total", "HTTP requests that ended with a 5xx status",
+    ("method", "route")
+)
+HTTP_LATENCY = registry.histogram(
+    "faq_http_request_duration_seconds", "Total request latency",
+    ("method", "route")
+)
+STAGE_LATENCY = registry.histogram(
+    "faq_stage_duration_seconds",
+    "Latency of request stages (query_encode, vector_search, mysql_query, model_encode, vector_upsert)",
+    ("stage",)
+)
+MODEL_BATCH_SIZE = registry.histogram(
+    "faq_model_batch_size", "Number of texts per model encode call",
+    buckets=BATCH_SIZE_BUCKETS
+)
+UPSERTED_POINTS = registry.counter(
+    "faq_upserted_points_total", "Vector points written to the vector store"
+)
+MODEL_LOADED = registry.gauge(
+    "faq_model_loaded", "Whether the embedding model is loaded (1) or not (0)"
+)
+BATCH_QUEUE_DEPTH = registry.gauge(
+    "faq_embedding_batch_queue_depth", "Texts waiting in the embedding micro-batch queue"
+)
+
+
+@contextmanager
+def time_stage(stage: str):
+    """记录一个阶段耗时的上下文管理器：with time_stage("vector_search"): ..."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_stage(stage: str, seconds: float):
+    """记录阶段耗时到直方图；请求开启了分阶段计时时同时计入该请求"""
+    STAGE_LATENCY.labels(stage).observe(seconds)
+    timing.record(stage, seconds)
+
+
+def record_request(method: str, route: Optional[str], status: int, seconds: float):
+    """
+    记录一次HTTP请求
+
+    Args:
+        route: 匹配到的路由规则（如 /api/v1/faqs/<faq_id>），未匹配时为None，统一记为 unmatched，避免标签数量无限增长
+    """
+    route = route or "unmatched"
+    HTTP_REQUESTS.labels(method, route, status).inc()
+    HTTP_LATENCY.labels(method, route).observe(seconds)
+    if status >= 500:
+        HTTP_ERRORS.labels(method, route).inc()
+
+
+def render() -> str:
+    return registry.render()
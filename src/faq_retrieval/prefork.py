@@ -0,0 +1,253 @@
+"""
+FAQ检索API服务 预fork多进程启动器
+主进程加载模型并监听端口后fork出多个工作进程，模型权重以写时复制方式在进程间共享；
+MySQL连接池、Qdrant客户端等在各工作进程中fork之后按需创建。集合版本号、初始化锁和后台任务状态
+通过SHARED_STATE_DIR在工作进程之间共享。不支持进程内NumPy向量后端。仅支持Linux/Unix。
+
+用法:
+    faq-service-prefork --workers 4
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from werkzeug.serving import make_server
+
+from faq_retrieval import startup
+from faq_retrieval.config import config
+from faq_retrieval.app import create_app
+from faq_retrieval.api.routes import start_background_warmup
+from faq_retrieval.services.model_manager import model_manager
+from faq_retrieval.services.process_stats import read_memory_usage
+
+logger = logging.getLogger(__name__)
+
+
+def _should_preload_model() -> bool:
+    """
+    ONNX Runtime会话和编码进程池在创建时启动线程/子进程，fork之后不可用，
+    这两种情况由各工作进程自行加载模型
+    """
+    return config.ENCODER_BACKEND != "onnx" and config.ENCODER_WORKERS == 0
+
+
+class PreforkServer:
+    """预fork服务：主进程只负责监听端口、拉起和回收工作进程"""
+
+    def __init__(self, app, host: str, port: int, workers: int, torch_threads: int = 0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.torch_threads = torch_threads
+        self.socket: Optional[socket.socket] = None
+        self.workers: Dict[int, int] = {}  # pid -> 工作进程编号
+        self._stopping = False
+        self._last_report = 0.0
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(config.PREFORK_BACKLOG)
+        sock.set_inheritable(True)
+        self.socket = sock
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._worker_main(index)
+            except BaseException as e:
+                logger.error(f"Worker {index} exited with error: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.workers[pid] = index
+        logger.info(f"Started worker {index} (pid {pid})")
+
+    def _worker_main(self, index: int):
+        """工作进程：恢复默认信号处理，在共享的监听套接字上运行多线程WSGI服务"""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # 各进程的推理线程数之和不超过CPU核数
+        if config.ENCODER_NUM_THREADS == 0:
+            config.ENCODER_NUM_THREADS = self.torch_threads
+        if model_manager.is_model_loaded():
+            try:
+                import torch
+                torch.set_num_threads(self.torch_threads)
+            except ImportError:
+                pass
+        else:
+            model_manager.start_background_load()
+        start_background_warmup()
+
+        server = make_server(self.host, self.port, self.app, threaded=True, fd=self.socket.fileno())
+        logger.info(f"Worker {index} (pid {os.getpid()}) serving on {self.host}:{self.port}")
+        server.serve_forever()
+
+    def _handle_stop(self, signum, frame):
+        logger.info(f"Received signal {signum}, shutting down workers...")
+        self._stopping = True
+
+    def _reap(self):
+        """回收退出的工作进程，非停止状态下重新拉起"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index = self.workers.pop(pid, None)
+            if index is None:
+                continue
+            if self._stopping:
+                continue
+            logger.warning(f"Worker {index} (pid {pid}) exited with status {status}, restarting")
+            time.sleep(1)
+            self._spawn(index)
+
+    def memory_report(self) -> Dict:
+        """主进程与各工作进程的内存占用，pss合计为实际占用的物理内存"""
+        processes = [dict(read_memory_usage(os.getpid()) or {"pid": os.getpid()}, role="master")]
+        for pid, index in sorted(self.workers.items(), key=lambda item: item[1]):
+            usage = read_memory_usage(pid) or {"pid": pid}
+            processes.append(dict(usage, role=f"worker-{index}"))
+        pss = [p.get("pss_mb") for p in processes]
+        return {
+            "processes": processes,
+            "total_rss_mb": round(sum(p.get("rss_mb") or 0 for p in processes), 1),
+            "total_pss_mb": round(sum(pss), 1) if all(value is not None for value in pss) else None
+        }
+
+    def _log_memory(self):
+        report = self.memory_report()
+        for process in report["processes"]:
+            logger.info(f"Memory {process['role']} (pid {process['pid']}): rss={process.get('rss_mb')}MB "
+                        f"pss={process.get('pss_mb')}MB shared={process.get('shared_mb')}MB "
+                        f"private={process.get('private_mb')}MB")
+        logger.info(f"Memory total: rss={report['total_rss_mb']}MB pss={report['total_pss_mb']}MB")
+
+    def _stop_workers(self):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+        deadline = time.time() + config.PREFORK_SHUTDOWN_TIMEOUT
+        while self.workers and time.time() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning(f"Worker pid {pid} did not exit in time, killing")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.workers.clear()
+
+    def run(self):
+        start = time.perf_counter()
+        self._bind()
+        startup.record_phase("bind", time.perf_counter() - start)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        # 把启动阶段创建的对象移出GC跟踪范围，避免GC扫描时写对象头导致共享页被复制
+        gc.freeze()
+        for index in range(self.num_workers):
+            self._spawn(index)
+        logger.info(f"Master (pid {os.getpid()}) running {self.num_workers} workers on {self.host}:{self.port}")
+
+        # 等待工作进程完成启动后输出一次内存占用
+        self._last_report = time.time() - max(config.PREFORK_MEMORY_REPORT_INTERVAL, 0) + 5
+        try:
+            while not self._stopping:
+                self._reap()
+                interval = config.PREFORK_MEMORY_REPORT_INTERVAL
+                if interval > 0 and time.time() - self._last_report >= interval:
+                    self._log_memory()
+                    self._last_report = time.time()
+                time.sleep(0.5)
+        finally:
+            self._stop_workers()
+            self.socket.close()
+            logger.info("Master stopped")
+
+
+def main(argv=None):
+    """主函数"""
+    flask_config = config.get_flask_config()
+    parser = argparse.ArgumentParser(prog="faq-service-prefork", description="FAQ检索服务（预fork多进程）")
+    parser.add_argument("--workers", type=int, default=config.PREFORK_WORKERS,
+                        help="工作进程数，0表示CPU核数")
+    parser.add_argument("--host", default=flask_config['HOST'], help="监听地址")
+    parser.add_argument("--port", type=int, default=flask_config['PORT'], help="监听端口")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        logger.error("Pre-fork serving requires os.fork, use faq-service on this platform")
+        return 1
+    if config.VECTOR_BACKEND.lower() == "numpy":
+        # 各工作进程各自持有一份内存向量，写入只会进入处理该请求的进程
+        logger.error("The numpy vector backend keeps vectors in each process's memory and cannot be shared "
+                     "by pre-fork workers, use VECTOR_BACKEND='qdrant' or faq-service")
+        return 1
+    
+    # 工作进程之间共享集合版本号、初始化锁和后台任务状态
+    owned_state_dir = None
+    if not config.SHARED_STATE_DIR:
+        owned_state_dir = tempfile.mkdtemp(prefix="faq-prefork-")
+        config.SHARED_STATE_DIR = owned_state_dir
+    logger.info(f"Shared state directory: {config.SHARED_STATE_DIR}")
+
+    cpu_count = os.cpu_count() or 1
+    workers = args.workers or cpu_count
+    torch_threads = config.PREFORK_WORKER_TORCH_THREADS or max(1, cpu_count // workers)
+
+    preload = _should_preload_model()
+    app = create_app(preload_model=False)
+    if preload:
+        # fork之前必须加载完成，工作进程才能共享模型权重
+        if model_manager.load_model():
+            logger.info("Model loaded in master process, workers will share it copy-on-write")
+        else:
+            logger.warning("Failed to load model in master process, workers will load it on demand")
+    else:
+        logger.info(f"Encoder backend '{config.ENCODER_BACKEND}' with {config.ENCODER_WORKERS} encoder workers "
+                    f"cannot be shared across fork, each worker loads its own model")
+
+    logger.info("Starting FAQ retrieval API service (pre-fork)...")
+    logger.info(f"Model: {config.MODEL_NAME}")
+    logger.info(f"Database: {config.MYSQL_HOST}:{config.MYSQL_PORT}/{config.MYSQL_DATABASE}")
+    logger.info(f"Qdrant: {config.QDRANT_HOST}:{config.QDRANT_PORT}")
+
+    try:
+        PreforkServer(app, args.host, args.port, workers, torch_threads).run()
+    finally:
+        if owned_state_dir is not None:
+            shutil.rmtree(owned_state_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+按需性能剖析 - 管理接口在指定时长内采集，结果以文件形式下载
+- 采样CPU剖析：定时读取所有线程的Python调用栈，输出折叠栈（collapsed stack）文本，
+  可用 flamegraph.pl、speedscope 等工具生成火焰图；无需安装任何依赖，也不需要重启服务
+- torch剖析：采集窗口内每次模型编码都在torch profiler下执行，合并为一个Chrome trace
+  （chrome://tracing 或 Perfetto 打开）。torch profiler只记录开启它的线程，
+  因此在实际执行编码的线程中逐次开启，而不是在接口线程中开启一次
+同一时间只允许一个采集任务
+"""
+import collections
+import json
+import logging
+import os
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 线程阻塞等待时停留的标准库函数，默认不计入采样（否则空闲的服务线程会占据大部分样本）
+IDLE_FUNCTIONS = {"wait", "select", "poll", "accept", "_wait_for_tstate_lock", "readinto", "recv_into"}
+_STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有采集任务在运行"""
+
+
+_capture_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _is_idle(frame) -> bool:
+    return frame.f_code.co_name in IDLE_FUNCTIONS and frame.f_code.co_filename.startswith(_STDLIB_DIR)
+
+
+def sample_cpu_profile(seconds: float, interval: float = 0.005, include_idle: bool = False) -> Tuple[str, Dict]:
+    """
+    在当前线程中定时采样其他所有线程的调用栈
+
+    Args:
+        seconds: 采集时长（秒）
+        interval: 采样间隔（秒）
+        include_idle: 是否保留阻塞等待中的线程样本
+
+    Returns:
+        (折叠栈文本，每行"线程名;最外层帧;...;最内层帧 样本数", 采集统计)
+
+    Raises:
+        ProfilerBusyError: 已有采集任务在运行
+    """
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile capture is already running")
+    try:
+        own_ident = threading.get_ident()
+        stacks: "collections.Counter[str]" = collections.Counter()
+        samples = idle = 0
+        start = time.monotonic()
+        deadline = start + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    idle += 1
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                thread_name = names.get(ident, str(ident)).replace(";", "_")
+                stacks[";".join([thread_name] + labels[::-1])] += 1
+                samples += 1
+            time.sleep(interval)
+
+        content = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        return content, {
+            "seconds": round(time.monotonic() - start, 3),
+            "interval": interval,
+            "samples": samples,
+            "idle_samples_skipped": idle,
+            "distinct_stacks": len(stacks)
+        }
+    finally:
+        _capture_lock.release()
+
+
+class _TorchTraceWindow:
+    """采集窗口内各次编码的trace事件"""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.events: List[Dict] = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def add(self, prof):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "trace.json")
+            prof.export_chrome_trace(path)
+            with open(path, "r", encoding="utf-8") as f:
+                trace = json.load(f)
+        with self._lock:
+            self.events.extend(trace.get("traceEvents", []))
+            self.calls += 1
+
+
+_torch_window: Optional[_TorchTraceWindow] = None
+
+
+@contextmanager
+def torch_trace_scope():
+    """包裹一次模型编码：没有torch采集窗口时不做任何事"""
+    window = _torch_window
+    if window is None or time.monotonic() > window.deadline:
+        yield
+        return
+
+    import torch
+    from torch.profiler import ProfilerActivity, profile
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    with profile(activities=activities, record_shapes=True) as prof:
+        yield
+    try:
+        window.add(prof)
+    except Exception as e:
+        logger.warning(f"Failed to export torch profiler trace: {e}")
+
+
+def capture_torch_trace(seconds: float) -> Tuple[str, Dict]:
+    """
+    记录接下来seconds秒内开始的模型编码调用的torch profiler trace（窗口结束时尚未完成的编码不计入）
+
+    Returns:
+        (Chrome trace JSON文本, 采集统计)
+
+    Raises:
+        ProfilerBusyError: 已有采集任务在运行
+    """
+    global _torch_window
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile capture is already running")
+    try:
+        window = _TorchTraceWindow(time.monotonic() + seconds)
+        _torch_window = window
+        time.sleep(seconds)
+        _torch_window = None
+        with window._lock:
+            events = list(window.events)
+            calls = window.calls
+        content = json.dumps({"traceEvents": events})
+        return content, {"seconds": seconds, "encode_calls": calls, "events": len(events)}
+    finally:
+        _torch_window = None
+        _capture_lock.release()
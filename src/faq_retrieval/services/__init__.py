@@ -1,17 +1,41 @@
 """
 Services package initialization
+
+向量检索相关的导出按需导入（PEP 562），导入本包时不会加载qdrant_client；
+model_manager与其子模块同名，必须在此直接导入，否则子模块被导入后包属性会指向子模块而不是单例
 """
+import importlib
 
 from .database import FAQRepository, MySQLConnection
 from .model_manager import ModelManager, model_manager
-from .qdrant_service import QdrantService
-from .faq_service import FAQService
+
+_LAZY_EXPORTS = {
+    'QdrantService': '.qdrant_service',
+    'NumpyVectorService': '.numpy_vector_service',
+    'create_vector_service': '.vector_store',
+    'FAQService': '.faq_service'
+}
 
 __all__ = [
     'FAQRepository',
-    'MySQLConnection', 
+    'MySQLConnection',
     'ModelManager',
     'model_manager',
     'QdrantService',
+    'NumpyVectorService',
+    'create_vector_service',
     'FAQService'
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,193 @@
+"""
+异步检索服务 - 供asyncio入口使用
+模型推理交给有界线程池执行，向量检索使用Qdrant异步客户端，
+精确匹配、结果缓存和缓存版本号与FAQService共用
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ..metrics import observe_stage, time_stage
+from .model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBusyError(RuntimeError):
+    """排队中的推理请求已达上限"""
+
+
+class InferenceExecutor:
+    """
+    有界推理执行器
+    固定数量的线程执行模型编码，排队加执行中的请求超过上限时立即拒绝，
+    避免突发流量在事件循环中堆积无限多的等待任务
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 256):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._pending = 0
+        self._rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        在推理线程中执行fn
+
+        Raises:
+            InferenceBusyError: 排队请求已达上限
+        """
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise InferenceBusyError(f"Too many pending inference requests ({self.max_pending})")
+
+        # 计数只在事件循环线程中修改，无需加锁
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # run_in_executor不传递contextvars，复制当前上下文使请求的分阶段计时在推理线程中可见
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self._rejected
+        }
+
+
+class AsyncSearchService:
+    """
+    FAQService检索接口的异步版本
+    输入校验、快速通道、缓存和结果组装由FAQService的prepare_*/finish_*完成，这里只替换编码和向量检索两步
+    """
+
+    def __init__(self, faq_service, inference_executor: InferenceExecutor):
+        self.faq_service = faq_service
+        self.inference = inference_executor
+
+    async def _ensure_model_loaded(self) -> bool:
+        if model_manager.is_model_loaded():
+            return True
+        return await self.inference.run(model_manager.load_model)
+
+    async def search_faqs(self, query: str, limit: int = 5, similarity_threshold: float = 0.0,
+                          exact_match: Optional[bool] = None, hnsw_ef: Optional[int] = None,
+                          exact_search: bool = False) -> Dict[str, any]:
+        """
+        搜索FAQ，参数与返回值同FAQService.search_faqs
+
+        Raises:
+            InferenceBusyError: 推理排队已满（由调用方返回503）
+        """
+        start_time = time.time()
+        # 精确匹配索引在后台线程中加载，快速通道只做内存查找，不阻塞事件循环
+        result, cache_key = self.faq_service.prepare_search(query, limit, similarity_threshold,
+                                                            exact_match, hnsw_ef, exact_search)
+
+        try:
+            if cache_key is None:
+                return result
+
+            if not await self._ensure_model_loaded():
+                result["message"] = "Failed to load embedding model"
+                return result
+
+            with time_stage("query_encode"):
+                query_embeddings = await self.inference.run(model_manager.generate_embeddings, [query])
+            if query_embeddings is None or len(query_embeddings) == 0:
+                result["message"] = "Failed to generate query embedding"
+                return result
+
+            with time_stage("vector_search"):
+                search_results = await self.faq_service.vector_service.async_search_similar(
+                    query_embeddings[0],
+                    limit=limit,
+                    score_threshold=similarity_threshold,
+                    hnsw_ef=hnsw_ef,
+                    exact=exact_search
+                )
+
+            self.faq_service.finish_search(result, cache_key, search_results)
+
+        except InferenceBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error searching FAQs: {e}")
+            result["message"] = f"Search failed: {str(e)}"
+
+        finally:
+            result["execution_time"] = round(time.time() - start_time, 2)
+
+        return result
+
+    async def search_faqs_batch(self, queries: List[Dict]) -> Dict[str, any]:
+        """
+        批量搜索FAQ，参数与返回值同FAQService.search_faqs_batch
+
+        Raises:
+            InferenceBusyError: 推理排队已满（由调用方返回503）
+        """
+        start_time = time.time()
+        result = {
+            "success": False,
+            "message": "",
+            "results": [],
+            "timing": {},
+            "execution_time": 0
+        }
+
+        try:
+            items, pending = self.faq_service.prepare_search_batch(queries)
+
+            encode_time = search_time = 0.0
+            batch_results = []
+            if pending:
+                if not await self._ensure_model_loaded():
+                    result["message"] = "Failed to load embedding model"
+                    return result
+
+                encode_start = time.time()
+                embeddings = await self.inference.run(
+                    model_manager.generate_embeddings, [query["text"] for _, query, _ in pending]
+                )
+                encode_time = time.time() - encode_start
+                observe_stage("query_encode", encode_time)
+                if embeddings is None or len(embeddings) != len(pending):
+                    result["message"] = "Failed to generate query embeddings"
+                    return result
+
+                search_start = time.time()
+                batch_results = await self.faq_service.vector_service.async_search_batch(
+                    embeddings, **self.faq_service.batch_search_params(pending)
+                )
+                search_time = time.time() - search_start
+                observe_stage("vector_search", search_time)
+                if batch_results is None:
+                    result["message"] = "Batch search failed"
+                    return result
+
+            self.faq_service.finish_search_batch(result, items, pending, batch_results, encode_time, search_time)
+
+        except InferenceBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in batch search: {e}")
+            result["message"] = f"Batch search failed: {str(e)}"
+
+        finally:
+            result["execution_time"] = round(time.time() - start_time, 4)
+
+        return result
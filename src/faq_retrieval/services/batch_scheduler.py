@@ -0,0 +1,157 @@
+"""
+跨请求微批调度器
+将并发请求中的单条查询文本合并为一个批次编码，充分利用模型的批处理能力
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from .. import timing
+
+logger = logging.getLogger(__name__)
+
+
+class BatchQueueFullError(RuntimeError):
+    """调度队列已满"""
+
+
+class MicroBatchScheduler:
+    """
+    微批调度器
+    调用方提交文本后阻塞等待结果；后台线程在达到最大批大小或最大等待时间时
+    将队列中的文本合并为一个批次编码，再把每条向量分发给对应的调用方
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], Optional[np.ndarray]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 max_queue_size: int = 1000, concurrency: int = 1):
+        """
+        Args:
+            encode_fn: 批量编码函数，输入文本列表，返回形状为(n, dim)的向量矩阵
+            max_batch_size: 单批最大文本数
+            max_wait_ms: 凑批最大等待时间（毫秒）
+            max_queue_size: 等待队列最大长度
+            concurrency: 同时在编码的最大批次数（编码交给多进程时大于1）
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_queue_size = int(max_queue_size)
+        self.concurrency = max(1, int(concurrency))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue_size)
+        self._workers: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_observed_batch = 0
+        self._rejected = 0
+
+    def _ensure_started(self):
+        """按需启动后台调度线程"""
+        if len(self._workers) == self.concurrency and all(worker.is_alive() for worker in self._workers):
+            return
+        with self._start_lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.concurrency:
+                worker = threading.Thread(
+                    target=self._run, name=f"embedding-batcher-{len(self._workers)}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, text: str) -> Future:
+        """提交单条文本，返回可等待的Future"""
+        self._ensure_started()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((text, future, timing.current(), time.perf_counter()))
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise BatchQueueFullError(
+                f"Embedding batch queue is full ({self.max_queue_size})"
+            )
+        return future
+
+    def encode(self, texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
+        """提交多条文本并等待全部结果"""
+        futures = [self.submit(text) for text in texts]
+        return np.stack([future.result(timeout=timeout) for future in futures])
+
+    def _collect_batch(self) -> list:
+        """阻塞等待第一条请求，然后在等待窗口内尽量凑满一个批次"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """后台调度循环"""
+        while True:
+            batch = self._collect_batch()
+            pending = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            texts = [item[0] for item in pending]
+            futures = [item[1] for item in pending]
+            # 开启了分阶段计时的请求：记录排队耗时，批次的编码耗时计入批内每个这样的请求（每个请求计一次）
+            traced = {}
+            for _, _, request_timing, submitted in pending:
+                if request_timing is not None:
+                    traced.setdefault(request_timing, submitted)
+            batch_timing = timing.RequestTiming() if traced else None
+            batch_start = time.perf_counter()
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(texts)
+                self._max_observed_batch = max(self._max_observed_batch, len(texts))
+
+            try:
+                with timing.activate(batch_timing):
+                    embeddings = self.encode_fn(texts)
+                for request_timing, submitted in traced.items():
+                    request_timing.add("batch_queue_wait", batch_start - submitted)
+                    request_timing.merge(batch_timing)
+                if embeddings is None or len(embeddings) != len(texts):
+                    raise RuntimeError("Failed to generate embeddings for batch")
+                for future, embedding in zip(futures, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                logger.error(f"Error encoding micro-batch of {len(texts)} texts: {e}")
+                for future in futures:
+                    future.set_exception(e)
+
+    def queue_depth(self) -> int:
+        """等待编码的文本数"""
+        return self._queue.qsize()
+
+    def get_stats(self) -> dict:
+        """获取调度统计信息"""
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "max_queue_size": self.max_queue_size,
+                "concurrency": self.concurrency,
+                "queue_depth": self.queue_depth(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "max_observed_batch": self._max_observed_batch,
+                "rejected": self._rejected
+            }
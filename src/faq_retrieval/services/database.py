@@ -3,12 +3,168 @@
 """
 import pymysql
 import logging
-from typing import List, Dict, Optional
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Dict, Optional, Iterator
 from contextlib import contextmanager
 from ..config import config
+from ..metrics import observe_stage
 
 logger = logging.getLogger(__name__)
 
+class PoolTimeoutError(Exception):
+    """等待可用连接超时"""
+
+class ConnectionPool:
+    """
+    线程安全的数据库连接池
+    支持最小/最大连接数、空闲超时回收、取出前探活，以及等待时间与使用量统计
+    """
+    
+    def __init__(self, connect_fn: Callable, min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300, wait_timeout: float = 10,
+                 pre_ping: bool = True, ping_interval: float = 30):
+        """
+        Args:
+            connect_fn: 创建新连接的函数
+            min_size: 空闲回收时至少保留的连接数
+            max_size: 最大连接数
+            idle_timeout: 空闲超过该时间（秒）的连接会被关闭
+            wait_timeout: 连接池耗尽时等待可用连接的最长时间（秒）
+            pre_ping: 取出连接前是否探活
+            ping_interval: 空闲超过该时间（秒）的连接在取出前才探活
+        """
+        self.connect_fn = connect_fn
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.pre_ping = pre_ping
+        self.ping_interval = ping_interval
+        self._idle = deque()  # (connection, 最后归还时间)，后进先出
+        self._cond = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "acquisitions": 0,
+            "timeouts": 0,
+            "ping_failures": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0
+        }
+    
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._stats["closed"] += 1
+    
+    def _reap_idle_locked(self):
+        """关闭空闲超时的连接（保留min_size个）"""
+        now = time.monotonic()
+        while self._idle and self._size > self.min_size:
+            connection, last_used = self._idle[0]
+            if now - last_used < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._close(connection)
+    
+    def acquire(self):
+        """从连接池获取连接，必要时新建或等待"""
+        start = time.monotonic()
+        deadline = start + self.wait_timeout
+        while True:
+            connection = None
+            last_used = None
+            with self._cond:
+                self._reap_idle_locked()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.wait_timeout}s waiting for a database connection"
+                        )
+                    self._cond.wait(remaining)
+                
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                else:
+                    self._size += 1
+                self._in_use += 1
+            
+            try:
+                if connection is None:
+                    connection = self.connect_fn()
+                    with self._cond:
+                        self._stats["created"] += 1
+                elif self.pre_ping and time.monotonic() - last_used >= self.ping_interval:
+                    connection.ping(reconnect=False)
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                if last_used is None:
+                    # 新建连接失败，直接抛出
+                    raise
+                logger.warning(f"Discarding stale database connection: {e}")
+                with self._cond:
+                    self._stats["ping_failures"] += 1
+                    self._close(connection)
+                continue
+            
+            waited = time.monotonic() - start
+            with self._cond:
+                self._stats["acquisitions"] += 1
+                self._stats["wait_time_total"] += waited
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+            return connection
+    
+    def release(self, connection, discard: bool = False):
+        """归还连接，discard为True时直接关闭（例如使用过程中出错）"""
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+                self._close(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+    
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._size -= 1
+                self._close(connection)
+            self._cond.notify_all()
+    
+    def get_stats(self) -> Dict:
+        """获取连接池统计信息"""
+        with self._cond:
+            acquisitions = self._stats["acquisitions"]
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "created": self._stats["created"],
+                "closed": self._stats["closed"],
+                "acquisitions": acquisitions,
+                "timeouts": self._stats["timeouts"],
+                "ping_failures": self._stats["ping_failures"],
+                "wait_time_avg_ms": round(self._stats["wait_time_total"] / acquisitions * 1000, 3) if acquisitions else 0.0,
+                "wait_time_max_ms": round(self._stats["wait_time_max"] * 1000, 3)
+            }
+
 class MySQLConnection:
     """MySQL连接管理器"""
     
@@ -19,28 +175,53 @@ class MySQLConnection:
         self.password = config.MYSQL_PASSWORD
         self.database = config.MYSQL_DATABASE
         self.charset = config.MYSQL_CHARSET
+        self.pool = ConnectionPool(
+            connect_fn=self._connect,
+            min_size=config.MYSQL_POOL_MIN_SIZE,
+            max_size=config.MYSQL_POOL_MAX_SIZE,
+            idle_timeout=config.MYSQL_POOL_IDLE_TIMEOUT,
+            wait_timeout=config.MYSQL_POOL_WAIT_TIMEOUT,
+            pre_ping=config.MYSQL_POOL_PRE_PING,
+            ping_interval=config.MYSQL_POOL_PING_INTERVAL
+        )
+    
+    def _connect(self):
+        """创建新的数据库连接"""
+        return pymysql.connect(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            charset=self.charset,
+            autocommit=True
+        )
     
     @contextmanager
     def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        connection = None
+        """从连接池获取数据库连接的上下文管理器（mysql_query阶段耗时包含连接池等待）"""
+        start = time.perf_counter()
+        try:
+            connection = self.pool.acquire()
+        except Exception as e:
+            logger.error(f"Database connection error: {e}")
+            raise
+        
+        discard = False
         try:
-            connection = pymysql.connect(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                charset=self.charset,
-                autocommit=True
-            )
             yield connection
         except Exception as e:
+            # 出错的连接状态未知，不再放回连接池
+            discard = True
             logger.error(f"Database connection error: {e}")
             raise
         finally:
-            if connection:
-                connection.close()
+            self.pool.release(connection, discard=discard)
+            observe_stage("mysql_query", time.perf_counter() - start)
+    
+    def get_pool_stats(self) -> Dict:
+        """获取连接池统计信息"""
+        return self.pool.get_stats()
     
     def test_connection(self) -> bool:
         """测试数据库连接"""
@@ -89,6 +270,56 @@ class FAQRepository:
             logger.error(f"Error retrieving FAQs: {e}")
             raise
     
+    def iter_faq_chunks(self, chunk_size: int = 500) -> Iterator[List[Dict[str, str]]]:
+        """
+        按主键分页（keyset pagination）分块读取FAQ
+        每块单独查询，不会一次性把全表加载到内存
+        """
+        last_id = None
+        while True:
+            try:
+                with self.db.get_connection() as conn:
+                    cursor = conn.cursor()
+                    if last_id is None:
+                        cursor.execute("""
+                            SELECT id, question, answer 
+                            FROM faq 
+                            WHERE question IS NOT NULL 
+                            AND answer IS NOT NULL 
+                            AND question != '' 
+                            AND answer != ''
+                            ORDER BY id
+                            LIMIT %s
+                        """, (chunk_size,))
+                    else:
+                        cursor.execute("""
+                            SELECT id, question, answer 
+                            FROM faq 
+                            WHERE question IS NOT NULL 
+                            AND answer IS NOT NULL 
+                            AND question != '' 
+                            AND answer != ''
+                            AND id > %s
+                            ORDER BY id
+                            LIMIT %s
+                        """, (last_id, chunk_size))
+                    rows = cursor.fetchall()
+            except Exception as e:
+                logger.error(f"Error retrieving FAQ chunk after ID {last_id}: {e}")
+                raise
+            
+            if not rows:
+                return
+            
+            yield [
+                {"id": row[0], "question": row[1], "answer": row[2]}
+                for row in rows
+            ]
+            
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+    
     def get_faq_by_id(self, faq_id: str) -> Optional[Dict[str, str]]:
         """根据ID获取单个FAQ"""
         try:
@@ -133,6 +364,52 @@ class FAQRepository:
             logger.error(f"Error adding FAQ: {e}")
             raise
     
+    def add_faqs_bulk(self, faqs: List[Dict[str, str]]) -> Dict[str, List]:
+        """
+        批量添加或更新FAQ
+        
+        先在单个事务中用executemany整体写入；整批失败时回滚，并逐条重试以定位失败的条目
+        
+        Returns:
+            {"written": 写入成功的FAQ ID列表, "failed": [{"id": ..., "error": ...}]}
+        """
+        sql = """
+            INSERT INTO faq (id, question, answer) 
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE 
+            question = VALUES(question), 
+            answer = VALUES(answer)
+        """
+        rows = [(faq["id"], faq["question"], faq["answer"]) for faq in faqs]
+        result = {"written": [], "failed": []}
+        if not rows:
+            return result
+        
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                conn.begin()
+                cursor.executemany(sql, rows)
+                conn.commit()
+                result["written"] = [row[0] for row in rows]
+                logger.info(f"Bulk added/updated {len(rows)} FAQs in one transaction")
+                return result
+            except pymysql.MySQLError as e:
+                conn.rollback()
+                logger.warning(f"Bulk FAQ insert failed, retrying row by row: {e}")
+            
+            # 逐条写入（autocommit），单条失败不影响其他条目
+            for row in rows:
+                try:
+                    cursor.execute(sql, row)
+                    result["written"].append(row[0])
+                except pymysql.MySQLError as e:
+                    logger.error(f"Error adding FAQ {row[0]}: {e}")
+                    result["failed"].append({"id": row[0], "error": str(e)})
+        
+        logger.info(f"Bulk added/updated {len(result['written'])} FAQs, {len(result['failed'])} failed")
+        return result
+    
     def get_faq_count(self) -> int:
         """获取FAQ总数"""
         try:
@@ -0,0 +1,278 @@
+"""
+编码进程池 - 每个工作进程各自持有一份模型，编码请求通过管道发送给空闲进程，
+分词和模型推理不再与请求处理线程争用主进程的GIL；工作进程异常退出或超时后自动重启
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SHUTDOWN = None  # 通知工作进程退出的消息
+
+
+class EncoderWorkerError(RuntimeError):
+    """编码工作进程不可用或编码失败"""
+
+
+def create_worker_encoder(backend: str, num_threads: int):
+    """默认的工作进程编码器工厂：在子进程中按配置的后端加载模型"""
+    from ..config import config
+    from .model_manager import model_manager
+
+    config.ENCODER_NUM_THREADS = num_threads
+    return model_manager.create_encoder(backend)
+
+
+def _worker_main(conn, factory: Callable, backend: str, num_threads: int):
+    """工作进程入口：加载模型后循环处理编码请求，直到收到退出消息或管道关闭"""
+    if num_threads > 0:
+        # 在导入torch之前限制线程数，避免多个进程的线程池互相抢占CPU
+        for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ[name] = str(num_threads)
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - encoder-worker[{os.getpid()}] - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        encoder = factory(backend, num_threads)
+        if encoder is None:
+            raise RuntimeError(f"Failed to create encoder '{backend}'")
+        conn.send(("ready", encoder.get_sentence_embedding_dimension()))
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if request is _SHUTDOWN:
+            break
+
+        texts, batch_size = request
+        try:
+            embeddings = encoder.encode(texts, batch_size=batch_size, show_progress_bar=False,
+                                        convert_to_numpy=True)
+            conn.send(("ok", np.asarray(embeddings, dtype=np.float32)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    """父进程中对一个工作进程的引用"""
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 5.0):
+        """通知工作进程退出，超时后强制终止"""
+        try:
+            self.conn.send(_SHUTDOWN)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class EncoderWorkerPool:
+    """
+    编码进程池
+    encode/get_sentence_embedding_dimension与SentenceTransformer接口一致，
+    可直接作为ModelManager的模型使用；调用方线程阻塞直到拿到空闲进程并返回结果
+    """
+
+    def __init__(self, backend: str, num_workers: int, num_threads: int = 1,
+                 request_timeout: float = 60.0, start_timeout: float = 300.0,
+                 factory: Callable = create_worker_encoder):
+        """
+        Args:
+            backend: 工作进程使用的编码后端（"torch" / "torch-int8" / "onnx"）
+            num_workers: 工作进程数
+            num_threads: 每个工作进程的推理线程数，0表示使用库的默认值
+            request_timeout: 等待空闲进程及单次编码的超时时间（秒），超时的进程会被重启
+            start_timeout: 等待工作进程加载模型的超时时间（秒）
+            factory: 在子进程中创建编码器的函数 factory(backend, num_threads)，须可被pickle
+        """
+        import multiprocessing
+        # fork会复制父进程中的线程锁和torch线程池状态，统一使用spawn
+        self._ctx = multiprocessing.get_context("spawn")
+        self.backend = backend
+        self.num_workers = max(1, int(num_workers))
+        self.num_threads = int(num_threads)
+        self.request_timeout = request_timeout
+        self.start_timeout = start_timeout
+        self.factory = factory
+        self.dimension: Optional[int] = None
+        self._workers: Dict[int, _Worker] = {}
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._requests = 0
+        self._items = 0
+        self._errors = 0
+        self._restarts = 0
+
+    def _spawn(self, index: int) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.factory, self.backend, self.num_threads),
+            name=f"encoder-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(index, process, parent_conn)
+
+    def _wait_ready(self, worker: _Worker):
+        """等待工作进程加载模型完成"""
+        try:
+            if not worker.conn.poll(self.start_timeout):
+                raise EncoderWorkerError(f"timed out after {self.start_timeout}s")
+            status, value = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            raise EncoderWorkerError(f"exited during startup: {e}") from e
+        if status != "ready":
+            raise EncoderWorkerError(value)
+        self.dimension = value
+
+    def start(self) -> bool:
+        """启动全部工作进程并等待模型加载完成，任一进程启动失败时关闭进程池"""
+        start = time.time()
+        workers = [self._spawn(index) for index in range(self.num_workers)]
+        try:
+            for worker in workers:
+                self._wait_ready(worker)
+        except EncoderWorkerError as e:
+            logger.error(f"❌ Encoder worker failed to start: {e}")
+            for worker in workers:
+                worker.stop(timeout=1.0)
+            return False
+
+        for worker in workers:
+            self._workers[worker.index] = worker
+            self._idle.put(worker)
+        logger.info(f"✅ Started {self.num_workers} encoder workers (backend '{self.backend}', "
+                    f"{self.num_threads} threads each) in {time.time() - start:.1f}s")
+        return True
+
+    def _replace(self, worker: _Worker):
+        """终止失效的工作进程并启动新进程，启动失败时退避重试"""
+        worker.stop(timeout=1.0)
+        delay = 1.0
+        while not self._closed:
+            new_worker = self._spawn(worker.index)
+            try:
+                self._wait_ready(new_worker)
+            except EncoderWorkerError as e:
+                logger.error(f"Failed to restart encoder worker {worker.index}: {e}, retrying in {delay:.0f}s")
+                new_worker.stop(timeout=1.0)
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            with self._lock:
+                self._restarts += 1
+                self._workers[worker.index] = new_worker
+            if self._closed:
+                new_worker.stop()
+                return
+            self._idle.put(new_worker)
+            logger.info(f"Restarted encoder worker {worker.index} (pid {new_worker.process.pid})")
+            return
+
+    def _schedule_replace(self, worker: _Worker):
+        logger.warning(f"Encoder worker {worker.index} (pid {worker.process.pid}) is unavailable, restarting")
+        threading.Thread(target=self._replace, args=(worker,),
+                         name=f"encoder-worker-restart-{worker.index}", daemon=True).start()
+
+    def _acquire(self) -> _Worker:
+        """取出一个存活的空闲工作进程"""
+        deadline = time.monotonic() + self.request_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                worker = self._idle.get(timeout=max(remaining, 0.001))
+            except queue.Empty:
+                raise EncoderWorkerError(f"No encoder worker available within {self.request_timeout}s")
+            if worker.is_alive():
+                return worker
+            self._schedule_replace(worker)
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        在工作进程中编码文本
+
+        Raises:
+            EncoderWorkerError: 没有可用的工作进程、进程崩溃/超时或编码失败
+        """
+        if self._closed:
+            raise EncoderWorkerError("Encoder worker pool is closed")
+
+        worker = self._acquire()
+        try:
+            worker.conn.send((list(texts), batch_size))
+            if not worker.conn.poll(self.request_timeout):
+                raise TimeoutError(f"no response within {self.request_timeout}s")
+            status, value = worker.conn.recv()
+        except (EOFError, OSError, TimeoutError) as e:
+            with self._lock:
+                self._errors += 1
+            self._schedule_replace(worker)
+            raise EncoderWorkerError(f"Encoder worker {worker.index} failed: {e}") from e
+
+        self._idle.put(worker)
+        with self._lock:
+            self._requests += 1
+            self._items += len(texts)
+            if status != "ok":
+                self._errors += 1
+        if status != "ok":
+            raise EncoderWorkerError(value)
+        return value
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        return self.dimension
+
+    def close(self):
+        """停止全部工作进程"""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+        logger.info("Encoder worker pool closed")
+
+    def get_stats(self) -> dict:
+        """获取进程池统计信息"""
+        with self._lock:
+            workers = list(self._workers.values())
+            return {
+                "backend": self.backend,
+                "workers": self.num_workers,
+                "threads_per_worker": self.num_threads,
+                "alive": sum(1 for worker in workers if worker.is_alive()),
+                "idle": self._idle.qsize(),
+                "pids": [worker.process.pid for worker in workers],
+                "requests": self._requests,
+                "items": self._items,
+                "errors": self._errors,
+                "restarts": self._restarts
+            }
@@ -0,0 +1,115 @@
+"""
+精确匹配索引 - 归一化问句到FAQ的进程内哈希索引
+查询与已有问句完全一致（忽略空白、全半角和末尾标点）时无需编码和向量检索
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .text_utils import normalize_question
+
+logger = logging.getLogger(__name__)
+
+
+class ExactMatchIndex:
+    """归一化问句 -> FAQ 的哈希索引"""
+
+    def __init__(self):
+        self._index: Dict[str, Dict[str, Dict]] = {}
+        self._keys_by_id: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.is_built = False
+        self.built_at: Optional[float] = None
+
+    def rebuild(self, faqs: List[Dict]):
+        """
+        根据FAQ列表重建索引
+
+        Args:
+            faqs: FAQ列表，每项包含 id/question/answer
+        """
+        index: Dict[str, Dict[str, Dict]] = {}
+        keys_by_id: Dict[str, str] = {}
+        for faq in faqs:
+            key = normalize_question(faq["question"])
+            if not key:
+                continue
+            index.setdefault(key, {})[faq["id"]] = faq
+            keys_by_id[faq["id"]] = key
+
+        with self._lock:
+            self._index = index
+            self._keys_by_id = keys_by_id
+            self.is_built = True
+            self.built_at = time.monotonic()
+        logger.info(f"Exact match index rebuilt with {len(keys_by_id)} FAQs")
+
+    def invalidate(self):
+        """清空索引并标记为未构建，下次使用时重新加载"""
+        with self._lock:
+            self._index = {}
+            self._keys_by_id = {}
+            self.is_built = False
+            self.built_at = None
+
+    def is_fresh(self, ttl: float) -> bool:
+        """索引已构建且距上次重建未超过ttl秒（ttl<=0表示不过期）"""
+        built_at = self.built_at
+        if not self.is_built or built_at is None:
+            return False
+        return ttl <= 0 or time.monotonic() - built_at < ttl
+
+    def add(self, faq: Dict):
+        """添加或更新单条FAQ"""
+        key = normalize_question(faq["question"])
+        with self._lock:
+            self._remove_locked(faq["id"])
+            if key:
+                self._index.setdefault(key, {})[faq["id"]] = faq
+                self._keys_by_id[faq["id"]] = key
+
+    def remove(self, faq_id: str):
+        """删除单条FAQ"""
+        with self._lock:
+            self._remove_locked(faq_id)
+
+    def _remove_locked(self, faq_id: str):
+        old_key = self._keys_by_id.pop(faq_id, None)
+        if old_key is None:
+            return
+        bucket = self._index.get(old_key)
+        if bucket is not None:
+            bucket.pop(faq_id, None)
+            if not bucket:
+                del self._index[old_key]
+
+    def lookup(self, query: str, limit: int = 5) -> Optional[List[Dict]]:
+        """
+        查找与查询精确匹配的FAQ
+
+        Returns:
+            与search_similar格式一致的结果列表（score为1.0），未命中时返回None
+        """
+        key = normalize_question(query)
+        if not key:
+            return None
+
+        with self._lock:
+            bucket = self._index.get(key)
+            if not bucket:
+                return None
+            faqs = list(bucket.values())[:limit]
+
+        return [
+            {
+                "faq_id": faq["id"],
+                "question": faq["question"],
+                "answer": faq["answer"],
+                "score": 1.0
+            }
+            for faq in faqs
+        ]
+
+    def __len__(self) -> int:
+        return len(self._keys_by_id)
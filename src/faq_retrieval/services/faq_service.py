@@ -2,12 +2,25 @@
 FAQ业务服务层
 处理FAQ相关的业务逻辑
 """
+import copy
+import itertools
 import logging
+import threading
 import time
+from pathlib import Path
 from typing import List, Dict, Optional, Tuple
+from .. import timing
+from ..config import config
+from ..metrics import observe_stage, time_stage
+from .cache import LRUCache
 from .database import FAQRepository
+from .exact_match_index import ExactMatchIndex
+from .index_pipeline import IndexingPipeline, PipelineCancelled
+from .snapshot import (SnapshotError, export_snapshot, iter_snapshot,
+                       read_snapshot_header, resolve_snapshot_path)
 from .model_manager import model_manager
-from .qdrant_service import QdrantService
+from .text_utils import compute_content_hash, normalize_text
+from .vector_store import create_vector_service
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +29,231 @@ class FAQService:
     
     def __init__(self):
         self.faq_repo = FAQRepository()
-        self.qdrant_service = QdrantService()
+        self.vector_service = create_vector_service()
         
-    def initialize_full_data(self, recreate_collection: bool = True) -> Dict[str, any]:
+        # 检索结果缓存：键中包含集合版本号，写入数据后版本号递增，旧条目自然不可达
+        self.search_cache: Optional[LRUCache] = None
+        if config.SEARCH_CACHE_ENABLED:
+            self.search_cache = LRUCache(
+                max_size=config.SEARCH_CACHE_MAX_SIZE,
+                ttl=config.SEARCH_CACHE_TTL
+            )
+        # 多进程部署时版本号、初始化锁和后台任务状态保存在共享目录中
+        self.shared_state = None
+        if config.SHARED_STATE_DIR:
+            from .shared_state import SharedState
+            self.shared_state = SharedState(config.SHARED_STATE_DIR, history_size=config.JOB_HISTORY_SIZE)
+        self._collection_version = self.shared_state.version.get() if self.shared_state else 0
+        self._version_lock = threading.Lock()
+        
+        # 同一时间只允许一个初始化/同步任务（多进程部署时还需持有跨进程锁）
+        self._init_lock = threading.Lock()
+        # 全量重建期间写入的影子集合，新增FAQ会同时写入其中
+        self._reindex_shadow: Optional[str] = None
+        
+        # 精确匹配索引：启动时和全量初始化时构建，新增FAQ时同步更新，并按TTL从向量库重新加载
+        self.exact_match_index = ExactMatchIndex()
+        self._exact_index_lock = threading.Lock()
+        self._exact_refresh_lock = threading.Lock()
+        self._exact_refresh_running = False
+        self._exact_refresh_attempted_at = float("-inf")
+        
+        # 进程内向量库（NumPy后端）启动加载状态：pending/loading/loaded/failed
+        self.hydration_state = "pending"
+    
+    def _bump_collection_version(self):
+        """递增集合版本号，使已缓存的检索结果失效（多进程部署时同时通知其他进程）"""
+        with self._version_lock:
+            if self.shared_state is not None:
+                self._collection_version = self.shared_state.version.increment()
+            else:
+                self._collection_version += 1
+            version = self._collection_version
+        if self.search_cache is not None:
+            self.search_cache.clear()
+        logger.info(f"Collection version bumped to {version}, search cache invalidated")
+    
+    def _current_collection_version(self) -> int:
+        """
+        当前集合版本号；多进程部署时读取共享版本号（一次pread），
+        发现其他进程写入过数据时丢弃本进程的检索缓存，并在后台重新加载精确匹配索引
+        """
+        if self.shared_state is None:
+            return self._collection_version
+        version = self.shared_state.version.get()
+        if version == self._collection_version:
+            return version
+        with self._version_lock:
+            if version <= self._collection_version:
+                return self._collection_version
+            self._collection_version = version
+        if self.search_cache is not None:
+            self.search_cache.clear()
+        self.exact_match_index.invalidate()
+        self.start_exact_match_refresh(force=True)
+        logger.info(f"Collection version changed to {version} by another process, local caches invalidated")
+        return version
+    
+    def refresh_exact_match_index(self) -> bool:
+        """
+        从向量库加载全部问句重建精确匹配索引
+        
+        Returns:
+            是否重建成功；读取失败或读取期间数据有写入时保留现有索引
+        """
+        with self._exact_index_lock:
+            version = self._current_collection_version()
+            logger.info("Loading exact match index from vector store...")
+            try:
+                faqs = []
+                for _, _, payloads in self.vector_service.iter_points(with_vectors=False):
+                    faqs.extend(
+                        {"id": p["faq_id"], "question": p["question"], "answer": p["answer"]}
+                        for p in payloads if p.get("faq_id") is not None and p.get("question")
+                    )
+            except Exception as e:
+                logger.warning(f"Failed to load exact match index from vector store: {e}")
+                return False
+            if version != self._current_collection_version():
+                logger.info("Vector store changed while loading exact match index, will retry")
+                return False
+            self.exact_match_index.rebuild(faqs)
+            return True
+    
+    def start_exact_match_refresh(self, force: bool = False):
+        """
+        索引未构建或超过EXACT_MATCH_INDEX_TTL时在后台线程重新加载，检索请求不等待扫描；
+        同一时间只有一个加载线程，失败后间隔EXACT_MATCH_INDEX_RETRY_INTERVAL秒再试（force时不等待间隔）
+        """
+        if self.exact_match_index.is_fresh(config.EXACT_MATCH_INDEX_TTL):
+            return
+        now = time.monotonic()
+        with self._exact_refresh_lock:
+            if self._exact_refresh_running or (
+                    not force and now - self._exact_refresh_attempted_at < config.EXACT_MATCH_INDEX_RETRY_INTERVAL):
+                return
+            self._exact_refresh_running = True
+            self._exact_refresh_attempted_at = now
+        threading.Thread(target=self._run_exact_match_refresh, name="exact-index-refresh", daemon=True).start()
+    
+    def _run_exact_match_refresh(self):
+        try:
+            self.refresh_exact_match_index()
+        finally:
+            self._exact_refresh_running = False
+    
+    def hydrate_vector_store(self) -> Dict[str, any]:
+        """
+        进程内向量库（NumPy后端）启动时加载数据：配置了NUMPY_SNAPSHOT_NAME时从快照恢复，
+        未配置或恢复失败时从MySQL分块读取并编码（NUMPY_HYDRATE_FROM_MYSQL）
+        
+        Returns:
+            最后一次加载的结果字典
+        """
+        self.hydration_state = "loading"
+        result = {"success": False, "message": "No startup data source configured"}
+        if config.NUMPY_SNAPSHOT_NAME:
+            logger.info(f"Hydrating in-memory vector store from snapshot '{config.NUMPY_SNAPSHOT_NAME}'")
+            result = self.import_snapshot(name=config.NUMPY_SNAPSHOT_NAME)
+            if not result["success"]:
+                logger.warning(f"Snapshot hydration failed: {result['message']}")
+        if not result["success"] and config.NUMPY_HYDRATE_FROM_MYSQL:
+            logger.info("Hydrating in-memory vector store from MySQL")
+            result = self.initialize_full_data(recreate_collection=True)
+        
+        self.hydration_state = "loaded" if result["success"] else "failed"
+        logger.info(f"In-memory vector store hydration {self.hydration_state}: {result['message']}")
+        return result
+    
+    def _set_reindex_shadow(self, shadow: Optional[str]):
+        """记录重建中的影子集合（多进程部署时写入共享目录，其他进程新增的FAQ也会写入影子集合）"""
+        self._reindex_shadow = shadow
+        if self.shared_state is not None:
+            self.shared_state.reindex_shadow.set(shadow)
+    
+    def _current_reindex_shadow(self) -> Optional[str]:
+        if self.shared_state is not None:
+            return self.shared_state.reindex_shadow.get()
+        return self._reindex_shadow
+    
+    def _mirror_to_shadow(self, faqs: List[Dict], embeddings):
+        """全量重建期间把新增的FAQ同时写入影子集合，避免别名切换后丢失"""
+        shadow = self._current_reindex_shadow()
+        if shadow is not None and not self.vector_service.upsert_points(faqs, embeddings, collection_name=shadow):
+            logger.warning(f"Failed to mirror {len(faqs)} FAQs to shadow collection '{shadow}'")
+    
+    def _search_cache_key(self, query: str, limit: int, similarity_threshold: float,
+                          hnsw_ef: Optional[int] = None, exact_search: bool = False) -> tuple:
+        """构造检索结果缓存键（检索参数不同，结果可能不同）"""
+        return (self._current_collection_version(), normalize_text(query), limit, similarity_threshold,
+                hnsw_ef, bool(exact_search))
+        
+    def try_begin_initialization(self) -> bool:
+        """
+        非阻塞获取初始化锁（多进程部署时同时获取跨进程锁），本进程或其他进程已在初始化时返回False；
+        获取成功后必须调用end_initialization释放，或把锁交给initialize_full_data(lock_held=True)
+        """
+        if not self._init_lock.acquire(blocking=False):
+            return False
+        if self.shared_state is not None and not self.shared_state.init_lock.acquire():
+            self._init_lock.release()
+            return False
+        return True
+    
+    def end_initialization(self):
+        """释放try_begin_initialization获取的锁"""
+        if self.shared_state is not None:
+            self.shared_state.init_lock.release()
+        self._init_lock.release()
+    
+    def is_initializing(self) -> bool:
+        """本进程或（多进程部署时）其他进程是否有初始化/同步任务正在运行"""
+        if not self.try_begin_initialization():
+            return True
+        self.end_initialization()
+        return False
+    
+    def initialize_full_data(self, recreate_collection: bool = True, incremental: bool = False,
+                             cancel_event: Optional[threading.Event] = None,
+                             progress: Optional[Dict] = None, lock_held: bool = False) -> Dict[str, any]:
         """
         全量数据初始化
         
         Args:
             recreate_collection: 是否重新创建集合（删除旧数据）
+            incremental: 是否使用增量同步（只重新编码新增或变化的FAQ，忽略recreate_collection）
+            cancel_event: 取消信号，设置后在处理完当前分块时停止
+            progress: 进度字典，运行过程中实时更新已读取/编码/写入的行数
+            lock_held: 调用方已通过try_begin_initialization获取锁（后台任务在提交时获取，避免检查与启动之间的竞争），
+                       结束时由本方法释放
             
         Returns:
             包含初始化结果的字典
         """
+        if not lock_held and not self.try_begin_initialization():
+            return {
+                "success": False,
+                "message": "Another initialization is already running",
+                "processed_count": 0,
+                "total_count": 0,
+                "execution_time": 0
+            }
+        
+        try:
+            if incremental:
+                return self._sync_incremental(cancel_event, progress)
+            return self._initialize_full(recreate_collection, cancel_event, progress)
+        finally:
+            self.end_initialization()
+    
+    def sync_incremental(self, cancel_event: Optional[threading.Event] = None,
+                         progress: Optional[Dict] = None) -> Dict[str, any]:
+        """增量同步，参见initialize_full_data(incremental=True)"""
+        return self.initialize_full_data(incremental=True, cancel_event=cancel_event, progress=progress)
+    
+    def _initialize_full(self, recreate_collection: bool, cancel_event: Optional[threading.Event],
+                         progress: Optional[Dict]) -> Dict[str, any]:
+        """全量初始化：流式读取、编码并写入所有FAQ"""
         start_time = time.time()
         result = {
             "success": False,
@@ -37,6 +263,8 @@ class FAQService:
             "execution_time": 0,
             "model_info": model_manager.get_model_info()
         }
+        shadow = None
+        committed = False
         
         try:
             # 1. 检查模型是否加载
@@ -46,57 +274,223 @@ class FAQService:
                     result["message"] = "Failed to load embedding model"
                     return result
             
-            # 2. 从数据库获取所有FAQ数据
-            logger.info("Loading FAQs from database...")
-            faqs = self.faq_repo.get_all_faqs()
-            result["total_count"] = len(faqs)
+            # 2. 分块读取数据库（先取第一块，数据库为空时不改动集合）
+            logger.info("Loading FAQs from database in chunks...")
+            chunks = self.faq_repo.iter_faq_chunks(config.INIT_CHUNK_SIZE)
+            first_chunk = next(chunks, None)
             
-            if not faqs:
+            if not first_chunk:
                 result["message"] = "No FAQ data found in database"
                 result["success"] = True  # 技术上成功，但没有数据
                 return result
             
-            # 3. 生成向量
-            logger.info(f"Generating embeddings for {len(faqs)} FAQs...")
-            questions = [faq["question"] for faq in faqs]
-            embeddings = model_manager.generate_embeddings(questions)
-            
-            if embeddings is None:
-                result["message"] = "Failed to generate embeddings"
-                return result
-            
-            # 4. 初始化Qdrant集合
-            vector_size = embeddings.shape[1]
+            # 3. 初始化Qdrant集合（重建时写入影子集合，完成后再切换别名，期间检索不受影响）
+            vector_size = model_manager.get_embedding_dimension()
             logger.info(f"Initializing Qdrant collection with vector size: {vector_size}")
             
             if recreate_collection:
-                if not self.qdrant_service.recreate_collection(vector_size):
-                    result["message"] = "Failed to recreate Qdrant collection"
+                shadow = self.vector_service.begin_reindex(vector_size)
+                if shadow is None:
+                    result["message"] = "Failed to create shadow collection"
                     return result
+                self._set_reindex_shadow(shadow)
+                
+                def upsert_fn(faqs, embeddings):
+                    return self.vector_service.upsert_points(faqs, embeddings, collection_name=shadow)
             else:
-                if not self.qdrant_service.ensure_collection_exists(vector_size):
+                if not self.vector_service.ensure_collection_exists(vector_size):
                     result["message"] = "Failed to ensure Qdrant collection exists"
                     return result
+                upsert_fn = self.vector_service.upsert_points
             
-            # 5. 批量插入向量数据
-            logger.info("Upserting FAQ embeddings to Qdrant...")
-            if not self.qdrant_service.upsert_points(faqs, embeddings):
-                result["message"] = "Failed to upsert data to Qdrant"
-                return result
+            # 4. 流水线：读取、编码、写入三个阶段并发执行
+            logger.info("Streaming FAQ embeddings to Qdrant...")
+            indexed_faqs = []
+            pipeline = IndexingPipeline(
+                chunks=itertools.chain([first_chunk], chunks),
+                encode_fn=lambda questions: model_manager.generate_embeddings(
+                    questions, batch_size=config.INIT_ENCODE_BATCH_SIZE, use_cache=False
+                ),
+                upsert_fn=upsert_fn,
+                queue_size=config.INIT_QUEUE_SIZE,
+                on_chunk=indexed_faqs.extend,
+                cancel_event=cancel_event,
+                stats=progress
+            )
+            try:
+                result["pipeline"] = pipeline.run()
+            finally:
+                result["total_count"] = pipeline.stats["rows_read"]
+                result["processed_count"] = pipeline.stats["rows_upserted"]
+            
+            if shadow is not None:
+                # 切换完成后才清除影子集合记录，切换前新增的FAQ仍会写入影子集合
+                if not self.vector_service.commit_reindex(shadow):
+                    result["message"] = "Failed to switch to the rebuilt collection"
+                    return result
+                committed = True
+                self._set_reindex_shadow(None)
+            
+            self.exact_match_index.rebuild(indexed_faqs)
             
-            result["processed_count"] = len(faqs)
             result["success"] = True
-            result["message"] = f"Successfully initialized {len(faqs)} FAQs"
+            result["message"] = f"Successfully initialized {result['processed_count']} FAQs"
             
+        except PipelineCancelled:
+            logger.warning("Full data initialization cancelled")
+            if shadow is not None:
+                result["message"] = (f"Initialization cancelled after {result['processed_count']} FAQs; "
+                                     f"the live collection was left unchanged")
+            else:
+                result["message"] = (f"Initialization cancelled after {result['processed_count']} FAQs; "
+                                     f"the collection is only partially populated")
+        
         except Exception as e:
             logger.error(f"Error in full data initialization: {e}")
             result["message"] = f"Initialization failed: {str(e)}"
         
         finally:
+            if shadow is not None and not committed:
+                # 未完成的重建不影响当前集合，直接删除影子集合
+                self._set_reindex_shadow(None)
+                self.vector_service.abort_reindex(shadow)
+            # 原地写入时无论成功与否集合内容都可能已变化
+            if shadow is None or committed:
+                self._bump_collection_version()
             result["execution_time"] = round(time.time() - start_time, 2)
             
         return result
     
+    def _sync_incremental(self, cancel_event: Optional[threading.Event],
+                          progress: Optional[Dict]) -> Dict[str, any]:
+        """
+        增量同步：比较数据库与向量库中的内容哈希，只编码并写入新增或变化的FAQ，
+        并删除数据库中已不存在的FAQ
+        
+        Returns:
+            包含同步结果的字典（新增、更新、删除、未变化数量）
+        """
+        start_time = time.time()
+        result = {
+            "success": False,
+            "message": "",
+            "mode": "incremental",
+            "processed_count": 0,
+            "total_count": 0,
+            "added_count": 0,
+            "updated_count": 0,
+            "deleted_count": 0,
+            "unchanged_count": 0,
+            "execution_time": 0,
+            "model_info": model_manager.get_model_info()
+        }
+        
+        try:
+            # 1. 从数据库获取所有FAQ数据
+            logger.info("Loading FAQs from database for incremental sync...")
+            faqs = self.faq_repo.get_all_faqs()
+            result["total_count"] = len(faqs)
+            progress = progress if progress is not None else {}
+            progress["rows_read"] = len(faqs)
+            
+            if not faqs:
+                # 与全量初始化一致，数据库为空时不清空向量库
+                result["message"] = "No FAQ data found in database"
+                result["success"] = True
+                return result
+            
+            # 2. 读取向量库中已有点的内容哈希
+            existing: Dict[str, List[Tuple[any, Optional[str]]]] = {}
+            for ids, _, payloads in self.vector_service.iter_points(with_vectors=False):
+                for point_id, payload in zip(ids, payloads):
+                    existing.setdefault(payload.get("faq_id"), []).append(
+                        (point_id, payload.get("content_hash"))
+                    )
+            
+            # 3. 比较差异
+            changed_faqs = []
+            stale_point_ids = []
+            for faq in faqs:
+                points = existing.pop(faq["id"], [])
+                content_hash = compute_content_hash(faq["question"], faq["answer"])
+                current_id = self.vector_service.point_id_for(faq["id"])
+                if any(pid == current_id and h == content_hash for pid, h in points):
+                    result["unchanged_count"] += 1
+                    # 清理旧版点ID遗留的重复点
+                    stale_point_ids.extend(pid for pid, _ in points if pid != current_id)
+                    continue
+                
+                changed_faqs.append(faq)
+                if points:
+                    result["updated_count"] += 1
+                else:
+                    result["added_count"] += 1
+                stale_point_ids.extend(pid for pid, _ in points if pid != current_id)
+            
+            for points in existing.values():
+                result["deleted_count"] += 1
+                stale_point_ids.extend(pid for pid, _ in points)
+            
+            logger.info(f"Incremental sync plan: {result['added_count']} added, "
+                        f"{result['updated_count']} updated, {result['deleted_count']} deleted, "
+                        f"{result['unchanged_count']} unchanged")
+            
+            # 4. 编码并写入新增或变化的FAQ
+            if cancel_event is not None and cancel_event.is_set():
+                result["message"] = "Incremental sync cancelled before any changes were written"
+                return result
+            
+            if changed_faqs:
+                if not model_manager.is_model_loaded():
+                    logger.info("Model not loaded, loading now...")
+                    if not model_manager.load_model():
+                        result["message"] = "Failed to load embedding model"
+                        return result
+                
+                questions = [faq["question"] for faq in changed_faqs]
+                embeddings = model_manager.generate_embeddings(questions, use_cache=False)
+                if embeddings is None:
+                    result["message"] = "Failed to generate embeddings"
+                    return result
+                progress["rows_encoded"] = len(changed_faqs)
+                
+                if cancel_event is not None and cancel_event.is_set():
+                    result["message"] = "Incremental sync cancelled before any changes were written"
+                    return result
+                
+                if not self.vector_service.ensure_collection_exists(embeddings.shape[1]):
+                    result["message"] = "Failed to ensure Qdrant collection exists"
+                    return result
+                
+                if not self.vector_service.upsert_points(changed_faqs, embeddings):
+                    result["message"] = "Failed to upsert data to Qdrant"
+                    return result
+                progress["rows_upserted"] = len(changed_faqs)
+            
+            # 5. 删除过期的点（写入成功后再删除，避免检索出现空窗）
+            if not self.vector_service.delete_points(stale_point_ids):
+                result["message"] = "Failed to delete stale points from Qdrant"
+                return result
+            
+            self.exact_match_index.rebuild(faqs)
+            
+            result["processed_count"] = len(changed_faqs)
+            result["success"] = True
+            result["message"] = (f"Incremental sync finished: {result['added_count']} added, "
+                                 f"{result['updated_count']} updated, {result['deleted_count']} deleted, "
+                                 f"{result['unchanged_count']} unchanged")
+            
+        except Exception as e:
+            logger.error(f"Error in incremental sync: {e}")
+            result["message"] = f"Incremental sync failed: {str(e)}"
+        
+        finally:
+            if result["processed_count"] or result["deleted_count"]:
+                self._bump_collection_version()
+            result["execution_time"] = round(time.time() - start_time, 2)
+        
+        return result
+    
     def add_single_faq(self, faq_id: str, question: str, answer: str) -> Dict[str, any]:
         """
         添加单条FAQ数据
@@ -139,7 +533,7 @@ class FAQService:
             
             # 4. 生成向量
             logger.info(f"Generating embedding for FAQ: {faq_id}")
-            embeddings = model_manager.generate_embeddings([question])
+            embeddings = model_manager.generate_embeddings([question], use_cache=False)
             
             if embeddings is None or len(embeddings) == 0:
                 result["message"] = "Failed to generate embedding"
@@ -147,16 +541,21 @@ class FAQService:
             
             # 5. 确保Qdrant集合存在
             vector_size = embeddings.shape[1]
-            if not self.qdrant_service.ensure_collection_exists(vector_size):
+            if not self.vector_service.ensure_collection_exists(vector_size):
                 result["message"] = "Failed to ensure Qdrant collection exists"
                 return result
             
             # 6. 添加到Qdrant
             faq_data = {"id": faq_id, "question": question, "answer": answer}
-            if not self.qdrant_service.upsert_single_point(faq_data, embeddings[0]):
+            upserted = self.vector_service.upsert_single_point(faq_data, embeddings[0])
+            self._bump_collection_version()
+            if not upserted:
                 result["message"] = "Failed to add FAQ to Qdrant"
                 return result
             
+            self._mirror_to_shadow([faq_data], embeddings)
+            self.exact_match_index.add(faq_data)
+            
             result["success"] = True
             result["message"] = f"Successfully added FAQ: {faq_id}"
             
@@ -169,31 +568,154 @@ class FAQService:
             
         return result
     
-    def search_faqs(self, query: str, limit: int = 5, similarity_threshold: float = 0.0) -> Dict[str, any]:
+    def add_faqs_bulk(self, faqs: List[Dict]) -> Dict[str, any]:
         """
-        搜索FAQ
+        批量添加FAQ数据
+        
+        数据库写入在单个事务中完成，向量按块编码并写入向量库；
+        单条FAQ失败时记录在failed中，不影响其余条目
         
         Args:
-            query: 查询文本
-            limit: 返回结果数量限制
-            similarity_threshold: 相似度阈值
+            faqs: FAQ列表，每项包含 id、question、answer
             
         Returns:
-            包含搜索结果的字典
+            包含添加结果的字典
         """
         start_time = time.time()
         result = {
             "success": False,
             "message": "",
-            "query": query,
-            "results": [],
+            "total": len(faqs),
+            "added": 0,
+            "failed": [],
+            "timing": {},
             "execution_time": 0
         }
         
         try:
-            # 1. 验证输入
-            if not query.strip():
-                result["message"] = "Query text is required"
+            # 1. 验证输入（同一批次中重复的ID以最后一条为准）
+            valid = {}
+            for index, faq in enumerate(faqs):
+                faq_id = faq.get("id") if isinstance(faq, dict) else None
+                # 数据库中id为varchar，整数ID转为字符串，否则向量库payload中的ID与增量同步时读出的ID不一致
+                if isinstance(faq_id, int) and not isinstance(faq_id, bool):
+                    faq_id = str(faq_id)
+                if not isinstance(faq_id, str) or not all([faq_id, faq.get("question"), faq.get("answer")]):
+                    result["failed"].append({
+                        "index": index,
+                        "id": faq_id,
+                        "error": "id, question, and answer are required"
+                    })
+                    continue
+                valid[faq_id] = (index, {"id": faq_id, "question": faq["question"], "answer": faq["answer"]})
+            
+            if not valid:
+                result["message"] = "No valid FAQs to add"
+                return result
+            
+            # 2. 检查模型是否加载
+            if not model_manager.is_model_loaded():
+                logger.info("Model not loaded, loading now...")
+                if not model_manager.load_model():
+                    result["message"] = "Failed to load embedding model"
+                    return result
+            
+            # 3. 批量写入数据库
+            db_start = time.time()
+            db_result = self.faq_repo.add_faqs_bulk([faq for _, faq in valid.values()])
+            db_time = time.time() - db_start
+            for failure in db_result["failed"]:
+                index, _ = valid.pop(failure["id"])
+                result["failed"].append({"index": index, "id": failure["id"], "error": failure["error"]})
+            
+            # 4. 分块编码并写入向量库
+            encode_time = upsert_time = 0.0
+            pending = list(valid.values())
+            collection_ready = False
+            added = []
+            try:
+                for start in range(0, len(pending), config.BULK_CHUNK_SIZE):
+                    chunk = pending[start:start + config.BULK_CHUNK_SIZE]
+                    chunk_faqs = [faq for _, faq in chunk]
+                    
+                    encode_start = time.time()
+                    embeddings = model_manager.generate_embeddings(
+                        [faq["question"] for faq in chunk_faqs],
+                        batch_size=config.INIT_ENCODE_BATCH_SIZE,
+                        use_cache=False
+                    )
+                    encode_time += time.time() - encode_start
+                    
+                    error = None
+                    if embeddings is None or len(embeddings) != len(chunk_faqs):
+                        error = "Failed to generate embedding"
+                    else:
+                        if not collection_ready:
+                            collection_ready = self.vector_service.ensure_collection_exists(embeddings.shape[1])
+                        if not collection_ready:
+                            error = "Failed to ensure Qdrant collection exists"
+                        else:
+                            upsert_start = time.time()
+                            if not self.vector_service.upsert_points(chunk_faqs, embeddings):
+                                error = "Failed to add FAQ to Qdrant"
+                            upsert_time += time.time() - upsert_start
+                    
+                    if error:
+                        result["failed"].extend(
+                            {"index": index, "id": faq["id"], "error": error} for index, faq in chunk
+                        )
+                        continue
+                    
+                    self._mirror_to_shadow(chunk_faqs, embeddings)
+                    for _, faq in chunk:
+                        self.exact_match_index.add(faq)
+                    added.extend(chunk_faqs)
+            finally:
+                if added:
+                    self._bump_collection_version()
+            
+            result["failed"].sort(key=lambda failure: failure["index"])
+            result["added"] = len(added)
+            result["timing"] = {
+                "database": round(db_time, 2),
+                "encode": round(encode_time, 2),
+                "upsert": round(upsert_time, 2)
+            }
+            result["success"] = not result["failed"]
+            result["message"] = f"Added {len(added)} of {len(faqs)} FAQs, {len(result['failed'])} failed"
+            logger.info(result["message"])
+            
+        except Exception as e:
+            logger.error(f"Error adding FAQs in bulk: {e}")
+            result["message"] = f"Failed to add FAQs: {str(e)}"
+        
+        finally:
+            result["execution_time"] = round(time.time() - start_time, 2)
+        
+        return result
+    
+    def search_faqs(self, query: str, limit: int = 5, similarity_threshold: float = 0.0,
+                    exact_match: Optional[bool] = None, hnsw_ef: Optional[int] = None,
+                    exact_search: bool = False) -> Dict[str, any]:
+        """
+        搜索FAQ
+        
+        Args:
+            query: 查询文本
+            limit: 返回结果数量限制
+            similarity_threshold: 相似度阈值
+            exact_match: 是否启用精确匹配快速通道，None表示使用配置默认值
+            hnsw_ef: 本次检索的HNSW ef，越大召回越高、延迟越高，None使用配置默认值
+            exact_search: 是否跳过HNSW做精确向量检索
+            
+        Returns:
+            包含搜索结果的字典
+        """
+        start_time = time.time()
+        result, cache_key = self.prepare_search(query, limit, similarity_threshold, exact_match, hnsw_ef, exact_search)
+        
+        try:
+            if cache_key is None:
                 return result
             
             # 2. 检查模型是否加载
@@ -203,21 +725,23 @@ class FAQService:
                     return result
             
             # 3. 生成查询向量
-            query_embeddings = model_manager.generate_embeddings([query])
+            with time_stage("query_encode"):
+                query_embeddings = model_manager.generate_embeddings([query])
             if query_embeddings is None or len(query_embeddings) == 0:
                 result["message"] = "Failed to generate query embedding"
                 return result
             
             # 4. 在Qdrant中搜索
-            search_results = self.qdrant_service.search_similar(
-                query_embeddings[0], 
-                limit=limit, 
-                score_threshold=similarity_threshold
-            )
+            with time_stage("vector_search"):
+                search_results = self.vector_service.search_similar(
+                    query_embeddings[0], 
+                    limit=limit, 
+                    score_threshold=similarity_threshold,
+                    hnsw_ef=hnsw_ef,
+                    exact=exact_search
+                )
             
-            result["results"] = search_results
-            result["success"] = True
-            result["message"] = f"Found {len(search_results)} similar FAQs"
+            self.finish_search(result, cache_key, search_results)
             
         except Exception as e:
             logger.error(f"Error searching FAQs: {e}")
@@ -228,12 +752,415 @@ class FAQService:
             
         return result
     
+    def prepare_search(self, query: str, limit: int, similarity_threshold: float,
+                       exact_match: Optional[bool] = None, hnsw_ef: Optional[int] = None,
+                       exact_search: bool = False) -> Tuple[Dict, Optional[tuple]]:
+        """
+        单条检索中编码之前的部分（同步与异步检索共用）：校验输入，查找精确匹配索引和结果缓存
+        
+        Returns:
+            (结果字典, 缓存键)；缓存键为None时结果已完整（输入无效或快速通道命中），
+            否则由调用方编码、向量检索后调用finish_search
+        """
+        result = {
+            "success": False,
+            "message": "",
+            "query": query,
+            "results": [],
+            "cached": False,
+            "exact_match": False,
+            "execution_time": 0
+        }
+        
+        # 1. 验证输入
+        if not query.strip():
+            result["message"] = "Query text is required"
+            return result, None
+        
+        # 精确匹配快速通道与结果缓存（缓存键在检索前确定，检索期间数据变更时结果不会写入新版本）
+        with timing.stage("normalize"):
+            cache_key = self._search_cache_key(query, limit, similarity_threshold, hnsw_ef, exact_search)
+        with timing.stage("fast_path"):
+            fast_results, source = self._lookup_fast_path(query, limit, cache_key, exact_match)
+        if fast_results is None:
+            return result, cache_key
+        
+        result["results"] = fast_results
+        result["exact_match"] = source == "exact_match"
+        result["cached"] = source == "cache"
+        result["success"] = True
+        if result["exact_match"]:
+            result["message"] = f"Found {len(fast_results)} exactly matched FAQs"
+        else:
+            result["message"] = f"Found {len(fast_results)} similar FAQs"
+        return result, None
+    
+    def finish_search(self, result: Dict, cache_key: tuple, search_results: List[Dict]):
+        """写入检索结果缓存并填充prepare_search返回的结果字典"""
+        self._store_search_results(cache_key, search_results)
+        result["results"] = search_results
+        result["success"] = True
+        result["message"] = f"Found {len(search_results)} similar FAQs"
+    
+    def _lookup_fast_path(self, query: str, limit: int, cache_key: tuple,
+                          exact_match: Optional[bool]) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        依次查找精确匹配索引和检索结果缓存
+        
+        Returns:
+            (结果列表, 来源"exact_match"/"cache")，均未命中时返回(None, None)
+        """
+        if exact_match is None:
+            exact_match = config.EXACT_MATCH_ENABLED
+        if exact_match:
+            # 索引尚未加载完成时直接走向量检索
+            self.start_exact_match_refresh()
+            exact_results = self.exact_match_index.lookup(query, limit)
+            if exact_results:
+                return exact_results, "exact_match"
+        
+        if self.search_cache is not None:
+            cached_results = self.search_cache.get(cache_key)
+            if cached_results is not None:
+                return copy.deepcopy(cached_results), "cache"
+        
+        return None, None
+    
+    def _store_search_results(self, cache_key: tuple, results: List[Dict]):
+        """写入检索结果缓存（search_similar在Qdrant异常时也返回空列表，因此只缓存非空结果）"""
+        if self.search_cache is not None and results:
+            self.search_cache.put(cache_key, copy.deepcopy(results))
+    
+    def search_faqs_batch(self, queries: List[Dict]) -> Dict[str, any]:
+        """
+        批量搜索FAQ：未命中精确匹配和缓存的查询一次性编码，并通过一次批量检索请求查询
+        
+        Args:
+            queries: 查询列表，每项包含 text、limit、similarity，可选 exact_match、hnsw_ef、exact
+            
+        Returns:
+            包含搜索结果的字典，results与输入顺序一致
+        """
+        start_time = time.time()
+        result = {
+            "success": False,
+            "message": "",
+            "results": [],
+            "timing": {},
+            "execution_time": 0
+        }
+        
+        try:
+            items, pending = self.prepare_search_batch(queries)
+            
+            encode_time = search_time = 0.0
+            batch_results = []
+            if pending:
+                if not model_manager.is_model_loaded():
+                    if not model_manager.load_model():
+                        result["message"] = "Failed to load embedding model"
+                        return result
+                
+                # 一次编码所有未命中的查询
+                encode_start = time.time()
+                embeddings = model_manager.generate_embeddings([query["text"] for _, query, _ in pending])
+                encode_time = time.time() - encode_start
+                observe_stage("query_encode", encode_time)
+                if embeddings is None or len(embeddings) != len(pending):
+                    result["message"] = "Failed to generate query embeddings"
+                    return result
+                
+                # 一次批量检索
+                search_start = time.time()
+                batch_results = self.vector_service.search_batch(embeddings, **self.batch_search_params(pending))
+                search_time = time.time() - search_start
+                observe_stage("vector_search", search_time)
+                if batch_results is None:
+                    result["message"] = "Batch search failed"
+                    return result
+            
+            self.finish_search_batch(result, items, pending, batch_results, encode_time, search_time)
+            
+        except Exception as e:
+            logger.error(f"Error in batch search: {e}")
+            result["message"] = f"Batch search failed: {str(e)}"
+        
+        finally:
+            result["execution_time"] = round(time.time() - start_time, 4)
+        
+        return result
+    
+    def prepare_search_batch(self, queries: List[Dict]) -> Tuple[List[Dict], List[Tuple[Dict, Dict, tuple]]]:
+        """
+        批量检索中编码之前的部分（同步与异步检索共用）：逐条查找精确匹配索引和结果缓存
+        
+        Returns:
+            (与输入顺序一致的结果项列表, 需要编码检索的(结果项, 查询, 缓存键)列表)
+        """
+        items = []
+        pending = []
+        for query in queries:
+            item_start = time.time()
+            item = {
+                "query": query["text"],
+                "results": [],
+                "cached": False,
+                "exact_match": False
+            }
+            cache_key = self._search_cache_key(query["text"], query["limit"], query["similarity"],
+                                               query.get("hnsw_ef"), query.get("exact", False))
+            fast_results, source = self._lookup_fast_path(
+                query["text"], query["limit"], cache_key, query.get("exact_match")
+            )
+            if fast_results is not None:
+                item["results"] = fast_results
+                item["exact_match"] = source == "exact_match"
+                item["cached"] = source == "cache"
+                item["execution_time"] = round(time.time() - item_start, 4)
+            else:
+                # 查找耗时，finish_search_batch再加上分摊的编码和检索耗时
+                item["execution_time"] = time.time() - item_start
+                pending.append((item, query, cache_key))
+            items.append(item)
+        return items, pending
+    
+    @staticmethod
+    def batch_search_params(pending: List[Tuple[Dict, Dict, tuple]]) -> Dict[str, list]:
+        """待检索查询的search_batch参数（查询向量以外）"""
+        return {
+            "limits": [query["limit"] for _, query, _ in pending],
+            "score_thresholds": [query["similarity"] for _, query, _ in pending],
+            "hnsw_efs": [query.get("hnsw_ef") for _, query, _ in pending],
+            "exacts": [bool(query.get("exact", False)) for _, query, _ in pending]
+        }
+    
+    def finish_search_batch(self, result: Dict, items: List[Dict], pending: List[Tuple[Dict, Dict, tuple]],
+                            batch_results: List[List[Dict]], encode_time: float, search_time: float):
+        """
+        写入检索结果缓存并填充批量检索的结果字典
+        
+        合并编码的查询共享一次编码和一次批量检索请求，无法单独计时：每条查询的execution_time为
+        它自己的快速通道查找耗时加上平均分摊的编码和检索耗时，分摊值见各条的timing
+        """
+        encode_share = encode_time / len(pending) if pending else 0.0
+        search_share = search_time / len(pending) if pending else 0.0
+        for (item, _, cache_key), search_results in zip(pending, batch_results):
+            self._store_search_results(cache_key, search_results)
+            item["results"] = search_results
+            item["execution_time"] = round(item["execution_time"] + encode_share + search_share, 4)
+            item["timing"] = {"encode_share": round(encode_share, 4), "search_share": round(search_share, 4)}
+        
+        result["results"] = items
+        result["timing"] = {
+            "encode": round(encode_time, 4),
+            "search": round(search_time, 4),
+            "encoded_queries": len(pending)
+        }
+        result["success"] = True
+        result["message"] = f"Searched {len(items)} queries"
+    
+    def export_snapshot(self, name: str = None, path: str = None) -> Dict[str, any]:
+        """
+        将向量集合导出为本地快照
+        
+        Args:
+            name: 快照名称，保存在config.SNAPSHOT_DIR下
+            path: 快照目录的完整路径（仅供命令行使用，优先于name）
+        """
+        start_time = time.time()
+        result = {
+            "success": False,
+            "message": "",
+            "snapshot": None,
+            "execution_time": 0
+        }
+        
+        try:
+            snapshot_path = Path(path) if path else resolve_snapshot_path(config.SNAPSHOT_DIR, name)
+            snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            logger.info(f"Exporting vector collection snapshot to {snapshot_path}")
+            header = export_snapshot(
+                self.vector_service, snapshot_path,
+                model_name=model_manager.model_name,
+                batch_size=config.SNAPSHOT_BATCH_SIZE
+            )
+            
+            result["snapshot"] = dict(header, path=str(snapshot_path))
+            result["success"] = True
+            result["message"] = f"Exported {header['count']} points"
+            
+        except Exception as e:
+            logger.error(f"Error exporting snapshot: {e}")
+            result["message"] = f"Snapshot export failed: {str(e)}"
+        
+        finally:
+            result["execution_time"] = round(time.time() - start_time, 2)
+        
+        return result
+    
+    def import_snapshot(self, name: str = None, path: str = None,
+                        recreate_collection: bool = True, force: bool = False) -> Dict[str, any]:
+        """
+        从本地快照恢复向量集合，直接写入已有向量，不经过模型
+        
+        Args:
+            name: 快照名称，位于config.SNAPSHOT_DIR下
+            path: 快照目录的完整路径（仅供命令行使用，优先于name）
+            recreate_collection: 是否先重新创建集合（删除旧数据）
+            force: 快照模型与当前模型不一致时是否仍然导入
+        """
+        start_time = time.time()
+        result = {
+            "success": False,
+            "message": "",
+            "processed_count": 0,
+            "total_count": 0,
+            "execution_time": 0
+        }
+        shadow = None
+        committed = False
+        
+        try:
+            snapshot_path = Path(path) if path else resolve_snapshot_path(config.SNAPSHOT_DIR, name)
+            header = read_snapshot_header(snapshot_path)
+            result["total_count"] = header["count"]
+            
+            if header.get("model_name") != model_manager.model_name and not force:
+                result["message"] = (f"Snapshot model '{header.get('model_name')}' does not match "
+                                     f"current model '{model_manager.model_name}'")
+                return result
+            
+            vector_size = header["vector_size"]
+            if not vector_size:
+                result["message"] = "Snapshot is empty"
+                return result
+            
+            # 重新创建时写入影子集合，恢复完成后再切换
+            if recreate_collection:
+                shadow = self.vector_service.begin_reindex(vector_size)
+                if shadow is None:
+                    result["message"] = "Failed to create shadow collection"
+                    return result
+            elif not self.vector_service.ensure_collection_exists(vector_size):
+                result["message"] = "Failed to ensure collection exists"
+                return result
+            
+            logger.info(f"Restoring {header['count']} points from snapshot {snapshot_path}")
+            faqs = []
+            for ids, vectors, payloads in iter_snapshot(snapshot_path, batch_size=config.SNAPSHOT_BATCH_SIZE):
+                # 按payload中的FAQ ID重新计算点ID，兼容旧版点ID生成的快照
+                ids = [
+                    self.vector_service.point_id_for(payload["faq_id"]) if payload.get("faq_id") is not None else point_id
+                    for point_id, payload in zip(ids, payloads)
+                ]
+                if not self.vector_service.upsert_vectors(ids, vectors, payloads, collection_name=shadow):
+                    raise SnapshotError("Failed to upsert snapshot batch")
+                result["processed_count"] += len(ids)
+                faqs.extend(
+                    {"id": p["faq_id"], "question": p["question"], "answer": p["answer"]}
+                    for p in payloads if p.get("faq_id") is not None and p.get("question")
+                )
+            
+            if shadow is not None:
+                if not self.vector_service.commit_reindex(shadow):
+                    result["message"] = "Failed to switch to the restored collection"
+                    return result
+                committed = True
+            
+            self.exact_match_index.rebuild(faqs)
+            result["success"] = True
+            result["message"] = f"Restored {result['processed_count']} points from snapshot"
+            
+        except Exception as e:
+            logger.error(f"Error importing snapshot: {e}")
+            result["message"] = f"Snapshot import failed: {str(e)}"
+        
+        finally:
+            if shadow is not None and not committed:
+                self.vector_service.abort_reindex(shadow)
+            if shadow is None or committed:
+                self._bump_collection_version()
+            result["execution_time"] = round(time.time() - start_time, 2)
+        
+        return result
+    
+    def migrate_point_ids(self, dry_run: bool = False) -> Dict[str, any]:
+        """
+        将向量库中的旧版点ID迁移为稳定ID并删除重复点
+        
+        Args:
+            dry_run: 只统计需要迁移的点，不做修改
+        """
+        start_time = time.time()
+        result = {
+            "success": False,
+            "message": "",
+            "stats": {},
+            "execution_time": 0
+        }
+        
+        try:
+            result["stats"] = self.vector_service.migrate_point_ids(
+                batch_size=config.SNAPSHOT_BATCH_SIZE, dry_run=dry_run
+            )
+            result["success"] = True
+            if dry_run:
+                result["message"] = "Dry run finished, no points were changed"
+            else:
+                result["message"] = (f"Migrated {result['stats']['rewritten']} points, "
+                                     f"deleted {result['stats']['deleted']} legacy points")
+            
+        except Exception as e:
+            logger.error(f"Error migrating point IDs: {e}")
+            result["message"] = f"Point ID migration failed: {str(e)}"
+        
+        finally:
+            if not dry_run:
+                self._bump_collection_version()
+            result["execution_time"] = round(time.time() - start_time, 2)
+        
+        return result
+    
+    def rollback_collection(self) -> Dict[str, any]:
+        """将检索切回重建前保留的旧集合"""
+        start_time = time.time()
+        result = {
+            "success": False,
+            "message": "",
+            "collection": None,
+            "execution_time": 0
+        }
+        
+        try:
+            target = self.vector_service.rollback_collection()
+            if target is None:
+                result["message"] = "No previous collection available for rollback"
+                return result
+            
+            # 旧集合内容不同，重新加载精确匹配索引（失败时由检索请求触发后台重试）
+            self.exact_match_index.invalidate()
+            self._bump_collection_version()
+            self.refresh_exact_match_index()
+            result["collection"] = target
+            result["success"] = True
+            result["message"] = f"Rolled back to collection '{target}'"
+            
+        except Exception as e:
+            logger.error(f"Error rolling back collection: {e}")
+            result["message"] = f"Rollback failed: {str(e)}"
+        
+        finally:
+            result["execution_time"] = round(time.time() - start_time, 2)
+        
+        return result
+    
     def get_all_faqs_from_qdrant(self) -> Dict[str, any]:
         """
         从Qdrant获取所有FAQ数据
         """
         try:
-            points = self.qdrant_service.get_all_points()
+            points = self.vector_service.get_all_points()
             return {
                 "success": True,
                 "total_points": len(points),
@@ -256,11 +1183,11 @@ class FAQService:
             # 数据库连接状态
             db_status = self.faq_repo.db.test_connection()
             
-            # Qdrant连接状态
-            qdrant_status = self.qdrant_service.connect()
+            # Qdrant连接状态（实际探测，服务中途不可用时也能发现）
+            qdrant_status = self.vector_service.ping() and self.vector_service.connect()
             
             # 获取集合信息
-            collection_info = self.qdrant_service.get_collection_info() if qdrant_status else None
+            collection_info = self.vector_service.get_collection_info() if qdrant_status else None
             
             # 数据库FAQ数量
             db_faq_count = self.faq_repo.get_faq_count() if db_status else 0
@@ -269,13 +1196,20 @@ class FAQService:
                 "success": True,
                 "database": {
                     "connected": db_status,
-                    "faq_count": db_faq_count
+                    "faq_count": db_faq_count,
+                    "pool": self.faq_repo.db.get_pool_stats()
                 },
                 "qdrant": {
+                    "backend": config.VECTOR_BACKEND,
                     "connected": qdrant_status,
                     "collection_info": collection_info
                 },
-                "model": model_manager.get_model_info()
+                "model": model_manager.get_model_info(),
+                "search_cache": self.search_cache.get_stats() if self.search_cache else None,
+                "exact_match_index": {
+                    "built": self.exact_match_index.is_built,
+                    "size": len(self.exact_match_index)
+                }
             }
             
         except Exception as e:
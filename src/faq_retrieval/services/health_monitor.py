@@ -0,0 +1,114 @@
+"""
+健康状态监控 - 后台线程定期执行完整的状态检查（MySQL计数、Qdrant集合信息等），
+健康检查接口直接返回最近一次的检查结果，负载均衡器频繁探测不会对依赖产生额外压力
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """后台状态刷新器"""
+
+    def __init__(self, status_fn: Callable[[], Dict], interval: float = 10.0, stale_after: float = 60.0):
+        """
+        Args:
+            status_fn: 完整状态检查函数（通常为FAQService.get_system_status）
+            interval: 刷新间隔（秒）
+            stale_after: 快照超过该时间（秒）未刷新时视为过期
+        """
+        self.status_fn = status_fn
+        self.interval = max(0.1, float(interval))
+        self.stale_after = float(stale_after)
+        self._snapshot: Optional[Dict] = None
+        self._checked_at: Optional[float] = None
+        self._check_duration: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._refreshes = 0
+        self._failures = 0
+
+    def start(self):
+        """按需启动后台刷新线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def refresh(self) -> Dict:
+        """立即执行一次完整检查并更新快照，同一时间只有一个检查在执行"""
+        with self._refresh_lock:
+            start = time.time()
+            try:
+                status = self.status_fn()
+            except Exception as e:
+                logger.error(f"Health check refresh failed: {e}")
+                status = {
+                    "success": False,
+                    "message": f"Failed to get system status: {str(e)}"
+                }
+            duration = time.time() - start
+
+            with self._lock:
+                self._snapshot = status
+                self._checked_at = time.time()
+                self._check_duration = duration
+                self._refreshes += 1
+                if not status.get("success"):
+                    self._failures += 1
+            return status
+
+    def get_snapshot(self) -> Dict:
+        """
+        返回最近一次检查结果及其时效信息；还没有任何结果时同步检查一次
+
+        Returns:
+            状态字典，附加 checked_at、age_seconds、check_duration、stale
+        """
+        self.start()
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            # 并发的首次请求在refresh锁上排队，只会执行一次检查
+            with self._refresh_lock:
+                pass
+            with self._lock:
+                snapshot = self._snapshot
+            if snapshot is None:
+                self.refresh()
+
+        with self._lock:
+            age = time.time() - self._checked_at
+            return dict(
+                self._snapshot,
+                checked_at=self._checked_at,
+                age_seconds=round(age, 3),
+                check_duration=round(self._check_duration, 3),
+                stale=age > self.stale_after
+            )
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "stale_after": self.stale_after,
+                "refreshes": self._refreshes,
+                "failures": self._failures,
+                "running": self._thread is not None and self._thread.is_alive()
+            }
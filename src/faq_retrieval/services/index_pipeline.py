@@ -0,0 +1,179 @@
+"""
+流式建库流水线
+读取（MySQL分块）-> 编码 -> 写入（向量库）三个阶段由有界队列连接并发执行，
+内存占用只与分块大小和队列长度有关，整体吞吐接近最慢阶段
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # 上游正常结束
+_STOPPED = object()  # 因失败或取消而中止
+
+_COUNT_KEYS = ("rows_read", "rows_encoded", "rows_upserted", "chunks")
+_TIME_KEYS = ("read_time", "encode_time", "upsert_time")
+
+
+class PipelineCancelled(Exception):
+    """流水线被取消"""
+
+
+class IndexingPipeline:
+    """读取/编码/写入三阶段生产者-消费者流水线"""
+
+    def __init__(self, chunks: Iterable[List[Dict]],
+                 encode_fn: Callable[[List[str]], Optional[np.ndarray]],
+                 upsert_fn: Callable[[List[Dict], np.ndarray], bool],
+                 queue_size: int = 2,
+                 on_chunk: Optional[Callable[[List[Dict]], None]] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 stats: Optional[Dict] = None):
+        """
+        Args:
+            chunks: FAQ分块迭代器（通常来自FAQRepository.iter_faq_chunks）
+            encode_fn: 编码函数，输入问题列表，返回向量矩阵，失败返回None
+            upsert_fn: 写入函数，输入FAQ分块和对应向量，返回是否成功
+            queue_size: 各阶段之间队列的最大分块数
+            on_chunk: 每个分块写入成功后的回调
+            cancel_event: 外部取消信号
+            stats: 用于记录进度的字典（例如后台任务的进度），None时新建
+        """
+        self.chunks = chunks
+        self.encode_fn = encode_fn
+        self.upsert_fn = upsert_fn
+        self.on_chunk = on_chunk
+        self.cancel_event = cancel_event or threading.Event()
+        self._read_queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._encode_queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self.stats = stats if stats is not None else {}
+        self.stats.update(dict.fromkeys(_COUNT_KEYS, 0))
+        self.stats.update(dict.fromkeys(_TIME_KEYS, 0.0))
+
+    def _fail(self, error: BaseException):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _should_stop(self) -> bool:
+        return self._stop.is_set() or self.cancel_event.is_set()
+
+    def _put(self, q: "queue.Queue", item) -> bool:
+        """向有界队列放入数据，下游失败或取消时放弃"""
+        while not self._should_stop():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: "queue.Queue"):
+        """从队列取数据，失败或取消时返回中止标记"""
+        while not self._should_stop():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOPPED
+
+    def _read_stage(self):
+        try:
+            iterator = iter(self.chunks)
+            while not self._should_stop():
+                start = time.time()
+                chunk = next(iterator, None)
+                self.stats["read_time"] += time.time() - start
+                if chunk is None:
+                    break
+                self.stats["rows_read"] += len(chunk)
+                if not self._put(self._read_queue, chunk):
+                    return
+        except Exception as e:
+            logger.error(f"Indexing pipeline read stage failed: {e}")
+            self._fail(e)
+        finally:
+            self._put(self._read_queue, _END)
+
+    def _encode_stage(self):
+        try:
+            while True:
+                chunk = self._get(self._read_queue)
+                if chunk is _END or chunk is _STOPPED:
+                    break
+                start = time.time()
+                embeddings = self.encode_fn([faq["question"] for faq in chunk])
+                self.stats["encode_time"] += time.time() - start
+                if embeddings is None or len(embeddings) != len(chunk):
+                    raise RuntimeError("Failed to generate embeddings")
+                self.stats["rows_encoded"] += len(chunk)
+                if not self._put(self._encode_queue, (chunk, embeddings)):
+                    return
+        except Exception as e:
+            logger.error(f"Indexing pipeline encode stage failed: {e}")
+            self._fail(e)
+        finally:
+            self._put(self._encode_queue, _END)
+
+    def run(self) -> Dict:
+        """
+        运行流水线，写入阶段在当前线程执行
+
+        Returns:
+            各阶段统计信息
+
+        Raises:
+            PipelineCancelled: 被外部取消
+            Exception: 任一阶段失败时抛出首个错误
+        """
+        threads = [
+            threading.Thread(target=self._read_stage, name="index-reader", daemon=True),
+            threading.Thread(target=self._encode_stage, name="index-encoder", daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+
+        completed = False
+        try:
+            while True:
+                item = self._get(self._encode_queue)
+                if item is _STOPPED:
+                    break
+                if item is _END:
+                    completed = True
+                    break
+                chunk, embeddings = item
+                start = time.time()
+                if not self.upsert_fn(chunk, embeddings):
+                    raise RuntimeError("Failed to upsert data to vector store")
+                self.stats["upsert_time"] += time.time() - start
+                self.stats["rows_upserted"] += len(chunk)
+                self.stats["chunks"] += 1
+                if self.on_chunk is not None:
+                    self.on_chunk(chunk)
+                logger.info(f"Indexed chunk {self.stats['chunks']}, "
+                            f"{self.stats['rows_upserted']} rows upserted so far")
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+        if not completed:
+            raise PipelineCancelled("Indexing pipeline cancelled")
+
+        summary = {key: self.stats[key] for key in _COUNT_KEYS}
+        summary.update({key: round(self.stats[key], 2) for key in _TIME_KEYS})
+        return summary
@@ -0,0 +1,257 @@
+"""
+后台任务管理 - 在后台线程中执行全量初始化并跟踪进度
+多进程部署时任务状态同步写入共享目录，任一工作进程都能查询和取消任务
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from .process_stats import process_alive
+
+logger = logging.getLogger(__name__)
+
+
+class JobConflictError(Exception):
+    """已有初始化任务在运行"""
+
+
+class StoredJob:
+    """其他进程中运行的任务（从共享目录读取的状态快照）"""
+
+    def __init__(self, data: Dict):
+        self.data = dict(data)
+        self.job_id = data["job_id"]
+        self.status = data.get("status")
+        pid = data.get("worker_pid")
+        if self.status in (InitializationJob.PENDING, InitializationJob.RUNNING) and pid and not process_alive(pid):
+            # 执行任务的工作进程已退出，任务不会再有进展
+            self.status = self.data["status"] = InitializationJob.FAILED
+            self.data["result"] = {"success": False, "message": f"Worker process {pid} exited before the job finished"}
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (InitializationJob.PENDING, InitializationJob.RUNNING)
+
+    def to_dict(self) -> Dict:
+        return self.data
+
+
+class InitializationJob:
+    """初始化任务"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, recreate_collection: bool, incremental: bool):
+        self.job_id = uuid.uuid4().hex
+        self.status = self.PENDING
+        self.params = {
+            "recreate_collection": recreate_collection,
+            "incremental": incremental
+        }
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        # 由初始化流水线实时更新
+        self.progress: Dict = {
+            "rows_total": None,
+            "rows_read": 0,
+            "rows_encoded": 0,
+            "rows_upserted": 0
+        }
+        self.result: Optional[Dict] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (self.PENDING, self.RUNNING)
+
+    def to_dict(self) -> Dict:
+        """任务状态（含吞吐量与预计剩余时间）"""
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        upserted = self.progress.get("rows_upserted", 0)
+        total = self.progress.get("rows_total")
+
+        throughput = upserted / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.status == self.RUNNING and total and throughput > 0:
+            eta = round(max(total - upserted, 0) / throughput, 1)
+
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(elapsed, 2),
+            "progress": {
+                "rows_total": total,
+                "rows_read": self.progress.get("rows_read", 0),
+                "rows_encoded": self.progress.get("rows_encoded", 0),
+                "rows_upserted": upserted,
+                "throughput_rows_per_sec": round(throughput, 2),
+                "eta_seconds": eta
+            },
+            "cancel_requested": self.cancel_event.is_set(),
+            "result": self.result
+        }
+
+
+class JobManager:
+    """初始化任务管理器，同一时间只允许一个初始化任务运行"""
+
+    def __init__(self, faq_service, history_size: int = 20, store=None,
+                 sync_interval: float = 1.0):
+        """
+        Args:
+            store: 多进程部署时的共享任务状态目录（shared_state.JobStore），None表示只在本进程内跟踪
+            sync_interval: 向共享目录写入进度、检查跨进程取消请求的间隔（秒）
+        """
+        self.faq_service = faq_service
+        self.history_size = history_size
+        self.store = store
+        self.sync_interval = max(0.05, sync_interval)
+        self._jobs: "OrderedDict[str, InitializationJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_initialization(self, recreate_collection: bool = True, incremental: bool = False) -> InitializationJob:
+        """
+        启动后台初始化任务
+
+        Raises:
+            JobConflictError: 已有初始化任务在运行
+        """
+        with self._lock:
+            active = self.get_active_job()
+            if active is not None:
+                raise JobConflictError(f"Initialization job {active.job_id} is already running")
+            # 提交时即获取初始化锁（多进程部署时包括跨进程锁），由任务线程在结束时释放
+            if not self.faq_service.try_begin_initialization():
+                raise JobConflictError("An initialization is already running")
+
+            job = InitializationJob(recreate_collection, incremental)
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.history_size:
+                oldest_id = next(iter(self._jobs))
+                if self._jobs[oldest_id].is_active:
+                    break
+                self._jobs.pop(oldest_id)
+
+        if self.store is not None:
+            self.store.save(job.to_dict())
+            self.store.prune()
+        thread = threading.Thread(target=self._run, args=(job,), name=f"init-job-{job.job_id[:8]}", daemon=True)
+        thread.start()
+        logger.info(f"Started initialization job {job.job_id}")
+        return job
+
+    def _sync_to_store(self, job: InitializationJob, finished: threading.Event):
+        """定期把进度写入共享目录，并把其他进程发出的取消请求转给任务"""
+        while not finished.wait(self.sync_interval):
+            try:
+                if self.store.cancel_requested(job.job_id) and not job.cancel_event.is_set():
+                    job.cancel_event.set()
+                    logger.info(f"Cancellation requested for initialization job {job.job_id} by another process")
+                self.store.save(job.to_dict())
+            except Exception as e:
+                logger.warning(f"Failed to sync job {job.job_id} state: {e}")
+
+    def _run(self, job: InitializationJob):
+        job.status = InitializationJob.RUNNING
+        job.started_at = time.time()
+        finished = threading.Event()
+        sync_thread = None
+        if self.store is not None:
+            sync_thread = threading.Thread(target=self._sync_to_store, args=(job, finished),
+                                           name=f"init-job-sync-{job.job_id[:8]}", daemon=True)
+            sync_thread.start()
+        try:
+            try:
+                job.progress["rows_total"] = self.faq_service.faq_repo.get_faq_count()
+            except Exception as e:
+                logger.warning(f"Failed to count FAQs for job progress: {e}")
+
+            result = self.faq_service.initialize_full_data(
+                recreate_collection=job.params["recreate_collection"],
+                incremental=job.params["incremental"],
+                cancel_event=job.cancel_event,
+                progress=job.progress,
+                lock_held=True
+            )
+            job.result = result
+            if job.cancel_event.is_set() and not result.get("success"):
+                job.status = InitializationJob.CANCELLED
+            elif result.get("success"):
+                job.status = InitializationJob.SUCCEEDED
+            else:
+                job.status = InitializationJob.FAILED
+
+        except Exception as e:
+            logger.error(f"Initialization job {job.job_id} failed: {e}")
+            job.result = {"success": False, "message": str(e)}
+            job.status = InitializationJob.FAILED
+
+        finally:
+            job.finished_at = time.time()
+            finished.set()
+            if sync_thread is not None:
+                # 等同步线程退出，避免它写入的旧进度覆盖最终状态
+                sync_thread.join()
+                try:
+                    self.store.save(job.to_dict())
+                except Exception as e:
+                    logger.warning(f"Failed to save job {job.job_id} state: {e}")
+            logger.info(f"Initialization job {job.job_id} finished with status {job.status}")
+
+    def _load_stored(self, job_id: str) -> Optional[StoredJob]:
+        if self.store is None:
+            return None
+        try:
+            data = self.store.load(job_id)
+        except ValueError:
+            return None
+        return StoredJob(data) if data is not None else None
+
+    def get_job(self, job_id: str):
+        """本进程的任务，或（多进程部署时）其他进程的任务状态快照"""
+        return self._jobs.get(job_id) or self._load_stored(job_id)
+
+    def get_active_job(self) -> Optional[InitializationJob]:
+        for job in list(self._jobs.values()):
+            if job.is_active:
+                return job
+        return None
+
+    def list_jobs(self) -> List:
+        local = list(reversed(list(self._jobs.values())))
+        if self.store is None:
+            return local
+        jobs = {job.job_id: job for job in local}
+        for data in self.store.list():
+            jobs.setdefault(data["job_id"], StoredJob(data))
+        ordered = sorted(jobs.values(), key=lambda job: job.to_dict().get("created_at") or 0, reverse=True)
+        return ordered[:self.history_size]
+
+    def cancel(self, job_id: str):
+        """请求取消任务，流水线在处理完当前分块后停止（其他进程的任务通过共享目录转达）"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            if job.is_active:
+                job.cancel_event.set()
+                logger.info(f"Cancellation requested for initialization job {job_id}")
+            return job
+
+        stored = self._load_stored(job_id)
+        if stored is not None and stored.is_active:
+            self.store.request_cancel(job_id)
+            stored.data["cancel_requested"] = True
+            logger.info(f"Cancellation of initialization job {job_id} forwarded to worker {stored.data.get('worker_pid')}")
+        return stored
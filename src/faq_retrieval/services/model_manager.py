@@ -1,19 +1,28 @@
 """
 模型管理器 - 单例模式管理sentence transformer模型
 避免重复加载模型，提高性能
+torch和sentence_transformers在加载模型时才导入，导入本模块不会拖慢服务启动
 """
 import logging
 import os
-import torch
-from sentence_transformers import SentenceTransformer
+import time
 from typing import Optional, List
 import numpy as np
 import threading
 from pathlib import Path
+from .. import profiler, timing
 from ..config import config
+from ..metrics import BATCH_QUEUE_DEPTH, MODEL_BATCH_SIZE, MODEL_LOADED, observe_stage
+from ..startup import record_phase
+from .batch_scheduler import MicroBatchScheduler
+from .encoder_pool import EncoderWorkerPool
+from .cache import LRUCache
+from .text_utils import normalize_text
 
 logger = logging.getLogger(__name__)
 
+ENCODER_BACKENDS = ("torch", "torch-int8", "onnx")
+
 class ModelManager:
     """
     模型管理器 - 单例模式
@@ -32,13 +41,72 @@ class ModelManager:
     
     def __init__(self):
         if not self._initialized:
-            self.model: Optional[SentenceTransformer] = None
+            self.model = None  # SentenceTransformer、OnnxEncoder或EncoderWorkerPool
             self.device = None
+            self.encoder_backend: Optional[str] = None
             self.model_name = config.MODEL_NAME
-            self.local_model_path = config.get_local_model_path()
+            self._local_model_path: Optional[str] = None
             self._model_lock = threading.Lock()
+            self._load_thread: Optional[threading.Thread] = None
+            self.load_state = "not_loaded"  # not_loaded / loading / loaded / failed
+            self.cache_namespace: Optional[tuple] = None  # 查询向量缓存键前缀，加载模型时确定
+            self.load_seconds: Optional[float] = None
+            self.embedding_cache = self._create_embedding_cache()
+            self.batch_scheduler = self._create_batch_scheduler()
+            MODEL_LOADED.set_function(lambda: 1 if self.is_model_loaded() else 0)
+            BATCH_QUEUE_DEPTH.set_function(
+                lambda: self.batch_scheduler.queue_depth() if self.batch_scheduler is not None else 0
+            )
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._reset_after_fork)
             self._initialized = True
     
+    @property
+    def local_model_path(self) -> str:
+        """本地模型路径，首次使用时才扫描HuggingFace缓存目录"""
+        if self._local_model_path is None:
+            self._local_model_path = config.get_local_model_path()
+        return self._local_model_path
+    
+    @local_model_path.setter
+    def local_model_path(self, path: str):
+        self._local_model_path = path
+    
+    @staticmethod
+    def _create_embedding_cache() -> Optional[LRUCache]:
+        if not config.EMBEDDING_CACHE_ENABLED:
+            return None
+        return LRUCache(
+            max_size=config.EMBEDDING_CACHE_MAX_SIZE,
+            ttl=config.EMBEDDING_CACHE_TTL
+        )
+    
+    def _create_batch_scheduler(self) -> Optional[MicroBatchScheduler]:
+        if not config.EMBEDDING_BATCH_ENABLED:
+            return None
+        return MicroBatchScheduler(
+            encode_fn=self._encode_batch,
+            max_batch_size=config.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=config.EMBEDDING_BATCH_MAX_WAIT_MS,
+            max_queue_size=config.EMBEDDING_BATCH_QUEUE_SIZE,
+            concurrency=max(1, config.ENCODER_WORKERS)
+        )
+    
+    def _reset_after_fork(self):
+        """
+        fork出的子进程中执行：父进程的线程不会被复制，其持有的锁可能永远不会释放，
+        因此重建锁、查询向量缓存和微批调度器；已加载的模型权重以写时复制方式共享
+        """
+        self._model_lock = threading.Lock()
+        self._load_thread = None
+        self.embedding_cache = self._create_embedding_cache()
+        self.batch_scheduler = self._create_batch_scheduler()
+        if isinstance(self.model, EncoderWorkerPool):
+            # 进程池的管道属于父进程，子进程按需启动自己的进程池
+            self.model = None
+        if self.model is None:
+            self.load_state = "not_loaded"
+    
     def load_model(self) -> bool:
         """加载模型 - 强制使用本地模型，不连接在线服务"""
         if self.model is not None:
@@ -49,104 +117,297 @@ class ModelManager:
             if self.model is not None:  # 双重检查
                 return True
             
+            self.load_state = "loading"
+            start = time.perf_counter()
+            backend = config.ENCODER_BACKEND
             try:
-                # 检测设备
-                self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-                logger.info(f"Loading model on device: {self.device}")
-                
-                # 强制使用本地模型路径
-                local_model = self.local_model_path
-                logger.info(f"Attempting to load model from local path: {local_model}")
-                
-                # 检查本地模型是否存在
-                from pathlib import Path
-                if not Path(local_model).exists() and local_model != self.model_name:
-                    logger.error(f"Local model path does not exist: {local_model}")
-                    logger.error("Please download the model first or check cache directory")
-                    return False
+                device = self._device_for(backend)
+                if config.ENCODER_WORKERS > 0:
+                    model = self._start_worker_pool(backend)
+                else:
+                    logger.info(f"Loading model with encoder backend '{backend}' on device: {device}")
+                    model = self.create_encoder(backend, device)
+            except Exception as e:
+                logger.error(f"❌ Failed to load model: {e}")
+                model = None
+            if model is None:
+                self.load_state = "failed"
+                return False
+            
+            self.device = device
+            self.encoder_backend = backend
+            self.cache_namespace = self._embedding_cache_namespace(backend)
+            self.model = model
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            self.load_state = "loaded"
+            record_phase("model_load", self.load_seconds)
+            return True
+    
+    def _embedding_cache_namespace(self, backend: str) -> tuple:
+        """
+        查询向量缓存键前缀：模型文件、编码后端和量化方式不同时生成的向量不能混用，
+        切换后端重新加载模型后旧的缓存条目不会再被命中
+        """
+        if backend == "onnx":
+            return (self.model_name, backend, str(config.ONNX_MODEL_DIR), bool(config.ONNX_QUANTIZED))
+        return (self.model_name, backend, str(self.local_model_path))
+    
+    def start_background_load(self) -> bool:
+        """
+        在后台线程中加载模型并立即返回，加载完成前服务已可接受请求（就绪探针不通过）
+        
+        Returns:
+            是否启动了新的加载线程（已加载或正在加载时返回False）
+        """
+        if self.model is not None:
+            return False
+        with self._lock:
+            if self._load_thread is not None and self._load_thread.is_alive():
+                return False
+            self.load_state = "loading"
+            self._load_thread = threading.Thread(target=self._load_in_background, name="model-loader", daemon=True)
+            self._load_thread.start()
+        return True
+    
+    def _load_in_background(self):
+        if not self.load_model():
+            logger.warning("Failed to load model in background, it will be retried on first request")
+    
+    @staticmethod
+    def _start_worker_pool(backend: str):
+        """启动编码进程池，各工作进程各自加载模型，失败返回None"""
+        logger.info(f"Starting {config.ENCODER_WORKERS} encoder worker processes with backend '{backend}'")
+        pool = EncoderWorkerPool(
+            backend,
+            num_workers=config.ENCODER_WORKERS,
+            num_threads=config.ENCODER_WORKER_TORCH_THREADS,
+            request_timeout=config.ENCODER_WORKER_TIMEOUT,
+            start_timeout=config.ENCODER_WORKER_START_TIMEOUT
+        )
+        return pool if pool.start() else None
+    
+    @staticmethod
+    def _device_for(backend: str) -> str:
+        """ONNX和int8量化后端只支持CPU"""
+        if backend in ("onnx", "torch-int8"):
+            return 'cpu'
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    
+    def create_encoder(self, backend: str, device: Optional[str] = None):
+        """
+        按后端创建编码器，不替换当前模型（也用于比较不同后端的一致性）
+        
+        Args:
+            backend: "torch" / "torch-int8" / "onnx"
+            device: 运行设备，None时按后端自动选择
+            
+        Returns:
+            具有encode接口的编码器，失败返回None
+        """
+        if backend not in ENCODER_BACKENDS:
+            logger.error(f"Unknown encoder backend '{backend}', expected one of {ENCODER_BACKENDS}")
+            return None
+        
+        device = device or self._device_for(backend)
+        try:
+            if backend == "onnx":
+                from .onnx_encoder import OnnxEncoder
+                return OnnxEncoder(
+                    config.ONNX_MODEL_DIR,
+                    num_threads=config.ENCODER_NUM_THREADS,
+                    quantized=config.ONNX_QUANTIZED
+                )
+            
+            import torch
+            if config.ENCODER_NUM_THREADS > 0:
+                torch.set_num_threads(config.ENCODER_NUM_THREADS)
+            
+            model = self._load_sentence_transformer(device)
+            if model is not None and backend == "torch-int8":
+                # 对全连接层做动态int8量化，激活值在推理时动态量化
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                logger.info("Applied dynamic int8 quantization to model")
+            if model is not None and hasattr(model, "tokenize"):
+                # encode内部逐批调用tokenize，包装后分阶段计时可区分分词与前向计算
+                model.tokenize = timing.timed_method("tokenize", model.tokenize)
+            return model
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to create encoder '{backend}': {e}")
+            return None
+    
+    def _load_sentence_transformer(self, device: str):
+        """加载本地SentenceTransformer模型，失败返回None"""
+        try:
+            from sentence_transformers import SentenceTransformer
+            
+            # 强制使用本地模型路径
+            local_model = self.local_model_path
+            logger.info(f"Attempting to load model from local path: {local_model}")
+            
+            # 检查本地模型是否存在
+            if not Path(local_model).exists() and local_model != self.model_name:
+                logger.error(f"Local model path does not exist: {local_model}")
+                logger.error("Please download the model first or check cache directory")
+                return None
+            
+            # 设置离线模式环境变量（确保不会连接在线）
+            os.environ['HF_HUB_OFFLINE'] = '1'
+            os.environ['TRANSFORMERS_OFFLINE'] = '1'
+            os.environ['HF_DATASETS_OFFLINE'] = '1'
+            
+            try:
+                # 尝试加载本地模型
+                logger.info(f"Loading model from local cache: {local_model}")
+                model = SentenceTransformer(local_model, device=device)
+                logger.info("✅ Model loaded successfully from local cache")
+                return model
                 
-                # 设置离线模式环境变量（确保不会连接在线）
-                import os
-                os.environ['HF_HUB_OFFLINE'] = '1'
-                os.environ['TRANSFORMERS_OFFLINE'] = '1'
-                os.environ['HF_DATASETS_OFFLINE'] = '1'
+            except Exception as local_error:
+                logger.error(f"Failed to load from local path: {local_error}")
                 
-                try:
-                    # 尝试加载本地模型
-                    logger.info(f"Loading model from local cache: {local_model}")
-                    self.model = SentenceTransformer(local_model, device=self.device)
-                    logger.info("✅ Model loaded successfully from local cache")
-                    return True
+                # 如果本地路径就是模型名称，尝试从缓存目录加载
+                if local_model == self.model_name:
+                    # 查找可能的缓存目录
+                    cache_paths = [
+                        Path(config.HF_CACHE_DIR) / "models--shibing624--text2vec-base-chinese",
+                        Path.home() / ".cache" / "huggingface" / "transformers" / "models--shibing624--text2vec-base-chinese",
+                        Path(".cache") / "huggingface" / "models--shibing624--text2vec-base-chinese"
+                    ]
                     
-                except Exception as local_error:
-                    logger.error(f"Failed to load from local path: {local_error}")
-                    
-                    # 如果本地路径就是模型名称，尝试从缓存目录加载
-                    if local_model == self.model_name:
-                        # 查找可能的缓存目录
-                        cache_paths = [
-                            Path(config.HF_CACHE_DIR) / "models--shibing624--text2vec-base-chinese",
-                            Path.home() / ".cache" / "huggingface" / "transformers" / "models--shibing624--text2vec-base-chinese",
-                            Path(".cache") / "huggingface" / "models--shibing624--text2vec-base-chinese"
-                        ]
-                        
-                        for cache_path in cache_paths:
-                            if cache_path.exists():
-                                snapshots_dir = cache_path / "snapshots"
-                                if snapshots_dir.exists():
-                                    snapshot_dirs = list(snapshots_dir.iterdir())
-                                    if snapshot_dirs:
-                                        snapshot_path = snapshot_dirs[0]
-                                        try:
-                                            logger.info(f"Trying cache directory: {snapshot_path}")
-                                            self.model = SentenceTransformer(str(snapshot_path), device=self.device)
-                                            logger.info("✅ Model loaded successfully from cache directory")
-                                            return True
-                                        except Exception as cache_error:
-                                            logger.warning(f"Failed to load from cache {snapshot_path}: {cache_error}")
-                                            continue
-                    
-                    # 如果所有本地加载都失败，报错而不是尝试在线下载
-                    logger.error("❌ All local model loading attempts failed")
-                    logger.error("Please ensure the model is properly cached or download it manually")
-                    logger.error("Model loading failed - refusing to connect to online services")
-                    return False
+                    for cache_path in cache_paths:
+                        if cache_path.exists():
+                            snapshots_dir = cache_path / "snapshots"
+                            if snapshots_dir.exists():
+                                snapshot_dirs = list(snapshots_dir.iterdir())
+                                if snapshot_dirs:
+                                    snapshot_path = snapshot_dirs[0]
+                                    try:
+                                        logger.info(f"Trying cache directory: {snapshot_path}")
+                                        model = SentenceTransformer(str(snapshot_path), device=device)
+                                        logger.info("✅ Model loaded successfully from cache directory")
+                                        return model
+                                    except Exception as cache_error:
+                                        logger.warning(f"Failed to load from cache {snapshot_path}: {cache_error}")
+                                        continue
                 
-            except Exception as e:
-                logger.error(f"❌ Failed to load model: {e}")
-                self.model = None
-                return False
+                # 如果所有本地加载都失败，报错而不是尝试在线下载
+                logger.error("❌ All local model loading attempts failed")
+                logger.error("Please ensure the model is properly cached or download it manually")
+                logger.error("Model loading failed - refusing to connect to online services")
+                return None
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to load model: {e}")
+            return None
     
-    def get_model(self) -> Optional[SentenceTransformer]:
+    def get_model(self):
         """获取模型实例"""
         if self.model is None:
             if not self.load_model():
                 return None
         return self.model
     
+    def get_embedding_dimension(self) -> Optional[int]:
+        """获取模型输出向量维度"""
+        model = self.get_model()
+        if model is None:
+            return None
+        return model.get_sentence_embedding_dimension()
+    
     def is_model_loaded(self) -> bool:
         """检查模型是否已加载"""
         return self.model is not None
     
-    def generate_embeddings(self, texts: List[str], batch_size: int = 32) -> Optional[np.ndarray]:
-        """生成文本向量"""
+    def generate_embeddings(self, texts: List[str], batch_size: int = 32,
+                            use_cache: bool = True) -> Optional[np.ndarray]:
+        """
+        生成文本向量
+        
+        Args:
+            texts: 待编码文本列表
+            batch_size: 编码批大小
+            use_cache: 是否使用查询向量缓存（全量建库时应关闭，避免冲掉查询缓存）
+        """
         if not texts:
             logger.warning("No texts provided for embedding generation")
             return None
         
+        cache = self.embedding_cache if use_cache else None
+        if cache is None:
+            return self._encode(texts, batch_size)
+        
+        # 缓存键包含当前模型的后端与量化方式，需先确定已加载的模型
+        if not self.is_model_loaded() and not self.load_model():
+            logger.error("Model not available for embedding generation")
+            return None
+        
+        # 先查缓存，只对未命中的文本进行编码
+        keys = [(self.cache_namespace, normalize_text(text)) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [cache.get(key) for key in keys]
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], []).append(i)
+        
+        if missing:
+            miss_texts = [key[1] for key in missing]
+            embeddings = self._encode(miss_texts, batch_size)
+            if embeddings is None:
+                return None
+            
+            for key, embedding in zip(missing, embeddings):
+                embedding.setflags(write=False)
+                cache.put(key, embedding)
+                for i in missing[key]:
+                    vectors[i] = embedding
+        
+        return np.stack(vectors)
+    
+    def _encode(self, texts: List[str], batch_size: int = 32) -> Optional[np.ndarray]:
+        """编码文本：少量文本交给微批调度器与其他请求合批，大批量直接编码"""
+        scheduler = self.batch_scheduler
+        if scheduler is None or len(texts) >= scheduler.max_batch_size:
+            return self._encode_batch(texts, batch_size)
+        
+        if not self.is_model_loaded() and not self.load_model():
+            logger.error("Model not available for embedding generation")
+            return None
+        
+        try:
+            return scheduler.encode(texts, timeout=config.EMBEDDING_BATCH_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Error generating embeddings via batch scheduler: {e}")
+            return None
+    
+    def _encode_batch(self, texts: List[str], batch_size: Optional[int] = None) -> Optional[np.ndarray]:
+        """调用模型编码一批文本"""
         model = self.get_model()
         if model is None:
             logger.error("Model not available for embedding generation")
             return None
         
+        batch_size = batch_size or len(texts)
+        MODEL_BATCH_SIZE.observe(len(texts))
         try:
             logger.info(f"Generating embeddings for {len(texts)} texts")
-            embeddings = model.encode(
-                texts, 
-                show_progress_bar=True, 
-                batch_size=batch_size,
-                convert_to_numpy=True
-            )
+            request_timing = timing.current()
+            tokenize_before = request_timing.get("tokenize") if request_timing is not None else 0.0
+            start = time.perf_counter()
+            with profiler.torch_trace_scope():
+                embeddings = model.encode(
+                    texts, 
+                    show_progress_bar=len(texts) > batch_size, 
+                    batch_size=batch_size,
+                    convert_to_numpy=True
+                )
+            encode_seconds = time.perf_counter() - start
+            observe_stage("model_encode", encode_seconds)
+            if request_timing is not None:
+                # 编码进程池的分词在子进程中执行，此时forward包含分词耗时
+                tokenize_seconds = request_timing.get("tokenize") - tokenize_before
+                request_timing.add("forward", encode_seconds - tokenize_seconds)
             logger.info(f"Generated embeddings with shape: {embeddings.shape}")
             return embeddings
             
@@ -154,14 +415,38 @@ class ModelManager:
             logger.error(f"Error generating embeddings: {e}")
             return None
     
+    def get_cache_stats(self) -> Optional[dict]:
+        """获取查询向量缓存统计"""
+        if self.embedding_cache is None:
+            return None
+        return self.embedding_cache.get_stats()
+    
+    def get_batch_stats(self) -> Optional[dict]:
+        """获取微批调度统计"""
+        if self.batch_scheduler is None:
+            return None
+        return self.batch_scheduler.get_stats()
+    
+    def get_worker_stats(self) -> Optional[dict]:
+        """获取编码进程池统计"""
+        if not isinstance(self.model, EncoderWorkerPool):
+            return None
+        return self.model.get_stats()
+    
     def get_model_info(self) -> dict:
         """获取模型信息"""
         return {
             "model_name": self.model_name,
             "local_model_path": self.local_model_path,
             "device": self.device,
+            "encoder_backend": self.encoder_backend or config.ENCODER_BACKEND,
             "is_loaded": self.is_model_loaded(),
-            "model_type": type(self.model).__name__ if self.model else None
+            "load_state": self.load_state,
+            "load_seconds": self.load_seconds,
+            "model_type": type(self.model).__name__ if self.model else None,
+            "embedding_cache": self.get_cache_stats(),
+            "batch_scheduler": self.get_batch_stats(),
+            "encoder_workers": self.get_worker_stats()
         }
 
 # 全局模型管理器实例
@@ -0,0 +1,377 @@
+"""
+进程内NumPy向量检索服务
+对L2归一化的float32向量矩阵做精确点积检索，接口与QdrantService保持一致
+适用于数万条规模的FAQ语料，省去访问Qdrant的网络开销
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from typing import List, Dict, Optional, Iterator, Tuple
+
+import numpy as np
+from ..config import config
+from ..metrics import UPSERTED_POINTS, observe_stage
+from .text_utils import compute_content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """按行L2归一化，返回连续的float32矩阵"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorService:
+    """NumPy暴力检索向量服务"""
+
+    def __init__(self):
+        self.collection_name = config.COLLECTION_NAME
+        self.vector_size: Optional[int] = None
+        self._vectors = np.empty((0, 0), dtype=np.float32)  # 预分配容量，前_size行有效
+        self._size = 0
+        self._faq_ids: List[str] = []
+        self._payloads: List[Dict] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._shadows: Dict[str, "NumpyVectorService"] = {}  # 重建中的影子集合
+        self._previous: List[Tuple[str, tuple]] = []  # 保留用于回滚的旧集合 (名称, 状态)
+        self._active_name = self.collection_name
+
+    def connect(self) -> bool:
+        """进程内存储无需连接"""
+        return True
+
+    def ping(self) -> bool:
+        """进程内存储始终可用"""
+        return True
+
+    def _reset(self, vector_size: int):
+        self.vector_size = vector_size
+        self._vectors = np.empty((config.NUMPY_INITIAL_CAPACITY, vector_size), dtype=np.float32)
+        self._size = 0
+        self._faq_ids = []
+        self._payloads = []
+        self._row_by_id = {}
+
+    def ensure_collection_exists(self, vector_size: int) -> bool:
+        """确保集合存在"""
+        with self._lock:
+            if self.vector_size is None:
+                logger.info(f"Creating in-memory collection '{self.collection_name}' with vector size {vector_size}")
+                self._reset(vector_size)
+            elif self.vector_size != vector_size:
+                logger.error(f"Vector size mismatch: collection has {self.vector_size}, got {vector_size}")
+                return False
+        return True
+
+    def recreate_collection(self, vector_size: int) -> bool:
+        """重新创建集合：新建空集合并切换（旧集合按保留策略回收）"""
+        shadow = self.begin_reindex(vector_size)
+        return shadow is not None and self.commit_reindex(shadow)
+
+    def _get_state(self) -> tuple:
+        return self.vector_size, self._vectors, self._size, self._faq_ids, self._payloads, self._row_by_id
+
+    def _set_state(self, state: tuple):
+        self.vector_size, self._vectors, self._size, self._faq_ids, self._payloads, self._row_by_id = state
+
+    def begin_reindex(self, vector_size: int) -> Optional[str]:
+        """创建用于重建索引的影子集合，重建期间检索仍使用当前集合"""
+        shadow = NumpyVectorService()
+        shadow.collection_name = f"{self.collection_name}__{int(time.time() * 1000)}"
+        shadow._reset(vector_size)
+        with self._lock:
+            self._shadows[shadow.collection_name] = shadow
+        logger.info(f"Created in-memory shadow collection '{shadow.collection_name}'")
+        return shadow.collection_name
+
+    def commit_reindex(self, shadow: str) -> bool:
+        """切换到影子集合，保留最近QDRANT_KEEP_OLD_COLLECTIONS个旧集合用于回滚"""
+        with self._lock:
+            shadow_service = self._shadows.pop(shadow, None)
+            if shadow_service is None:
+                logger.error(f"Unknown shadow collection '{shadow}'")
+                return False
+            self._previous.append((self._active_name, self._get_state()))
+            keep = max(config.QDRANT_KEEP_OLD_COLLECTIONS, 0)
+            self._previous = self._previous[-keep:] if keep else []
+            with shadow_service._lock:
+                self._set_state(shadow_service._get_state())
+            self._active_name = shadow
+        logger.info(f"Switched in-memory collection to '{shadow}'")
+        return True
+
+    def abort_reindex(self, shadow: str) -> bool:
+        """放弃重建，丢弃影子集合"""
+        with self._lock:
+            self._shadows.pop(shadow, None)
+        logger.info(f"Discarded in-memory shadow collection '{shadow}'")
+        return True
+
+    def rollback_collection(self) -> Optional[str]:
+        """切回上一个保留的集合，返回其名称，没有可回滚的集合时返回None"""
+        with self._lock:
+            if not self._previous:
+                logger.warning("No previous collection available for rollback")
+                return None
+            name, state = self._previous.pop()
+            self._set_state(state)
+            self._active_name = name
+        logger.info(f"Rolled back in-memory collection to '{name}'")
+        return name
+
+    def get_alias_target(self) -> Optional[str]:
+        """当前使用的集合名"""
+        return self._active_name
+
+    def _reserve(self, capacity: int):
+        """扩容向量矩阵（按倍数增长，摊还追加成本）"""
+        if capacity <= self._vectors.shape[0]:
+            return
+        new_capacity = max(capacity, self._vectors.shape[0] * 2)
+        vectors = np.empty((new_capacity, self.vector_size), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+
+    def point_id_for(self, faq_id: str):
+        """进程内存储直接以FAQ ID作为点ID"""
+        return faq_id
+
+    def upsert_points(self, faqs: List[Dict], embeddings: np.ndarray, collection_name: Optional[str] = None) -> bool:
+        """批量插入或更新向量点（collection_name为影子集合名时写入影子集合）"""
+        if collection_name is not None and collection_name != self.collection_name:
+            with self._lock:
+                shadow = self._shadows.get(collection_name)
+            if shadow is None:
+                logger.error(f"Unknown shadow collection '{collection_name}'")
+                return False
+            return shadow.upsert_points(faqs, embeddings)
+        if len(faqs) != len(embeddings):
+            logger.error("FAQs and embeddings length mismatch")
+            return False
+        if len(faqs) == 0:
+            return True
+
+        try:
+            start = time.time()
+            vectors = _l2_normalize(embeddings)
+            with self._lock:
+                if self.vector_size is None:
+                    self._reset(vectors.shape[1])
+                elif vectors.shape[1] != self.vector_size:
+                    logger.error(f"Vector size mismatch: collection has {self.vector_size}, got {vectors.shape[1]}")
+                    return False
+
+                self._reserve(self._size + len(faqs))
+                for faq, vector in zip(faqs, vectors):
+                    payload = {
+                        "faq_id": faq["id"],
+                        "question": faq["question"],
+                        "answer": faq["answer"],
+                        "content_hash": compute_content_hash(faq["question"], faq["answer"])
+                    }
+                    row = self._row_by_id.get(faq["id"])
+                    if row is None:
+                        row = self._size
+                        self._size += 1
+                        self._faq_ids.append(faq["id"])
+                        self._payloads.append(payload)
+                        self._row_by_id[faq["id"]] = row
+                    else:
+                        self._payloads[row] = payload
+                    self._vectors[row] = vector
+
+            UPSERTED_POINTS.inc(len(faqs))
+            observe_stage("vector_upsert", time.time() - start)
+            logger.info(f"Successfully upserted {len(faqs)} points into in-memory collection")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error upserting points: {e}")
+            return False
+
+    def upsert_single_point(self, faq: Dict, embedding: np.ndarray) -> bool:
+        """插入或更新单个向量点"""
+        return self.upsert_points([faq], np.asarray(embedding).reshape(1, -1))
+
+    def delete_points(self, point_ids: list) -> bool:
+        """按点ID（即FAQ ID）批量删除，删除的行由末尾行填补以保持矩阵连续"""
+        with self._lock:
+            rows = [self._row_by_id[faq_id] for faq_id in set(point_ids) if faq_id in self._row_by_id]
+            if not rows:
+                return True
+
+            # 在副本上修改后整体替换，避免影响正在进行的检索
+            vectors = self._vectors.copy()
+            faq_ids = list(self._faq_ids)
+            payloads = list(self._payloads)
+            size = self._size
+            for row in sorted(rows, reverse=True):
+                last = size - 1
+                if row != last:
+                    vectors[row] = vectors[last]
+                    faq_ids[row] = faq_ids[last]
+                    payloads[row] = payloads[last]
+                faq_ids.pop()
+                payloads.pop()
+                size -= 1
+
+            self._vectors = vectors
+            self._faq_ids = faq_ids
+            self._payloads = payloads
+            self._size = size
+            self._row_by_id = {faq_id: row for row, faq_id in enumerate(faq_ids)}
+
+        logger.info(f"Deleted {len(rows)} points from in-memory collection")
+        return True
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, payloads: List[Dict], limit: int, score_threshold: float) -> List[Dict]:
+        """从相似度向量中取出前limit个不低于阈值的结果"""
+        if limit <= 0:
+            return []
+
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for row in top:
+            score = float(scores[row])
+            if score < score_threshold:
+                break
+            payload = payloads[row]
+            results.append({
+                "faq_id": payload.get("faq_id"),
+                "question": payload.get("question"),
+                "answer": payload.get("answer"),
+                "score": score
+            })
+        return results
+
+    def search_similar(self, query_vector: np.ndarray, limit: int = 5, score_threshold: float = 0.0,
+                       hnsw_ef: Optional[int] = None, exact: bool = False) -> List[Dict]:
+        """搜索相似向量（余弦相似度，精确top-k；hnsw_ef和exact仅为与QdrantService接口一致，始终精确检索）"""
+        try:
+            with self._lock:
+                vectors = self._vectors[:self._size]
+                payloads = self._payloads
+
+            if len(vectors) == 0:
+                return []
+
+            scores = vectors @ _l2_normalize(query_vector.reshape(-1))
+            return self._top_k(scores, payloads, limit, score_threshold)
+
+        except Exception as e:
+            logger.error(f"Error searching similar vectors: {e}")
+            return []
+
+    def search_batch(self, query_vectors: np.ndarray, limits: List[int], score_thresholds: List[float],
+                     hnsw_efs: Optional[List[Optional[int]]] = None,
+                     exacts: Optional[List[bool]] = None) -> Optional[List[List[Dict]]]:
+        """批量搜索相似向量，一次矩阵乘法计算所有查询的相似度，失败返回None"""
+        try:
+            with self._lock:
+                vectors = self._vectors[:self._size]
+                payloads = self._payloads
+
+            if len(vectors) == 0:
+                return [[] for _ in limits]
+
+            queries = _l2_normalize(np.asarray(query_vectors, dtype=np.float32).reshape(len(limits), -1))
+            scores = vectors @ queries.T
+            return [
+                self._top_k(scores[:, i], payloads, limit, score_threshold)
+                for i, (limit, score_threshold) in enumerate(zip(limits, score_thresholds))
+            ]
+
+        except Exception as e:
+            logger.error(f"Error in batch vector search: {e}")
+            return None
+
+    async def async_search_similar(self, *args, **kwargs) -> List[Dict]:
+        """异步入口使用：矩阵运算放到默认线程池执行（numpy运算期间释放GIL），不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search_similar, *args, **kwargs))
+
+    async def async_search_batch(self, *args, **kwargs) -> Optional[List[List[Dict]]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search_batch, *args, **kwargs))
+
+    def get_all_points(self) -> List[Dict]:
+        """获取所有向量点"""
+        with self._lock:
+            payloads = self._payloads[:self._size]
+
+        return [
+            {
+                "id": payload.get("faq_id"),
+                "faq_id": payload.get("faq_id"),
+                "question": payload.get("question"),
+                "answer": payload.get("answer")
+            }
+            for payload in payloads
+        ]
+
+    def iter_points(self, batch_size: int = 256, with_vectors: bool = True) -> Iterator[Tuple[list, Optional[np.ndarray], List[Dict]]]:
+        """
+        分批遍历集合中的所有点
+
+        Yields:
+            (点ID列表, 向量矩阵或None, payload列表)
+        """
+        with self._lock:
+            size = self._size
+            vectors = self._vectors[:size].copy() if with_vectors else None
+            faq_ids = self._faq_ids[:size]
+            payloads = self._payloads[:size]
+
+        for start in range(0, size, batch_size):
+            end = start + batch_size
+            yield (
+                faq_ids[start:end],
+                vectors[start:end] if vectors is not None else None,
+                [dict(payload) for payload in payloads[start:end]]
+            )
+
+    def upsert_vectors(self, ids: list, vectors: np.ndarray, payloads: List[Dict],
+                       collection_name: Optional[str] = None) -> bool:
+        """按payload批量写入已有向量（不经过模型，用于快照恢复）"""
+        faqs = [
+            {
+                "id": payload.get("faq_id", point_id),
+                "question": payload.get("question"),
+                "answer": payload.get("answer")
+            }
+            for point_id, payload in zip(ids, payloads)
+        ]
+        return self.upsert_points(faqs, vectors, collection_name=collection_name)
+
+    def migrate_point_ids(self, batch_size: int = 256, dry_run: bool = False) -> Dict:
+        """点ID即FAQ ID，本身稳定且唯一，无需迁移"""
+        with self._lock:
+            size = self._size
+        return {"scanned": size, "faq_ids": size, "rewritten": 0, "deleted": 0, "without_faq_id": 0}
+
+    def get_collection_info(self) -> Optional[Dict]:
+        """获取集合信息"""
+        with self._lock:
+            return {
+                "name": self.collection_name,
+                "alias_target": self._active_name,
+                "vectors_count": self._size,
+                "points_count": self._size,
+                "status": "green" if self.vector_size is not None else "empty",
+                "optimizer_status": "ok",
+                "vector_size": self.vector_size,
+                "capacity": self._vectors.shape[0],
+                "memory_bytes": int(self._vectors.nbytes)
+            }
@@ -0,0 +1,198 @@
+"""
+ONNX Runtime编码器 - 将sentence-transformers模型导出为ONNX（可选int8动态量化），
+并提供与SentenceTransformer.encode一致的编码接口
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .. import timing
+
+logger = logging.getLogger(__name__)
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_int8.onnx"
+ENCODER_CONFIG_FILE = "encoder_config.json"
+
+
+def export_onnx(model, output_dir: Path, quantize: bool = True, opset: int = 14) -> Dict:
+    """
+    将SentenceTransformer模型的Transformer部分导出为ONNX，池化在OnnxEncoder中用numpy完成
+
+    Args:
+        model: 已加载的SentenceTransformer模型
+        output_dir: 输出目录（写入模型、分词器和编码配置）
+        quantize: 是否额外生成int8动态量化模型
+        opset: ONNX opset版本
+
+    Returns:
+        编码配置信息
+    """
+    import torch
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    transformer = model[0].auto_model
+    tokenizer = model.tokenizer
+
+    class _TransformerWrapper(torch.nn.Module):
+        """只输出last_hidden_state，便于导出"""
+
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            return self.auto_model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+                return_dict=False
+            )[0]
+
+    dummy = tokenizer(["如何维修电脑？"], padding=True, truncation=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = output_dir / FP32_MODEL_FILE
+    wrapper = _TransformerWrapper(transformer).eval()
+    start = time.time()
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            tuple(dummy[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    logger.info(f"Exported ONNX model to {fp32_path} in {time.time() - start:.1f}s")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = output_dir / INT8_MODEL_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        logger.info(f"Saved int8 quantized ONNX model to {int8_path}")
+
+    tokenizer.save_pretrained(str(output_dir))
+
+    module_names = [type(module).__name__ for module in model]
+    encoder_config = {
+        "pooling": model[1].get_pooling_mode_str() if len(model) > 1 else "mean",
+        "normalize": "Normalize" in module_names,
+        "max_seq_length": model.max_seq_length,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "quantized": quantize,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+    with open(output_dir / ENCODER_CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump(encoder_config, f, ensure_ascii=False, indent=2)
+    return encoder_config
+
+
+class OnnxEncoder:
+    """基于ONNX Runtime的句向量编码器，encode接口与SentenceTransformer一致"""
+
+    def __init__(self, model_dir: Path, num_threads: int = 0, quantized: bool = True):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError("ONNX encoder backend requires onnxruntime: pip install onnxruntime") from e
+
+        model_dir = Path(model_dir)
+        config_file = model_dir / ENCODER_CONFIG_FILE
+        if not config_file.exists():
+            raise FileNotFoundError(f"ONNX model not found in {model_dir}, run 'faq-admin export-onnx' first")
+        with open(config_file, "r", encoding="utf-8") as f:
+            self.encoder_config = json.load(f)
+
+        model_path = model_dir / INT8_MODEL_FILE
+        if not quantized or not model_path.exists():
+            model_path = model_dir / FP32_MODEL_FILE
+        self.model_path = model_path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.max_seq_length = self.encoder_config.get("max_seq_length") or 256
+        logger.info(f"Loaded ONNX encoder from {model_path}")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.encoder_config["dimension"]
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        pooling = self.encoder_config.get("pooling", "mean")
+        if pooling == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        if pooling == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """编码文本，按长度排序后分批以减少padding，返回顺序与输入一致"""
+        embeddings = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            indices = order[start:start + batch_size]
+            with timing.stage("tokenize"):
+                encoded = self.tokenizer(
+                    [texts[i] for i in indices],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_seq_length,
+                    return_tensors="np"
+                )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            hidden = self.session.run(None, feeds)[0]
+            embeddings[indices] = self._pool(hidden, encoded["attention_mask"])
+
+        if self.encoder_config.get("normalize"):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+        return embeddings
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict:
+    """计算候选编码器与参考模型逐条向量的余弦相似度统计"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosines = (reference * candidate).sum(axis=1) / np.clip(norms, 1e-12, None)
+    return {
+        "count": int(len(cosines)),
+        "mean": round(float(cosines.mean()), 6),
+        "min": round(float(cosines.min()), 6),
+        "p05": round(float(np.percentile(cosines, 5)), 6)
+    }
+
+
+def top_k_overlap(reference: np.ndarray, candidate: np.ndarray, k: int = 5) -> Optional[float]:
+    """两组向量各自做两两检索时top-k近邻的平均重合率，反映检索结果是否一致"""
+    if len(reference) <= k:
+        return None
+
+    def _top_k(vectors):
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        scores = vectors @ vectors.T
+        np.fill_diagonal(scores, -np.inf)
+        return np.argsort(-scores, axis=1)[:, :k]
+
+    ref_top = _top_k(np.asarray(reference, dtype=np.float32))
+    cand_top = _top_k(np.asarray(candidate, dtype=np.float32))
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]
+    return round(float(np.mean(overlap)), 4)
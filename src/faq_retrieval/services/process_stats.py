@@ -0,0 +1,58 @@
+"""
+进程内存统计 - 读取Linux /proc，用于观察预fork工作进程之间写时复制共享的效果；以及进程存活检查
+"""
+import os
+from typing import Dict, Optional
+
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private"
+}
+
+
+def read_memory_usage(pid: Optional[int] = None) -> Optional[Dict]:
+    """
+    读取进程内存占用（MB）
+
+    rss为常驻内存（共享页在每个进程中都计入），pss按共享进程数分摊共享页，
+    各工作进程pss之和才是实际占用的物理内存
+
+    Returns:
+        {"pid", "rss_mb", "pss_mb", "shared_mb", "private_mb"}，无法读取时返回None
+    """
+    pid = pid or os.getpid()
+    totals = {"rss": 0, "pss": 0, "shared": 0, "private": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in _SMAPS_FIELDS:
+                    totals[_SMAPS_FIELDS[name]] += int(value.split()[0])
+    except (OSError, ValueError):
+        # 旧内核没有smaps_rollup，只能拿到RSS
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                rss = next((line.split()[1] for line in f if line.startswith("VmRSS:")), None)
+        except OSError:
+            return None
+        if rss is None:
+            return None
+        return {"pid": pid, "rss_mb": round(int(rss) / 1024, 1), "pss_mb": None,
+                "shared_mb": None, "private_mb": None}
+
+    return {"pid": pid, **{f"{key}_mb": round(value / 1024, 1) for key, value in totals.items()}}
+
+
+def process_alive(pid: int) -> bool:
+    """pid对应的进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
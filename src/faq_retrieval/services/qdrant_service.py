@@ -3,29 +3,53 @@ Qdrant向量数据库服务
 """
 import logging
 import time
-from typing import List, Dict, Optional
-from qdrant_client import QdrantClient, models
-from qdrant_client.http.models import PointStruct, Distance, VectorParams, ScrollRequest
+import uuid
+from typing import List, Dict, Optional, Iterator, Tuple
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+from qdrant_client.http.models import Distance, VectorParams, ScrollRequest
 import numpy as np
 from ..config import config
+from ..metrics import UPSERTED_POINTS, observe_stage
+from .text_utils import compute_content_hash
 
 logger = logging.getLogger(__name__)
 
+# 点ID命名空间：点ID = uuid5(命名空间, FAQ ID)，跨进程、跨重启保持一致
+POINT_ID_NAMESPACE = uuid.UUID("6f1c5a4e-3b9d-5c2a-9e7f-0d8b4a2c1e53")
+
+
+def stable_point_id(faq_id) -> str:
+    """根据FAQ ID计算确定性的点ID（UUIDv5），同一FAQ重复写入时覆盖原有点"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, str(faq_id)))
+
+
 class QdrantService:
     """Qdrant向量数据库服务"""
     
     def __init__(self):
         self.host = config.QDRANT_HOST
         self.port = config.QDRANT_PORT
+        self.grpc_port = config.QDRANT_GRPC_PORT
+        self.prefer_grpc = config.QDRANT_PREFER_GRPC
         self.collection_name = config.COLLECTION_NAME
         self.client: Optional[QdrantClient] = None
+        self._probe_client: Optional[QdrantClient] = None  # 短超时客户端，只用于探活
+        # 异步客户端绑定创建它的事件循环，只在异步入口中使用
+        self.async_client: Optional[AsyncQdrantClient] = None
     
     def connect(self) -> bool:
         """连接到Qdrant服务器"""
         try:
             if self.client is None:
-                logger.info(f"Connecting to Qdrant at {self.host}:{self.port}")
-                self.client = QdrantClient(host=self.host, port=self.port, timeout=30)
+                transport = f"gRPC port {self.grpc_port}" if self.prefer_grpc else f"REST port {self.port}"
+                logger.info(f"Connecting to Qdrant at {self.host} via {transport}")
+                self.client = QdrantClient(
+                    host=self.host,
+                    port=self.port,
+                    grpc_port=self.grpc_port,
+                    prefer_grpc=self.prefer_grpc,
+                    timeout=config.QDRANT_TIMEOUT
+                )
                 
                 # 测试连接
                 self.client.get_collections()
@@ -37,67 +61,312 @@ class QdrantService:
             self.client = None
             return False
     
+    def ping(self) -> bool:
+        """
+        以短超时实际请求一次Qdrant（connect()只在首次创建客户端时访问服务，之后不再探测）
+        
+        Returns:
+            Qdrant当前是否可用
+        """
+        try:
+            if self._probe_client is None:
+                self._probe_client = QdrantClient(
+                    host=self.host,
+                    port=self.port,
+                    grpc_port=self.grpc_port,
+                    prefer_grpc=self.prefer_grpc,
+                    timeout=config.QDRANT_PROBE_TIMEOUT
+                )
+            self._probe_client.get_collections()
+            return True
+        except Exception as e:
+            logger.warning(f"Qdrant probe failed: {e}")
+            return False
+    
+    def get_async_client(self) -> AsyncQdrantClient:
+        """按需创建异步客户端（与同步客户端使用相同的连接配置）"""
+        if self.async_client is None:
+            self.async_client = AsyncQdrantClient(
+                host=self.host,
+                port=self.port,
+                grpc_port=self.grpc_port,
+                prefer_grpc=self.prefer_grpc,
+                timeout=config.QDRANT_TIMEOUT
+            )
+        return self.async_client
+    
+    async def close_async_client(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+    
+    def _versioned_prefix(self) -> str:
+        """版本化集合名前缀，实际集合名为 <COLLECTION_NAME>__<毫秒时间戳>，别名为 COLLECTION_NAME"""
+        return f"{self.collection_name}__"
+    
+    def _new_versioned_name(self) -> str:
+        return f"{self._versioned_prefix()}{int(time.time() * 1000)}"
+    
+    @staticmethod
+    def _quantization_config() -> Optional[models.ScalarQuantization]:
+        if not config.QDRANT_SCALAR_QUANTIZATION:
+            return None
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=config.QDRANT_QUANTIZATION_QUANTILE,
+                always_ram=config.QDRANT_QUANTIZATION_ALWAYS_RAM
+            )
+        )
+    
+    def _create_collection(self, name: str, vector_size: int):
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                distance=Distance.COSINE,
+                on_disk=config.QDRANT_VECTORS_ON_DISK
+            ),
+            hnsw_config=models.HnswConfigDiff(
+                m=config.QDRANT_HNSW_M,
+                ef_construct=config.QDRANT_HNSW_EF_CONSTRUCT
+            ),
+            quantization_config=self._quantization_config(),
+            timeout=60
+        )
+    
+    @staticmethod
+    def _search_params(hnsw_ef: Optional[int] = None, exact: bool = False) -> models.SearchParams:
+        """构造检索参数：ef越大召回越高、延迟越高；exact为True时跳过HNSW做精确检索"""
+        quantization = None
+        if config.QDRANT_SCALAR_QUANTIZATION:
+            quantization = models.QuantizationSearchParams(
+                rescore=config.QDRANT_QUANTIZATION_RESCORE,
+                oversampling=config.QDRANT_QUANTIZATION_OVERSAMPLING
+            )
+        return models.SearchParams(
+            hnsw_ef=hnsw_ef or config.QDRANT_SEARCH_HNSW_EF,
+            exact=exact,
+            quantization=quantization
+        )
+    
+    def _list_collection_names(self) -> List[str]:
+        return [collection.name for collection in self.client.get_collections().collections]
+    
+    def _list_versioned_collections(self) -> List[str]:
+        """按创建时间升序返回所有版本化集合"""
+        prefix = self._versioned_prefix()
+        return sorted(name for name in self._list_collection_names() if name.startswith(prefix))
+    
+    def get_alias_target(self) -> Optional[str]:
+        """返回别名当前指向的集合，别名不存在时返回None"""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name
+        return None
+    
+    def _switch_alias(self, target: str):
+        """在一次别名更新请求中删除旧别名并指向新集合，检索不会出现空窗"""
+        current = self.get_alias_target()
+        operations = []
+        if current is not None:
+            operations.append(models.DeleteAliasOperation(
+                delete_alias=models.DeleteAlias(alias_name=self.collection_name)
+            ))
+        elif self.collection_name in self._list_collection_names():
+            self._move_legacy_collection_aside(target)
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=target, alias_name=self.collection_name)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        logger.info(f"Alias '{self.collection_name}' switched from '{current}' to '{target}'")
+    
+    def _move_legacy_collection_aside(self, target: str):
+        """
+        旧版部署直接使用同名集合，别名不能与集合同名（仅在首次切换时发生）：
+        先把数据完整复制到一个排在target之前的版本化集合（可用rollback切回），核对点数后才删除同名集合，
+        之后创建别名失败也不会丢失数据，ensure_collection_exists会把别名指向最新的版本化集合；
+        删除同名集合到创建别名之间的检索会短暂失败
+        """
+        suffix = target[len(self._versioned_prefix()):]
+        aside = f"{self._versioned_prefix()}{int(suffix) - 1}" if suffix.isdigit() else self._new_versioned_name()
+        legacy_info = self.client.get_collection(collection_name=self.collection_name)
+        logger.warning(f"Copying legacy collection '{self.collection_name}' to '{aside}' to replace it with an alias")
+        self._create_collection(aside, legacy_info.config.params.vectors.size)
+        for ids, vectors, payloads in self.iter_points():
+            self._upload(ids, vectors, payloads, aside)
+        
+        legacy_count = self.client.count(collection_name=self.collection_name, exact=True).count
+        copied_count = self.client.count(collection_name=aside, exact=True).count
+        if copied_count != legacy_count:
+            raise RuntimeError(f"Copied {copied_count} of {legacy_count} points from legacy collection "
+                               f"'{self.collection_name}', keeping it")
+        self.client.delete_collection(collection_name=self.collection_name, timeout=60)
+        logger.info(f"Legacy collection '{self.collection_name}' moved to '{aside}'")
+    
+    def _collect_garbage(self, current: str):
+        """删除比当前集合更早的版本化集合，保留最近QDRANT_KEEP_OLD_COLLECTIONS个用于回滚"""
+        older = [name for name in self._list_versioned_collections() if name < current]
+        keep = max(config.QDRANT_KEEP_OLD_COLLECTIONS, 0)
+        expired = older[:len(older) - keep] if keep else older
+        for name in expired:
+            try:
+                self.client.delete_collection(collection_name=name, timeout=60)
+                logger.info(f"Deleted old collection '{name}'")
+            except Exception as e:
+                logger.warning(f"Failed to delete old collection '{name}': {e}")
+    
     def ensure_collection_exists(self, vector_size: int) -> bool:
-        """确保集合存在"""
+        """确保集合存在（新建时创建版本化集合并以COLLECTION_NAME为别名）"""
         if not self.connect():
             return False
         
         try:
-            # 检查集合是否存在
-            try:
-                collection_info = self.client.get_collection(collection_name=self.collection_name)
+            if self.get_alias_target() is not None or self.collection_name in self._list_collection_names():
                 logger.info(f"Collection '{self.collection_name}' already exists")
                 return True
-            except Exception:
-                # 集合不存在，创建新集合
-                logger.info(f"Creating collection '{self.collection_name}' with vector size {vector_size}")
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=vector_size,
-                        distance=Distance.COSINE
-                    ),
-                    timeout=60
-                )
-                logger.info(f"Collection '{self.collection_name}' created successfully")
+            
+            versions = self._list_versioned_collections()
+            if versions:
+                # 别名丢失（例如迁移旧版集合后创建别名失败）时指回最新的版本化集合，而不是新建空集合
+                logger.warning(f"Alias '{self.collection_name}' is missing, pointing it to '{versions[-1]}'")
+                self._switch_alias(versions[-1])
                 return True
+            
+            name = self._new_versioned_name()
+            logger.info(f"Creating collection '{name}' with vector size {vector_size}")
+            self._create_collection(name, vector_size)
+            self._switch_alias(name)
+            logger.info(f"Collection '{self.collection_name}' created successfully")
+            return True
                 
         except Exception as e:
             logger.error(f"Error ensuring collection exists: {e}")
             return False
     
-    def recreate_collection(self, vector_size: int) -> bool:
-        """重新创建集合（删除旧数据）"""
+    def begin_reindex(self, vector_size: int) -> Optional[str]:
+        """
+        创建用于重建索引的影子集合，重建期间检索仍走当前别名指向的集合
+        
+        Returns:
+            影子集合名，失败返回None
+        """
         if not self.connect():
-            return False
+            return None
         
         try:
-            # 尝试删除现有集合
-            try:
-                self.client.delete_collection(collection_name=self.collection_name, timeout=60)
-                logger.info(f"Deleted existing collection '{self.collection_name}'")
-                time.sleep(1)  # 等待删除完成
-            except Exception:
-                logger.info(f"Collection '{self.collection_name}' does not exist, creating new one")
+            shadow = self._new_versioned_name()
+            self._create_collection(shadow, vector_size)
+            logger.info(f"Created shadow collection '{shadow}' with vector size {vector_size}")
+            return shadow
             
-            # 创建新集合
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=vector_size,
-                    distance=Distance.COSINE
-                ),
-                timeout=60
-            )
-            logger.info(f"Collection '{self.collection_name}' recreated successfully")
+        except Exception as e:
+            logger.error(f"Error creating shadow collection: {e}")
+            return None
+    
+    def commit_reindex(self, shadow: str) -> bool:
+        """将别名原子切换到影子集合，并回收旧集合"""
+        if not self.connect():
+            return False
+        
+        try:
+            self._switch_alias(shadow)
+        except Exception as e:
+            logger.error(f"Error switching alias to '{shadow}': {e}")
+            return False
+        
+        self._collect_garbage(shadow)
+        return True
+    
+    def abort_reindex(self, shadow: str) -> bool:
+        """放弃重建，删除影子集合，当前集合保持不变"""
+        if not self.connect():
+            return False
+        
+        try:
+            self.client.delete_collection(collection_name=shadow, timeout=60)
+            logger.info(f"Deleted shadow collection '{shadow}'")
             return True
             
         except Exception as e:
-            logger.error(f"Error recreating collection: {e}")
+            logger.error(f"Error deleting shadow collection '{shadow}': {e}")
             return False
     
-    def upsert_points(self, faqs: List[Dict], embeddings: np.ndarray) -> bool:
-        """批量插入或更新向量点"""
+    def rollback_collection(self) -> Optional[str]:
+        """
+        将别名切回上一个保留的集合（较新的集合不会被删除，可再次重建或手动切回）
+        
+        Returns:
+            切换后的集合名，没有可回滚的集合时返回None
+        """
+        if not self.connect():
+            return None
+        
+        try:
+            current = self.get_alias_target()
+            older = [name for name in self._list_versioned_collections() if current is None or name < current]
+            if not older:
+                logger.warning("No previous collection available for rollback")
+                return None
+            
+            self._switch_alias(older[-1])
+            return older[-1]
+            
+        except Exception as e:
+            logger.error(f"Error rolling back collection: {e}")
+            return None
+    
+    def recreate_collection(self, vector_size: int) -> bool:
+        """重新创建集合：新建空的版本化集合并切换别名（旧集合按保留策略回收）"""
+        shadow = self.begin_reindex(vector_size)
+        return shadow is not None and self.commit_reindex(shadow)
+    
+    def point_id_for(self, faq_id: str):
+        """根据FAQ ID计算Qdrant点ID"""
+        return stable_point_id(faq_id)
+    
+    @staticmethod
+    def build_payload(faq: Dict) -> Dict:
+        """构造点的payload，包含用于增量同步的内容哈希"""
+        return {
+            "faq_id": faq["id"],
+            "question": faq["question"],
+            "answer": faq["answer"],
+            "content_hash": compute_content_hash(faq["question"], faq["answer"])
+        }
+    
+    def _upload(self, ids: list, vectors: np.ndarray, payloads: List[Dict], collection_name: Optional[str] = None):
+        """
+        以列式批量接口（upload_collection）分批并行上传，向量矩阵整体传给客户端，
+        不再逐行转换为Python列表并构造PointStruct；
+        客户端每次并行上传都会新建进程池（启动并导入qdrant_client需数秒），
+        因此只有点数达到QDRANT_UPLOAD_PARALLEL_MIN_POINTS时才并行，其余在当前进程顺序上传
+        """
+        batch_size = max(config.QDRANT_UPLOAD_BATCH_SIZE, 1)
+        batches = (len(ids) + batch_size - 1) // batch_size
+        parallel = 1
+        if len(ids) >= config.QDRANT_UPLOAD_PARALLEL_MIN_POINTS:
+            parallel = max(min(config.QDRANT_UPLOAD_PARALLEL, batches), 1)
+        
+        start = time.time()
+        self.client.upload_collection(
+            collection_name=collection_name or self.collection_name,
+            vectors=np.ascontiguousarray(vectors, dtype=np.float32),
+            payload=payloads,
+            ids=ids,
+            batch_size=batch_size,
+            parallel=parallel,
+            wait=True
+        )
+        elapsed = time.time() - start
+        UPSERTED_POINTS.inc(len(ids))
+        observe_stage("vector_upsert", elapsed)
+        rate = len(ids) / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Uploaded {len(ids)} points in {batches} batches "
+                    f"with {parallel} workers ({elapsed:.2f}s, {rate:.0f} points/s)")
+    
+    def upsert_points(self, faqs: List[Dict], embeddings: np.ndarray, collection_name: Optional[str] = None) -> bool:
+        """批量插入或更新向量点（collection_name为空时写入当前集合，重建索引时传入影子集合名）"""
         if not self.connect():
             return False
         
@@ -106,38 +375,10 @@ class QdrantService:
             return False
         
         try:
-            points_to_upload = []
-            for i, faq in enumerate(faqs):
-                embedding_list = embeddings[i].tolist()
-                
-                points_to_upload.append(
-                    PointStruct(
-                        id=hash(faq["id"]) % (2**31),  # 使用FAQ ID的哈希作为Qdrant点ID
-                        vector=embedding_list,
-                        payload={
-                            "faq_id": faq["id"],
-                            "question": faq["question"],
-                            "answer": faq["answer"]
-                        }
-                    )
-                )
-            
-            # 分批上传
-            batch_size = 100
-            total_batches = (len(points_to_upload) + batch_size - 1) // batch_size
-            
-            for i in range(0, len(points_to_upload), batch_size):
-                batch = points_to_upload[i:i + batch_size]
-                batch_num = i // batch_size + 1
-                
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch,
-                    wait=True
-                )
-                logger.info(f"Upserted batch {batch_num}/{total_batches}")
-            
-            logger.info(f"Successfully upserted {len(points_to_upload)} points")
+            ids = [self.point_id_for(faq["id"]) for faq in faqs]
+            payloads = [self.build_payload(faq) for faq in faqs]
+            self._upload(ids, embeddings, payloads, collection_name)
+            logger.info(f"Successfully upserted {len(ids)} points")
             return True
             
         except Exception as e:
@@ -145,27 +386,13 @@ class QdrantService:
             return False
     
     def upsert_single_point(self, faq: Dict, embedding: np.ndarray) -> bool:
-        """插入或更新单个向量点"""
+        """插入或更新单个向量点（与批量写入走同一列式接口，向量不转换为Python列表）"""
         if not self.connect():
             return False
         
         try:
-            point = PointStruct(
-                id=hash(faq["id"]) % (2**31),
-                vector=embedding.tolist(),
-                payload={
-                    "faq_id": faq["id"],
-                    "question": faq["question"],
-                    "answer": faq["answer"]
-                }
-            )
-            
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[point],
-                wait=True
-            )
-            
+            self._upload([self.point_id_for(faq["id"])], np.asarray(embedding).reshape(1, -1),
+                         [self.build_payload(faq)])
             logger.info(f"Successfully upserted point for FAQ ID: {faq['id']}")
             return True
             
@@ -173,34 +400,133 @@ class QdrantService:
             logger.error(f"Error upserting single point: {e}")
             return False
     
-    def search_similar(self, query_vector: np.ndarray, limit: int = 5, score_threshold: float = 0.0) -> List[Dict]:
+    def delete_points(self, point_ids: list) -> bool:
+        """按点ID批量删除"""
+        if not point_ids:
+            return True
+        if not self.connect():
+            return False
+        
+        try:
+            batch_size = 1000
+            for i in range(0, len(point_ids), batch_size):
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=point_ids[i:i + batch_size]),
+                    wait=True
+                )
+            logger.info(f"Deleted {len(point_ids)} points")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting points: {e}")
+            return False
+    
+    @staticmethod
+    def _to_results(scored_points) -> List[Dict]:
+        """将检索命中的点转换为FAQ结果"""
+        return [{
+            "faq_id": scored_point.payload.get("faq_id"),
+            "question": scored_point.payload.get("question"),
+            "answer": scored_point.payload.get("answer"),
+            "score": scored_point.score
+        } for scored_point in scored_points]
+    
+    def _batch_requests(self, query_vectors: np.ndarray, limits: List[int], score_thresholds: List[float],
+                        hnsw_efs: Optional[List[Optional[int]]] = None,
+                        exacts: Optional[List[bool]] = None) -> List[models.QueryRequest]:
+        # QueryRequest模型只接受列表，整个矩阵一次性转换
+        vectors = np.asarray(query_vectors, dtype=np.float32).tolist()
+        hnsw_efs = hnsw_efs or [None] * len(vectors)
+        exacts = exacts or [False] * len(vectors)
+        return [
+            models.QueryRequest(
+                query=vector,
+                limit=limit,
+                score_threshold=score_threshold,
+                params=self._search_params(hnsw_ef, exact),
+                with_payload=True
+            )
+            for vector, limit, score_threshold, hnsw_ef, exact
+            in zip(vectors, limits, score_thresholds, hnsw_efs, exacts)
+        ]
+    
+    def search_similar(self, query_vector: np.ndarray, limit: int = 5, score_threshold: float = 0.0,
+                       hnsw_ef: Optional[int] = None, exact: bool = False) -> List[Dict]:
         """搜索相似向量"""
         if not self.connect():
             return []
         
         try:
-            search_result = self.client.search(
+            response = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_vector.tolist(),
+                query=np.asarray(query_vector, dtype=np.float32),
                 limit=limit,
-                score_threshold=score_threshold
+                score_threshold=score_threshold,
+                search_params=self._search_params(hnsw_ef, exact),
+                with_payload=True,
+                timeout=config.QDRANT_SEARCH_TIMEOUT
             )
+            return self._to_results(response.points)
             
-            results = []
-            for scored_point in search_result:
-                results.append({
-                    "faq_id": scored_point.payload.get("faq_id"),
-                    "question": scored_point.payload.get("question"),
-                    "answer": scored_point.payload.get("answer"),
-                    "score": scored_point.score
-                })
+        except Exception as e:
+            logger.error(f"Error searching similar vectors: {e}")
+            return []
+    
+    def search_batch(self, query_vectors: np.ndarray, limits: List[int], score_thresholds: List[float],
+                     hnsw_efs: Optional[List[Optional[int]]] = None,
+                     exacts: Optional[List[bool]] = None) -> Optional[List[List[Dict]]]:
+        """批量搜索相似向量，一次请求完成多个查询，失败返回None"""
+        if not self.connect():
+            return None
+        
+        try:
+            batch_result = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=self._batch_requests(query_vectors, limits, score_thresholds, hnsw_efs, exacts),
+                timeout=config.QDRANT_SEARCH_TIMEOUT
+            )
+            return [self._to_results(response.points) for response in batch_result]
             
-            return results
+        except Exception as e:
+            logger.error(f"Error in batch vector search: {e}")
+            return None
+    
+    async def async_search_similar(self, query_vector: np.ndarray, limit: int = 5, score_threshold: float = 0.0,
+                                   hnsw_ef: Optional[int] = None, exact: bool = False) -> List[Dict]:
+        """search_similar的异步版本，使用AsyncQdrantClient，等待期间不占用线程"""
+        try:
+            response = await self.get_async_client().query_points(
+                collection_name=self.collection_name,
+                query=np.asarray(query_vector, dtype=np.float32),
+                limit=limit,
+                score_threshold=score_threshold,
+                search_params=self._search_params(hnsw_ef, exact),
+                with_payload=True,
+                timeout=config.QDRANT_SEARCH_TIMEOUT
+            )
+            return self._to_results(response.points)
             
         except Exception as e:
             logger.error(f"Error searching similar vectors: {e}")
             return []
     
+    async def async_search_batch(self, query_vectors: np.ndarray, limits: List[int], score_thresholds: List[float],
+                                 hnsw_efs: Optional[List[Optional[int]]] = None,
+                                 exacts: Optional[List[bool]] = None) -> Optional[List[List[Dict]]]:
+        """search_batch的异步版本，失败返回None"""
+        try:
+            batch_result = await self.get_async_client().query_batch_points(
+                collection_name=self.collection_name,
+                requests=self._batch_requests(query_vectors, limits, score_thresholds, hnsw_efs, exacts),
+                timeout=config.QDRANT_SEARCH_TIMEOUT
+            )
+            return [self._to_results(response.points) for response in batch_result]
+            
+        except Exception as e:
+            logger.error(f"Error in batch vector search: {e}")
+            return None
+    
     def get_all_points(self) -> List[Dict]:
         """获取所有向量点"""
         if not self.connect():
@@ -241,16 +567,134 @@ class QdrantService:
             logger.error(f"Error getting all points: {e}")
             return []
     
+    def iter_points(self, batch_size: int = 256, with_vectors: bool = True) -> Iterator[Tuple[list, Optional[np.ndarray], List[Dict]]]:
+        """
+        分批遍历集合中的所有点
+        
+        Yields:
+            (点ID列表, 向量矩阵或None, payload列表)
+        """
+        if not self.connect():
+            raise ConnectionError("Failed to connect to Qdrant")
+        
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=None,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+            
+            if points:
+                ids = [point.id for point in points]
+                payloads = [point.payload or {} for point in points]
+                vectors = None
+                if with_vectors:
+                    vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+                yield ids, vectors, payloads
+            
+            if offset is None:
+                break
+    
+    def upsert_vectors(self, ids: list, vectors: np.ndarray, payloads: List[Dict],
+                       collection_name: Optional[str] = None) -> bool:
+        """按原始点ID、向量和payload批量写入（不经过模型，用于快照恢复）"""
+        if not self.connect():
+            return False
+        
+        try:
+            self._upload(list(ids), vectors, list(payloads), collection_name)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error upserting raw vectors: {e}")
+            return False
+    
+    def migrate_point_ids(self, batch_size: int = 256, dry_run: bool = False) -> Dict:
+        """
+        将旧版点ID（进程相关的hash()）迁移为稳定ID，并删除同一FAQ的重复点
+        
+        每个FAQ保留一个点：已存在稳定ID的点时保留它，否则将任意一个旧点的向量和payload
+        复制到稳定ID下。迁移后建议执行一次增量同步，以数据库内容校正保留的点
+        
+        Returns:
+            迁移统计信息
+        """
+        if not self.connect():
+            raise ConnectionError("Failed to connect to Qdrant")
+        
+        stats = {"scanned": 0, "faq_ids": 0, "rewritten": 0, "deleted": 0, "without_faq_id": 0}
+        
+        # 1. 只读取点ID和payload，按FAQ ID分组
+        points_by_faq: Dict[str, list] = {}
+        for ids, _, payloads in self.iter_points(batch_size=batch_size, with_vectors=False):
+            stats["scanned"] += len(ids)
+            for point_id, payload in zip(ids, payloads):
+                faq_id = payload.get("faq_id")
+                if faq_id is None:
+                    stats["without_faq_id"] += 1
+                    continue
+                points_by_faq.setdefault(faq_id, []).append(point_id)
+        stats["faq_ids"] = len(points_by_faq)
+        
+        # 2. 确定需要复制到稳定ID的点和需要删除的点
+        to_copy = {}  # 旧点ID -> 稳定点ID
+        to_delete = []
+        for faq_id, point_ids in points_by_faq.items():
+            target_id = self.point_id_for(faq_id)
+            legacy_ids = [pid for pid in point_ids if str(pid) != target_id]
+            if not legacy_ids:
+                continue
+            if len(legacy_ids) == len(point_ids):
+                to_copy[legacy_ids[0]] = target_id
+            to_delete.extend(legacy_ids)
+        stats["rewritten"] = len(to_copy)
+        stats["deleted"] = len(to_delete)
+        
+        logger.info(f"Point ID migration plan: {stats}")
+        if dry_run:
+            return stats
+        
+        # 3. 先写入稳定ID的点，再删除旧点
+        legacy_ids = list(to_copy)
+        for start in range(0, len(legacy_ids), batch_size):
+            batch_ids = legacy_ids[start:start + batch_size]
+            records = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=batch_ids,
+                with_payload=True,
+                with_vectors=True
+            )
+            if not records:
+                continue
+            vectors = np.asarray([record.vector for record in records], dtype=np.float32)
+            if not self.upsert_vectors([to_copy[record.id] for record in records], vectors,
+                                       [record.payload or {} for record in records]):
+                raise RuntimeError("Failed to write migrated points")
+        
+        if not self.delete_points(to_delete):
+            raise RuntimeError("Failed to delete legacy points")
+        
+        logger.info(f"Migrated point IDs: {stats['rewritten']} rewritten, {stats['deleted']} legacy points deleted")
+        return stats
+    
     def get_collection_info(self) -> Optional[Dict]:
         """获取集合信息"""
         if not self.connect():
             return None
         
         try:
-            collection_info = self.client.get_collection(collection_name=self.collection_name)
+            target = self.get_alias_target()
+            collection_info = self.client.get_collection(collection_name=target or self.collection_name)
+            # 新版客户端的CollectionInfo去掉了vectors_count；集合只有一个未命名向量，向量数等于点数
+            vectors_count = getattr(collection_info, "vectors_count", None)
             return {
                 "name": self.collection_name,
-                "vectors_count": collection_info.vectors_count,
+                "alias_target": target,
+                "vectors_count": vectors_count if vectors_count is not None else collection_info.points_count,
                 "points_count": collection_info.points_count,
                 "status": collection_info.status,
                 "optimizer_status": collection_info.optimizer_status
@@ -0,0 +1,150 @@
+"""
+多进程共享状态 - 预fork等多进程部署时，各工作进程通过共享目录中的文件协调：
+- 集合版本号：写入数据的进程递增，其他进程检索时发现变化后丢弃本进程的检索缓存并重新加载精确匹配索引
+- 初始化锁：同一时间只允许一个进程执行全量初始化/增量同步，持有锁的进程退出时由内核释放
+- 后台任务状态：任一工作进程都能查询和取消其他进程启动的任务
+- 重建中的影子集合名：全量重建期间任一进程新增的FAQ都同时写入影子集合
+只在配置了SHARED_STATE_DIR时启用（faq-service-prefork未配置时自动创建临时目录）。仅支持Linux/Unix。
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _open(path: Path) -> int:
+    return os.open(str(path), os.O_RDWR | os.O_CREAT, 0o600)
+
+
+class SharedCounter:
+    """保存在文件中的64位计数器，读取只需一次pread，递增时持有文件锁"""
+
+    def __init__(self, path: Path):
+        self._fd = _open(path)
+        self._lock = threading.Lock()
+
+    def get(self) -> int:
+        data = os.pread(self._fd, 8, 0)
+        return int.from_bytes(data, "little") if len(data) == 8 else 0
+
+    def increment(self) -> int:
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                value = self.get() + 1
+                os.pwrite(self._fd, value.to_bytes(8, "little"), 0)
+                return value
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+class SharedText:
+    """保存在文件中的短字符串，整体原子替换，空字符串表示未设置"""
+
+    def __init__(self, path: Path):
+        self._path = path
+
+    def get(self) -> Optional[str]:
+        try:
+            return self._path.read_text(encoding="utf-8") or None
+        except FileNotFoundError:
+            return None
+
+    def set(self, value: Optional[str]):
+        tmp_path = self._path.with_suffix(f".tmp{os.getpid()}")
+        tmp_path.write_text(value or "", encoding="utf-8")
+        os.replace(tmp_path, self._path)
+
+
+class InterProcessLock:
+    """
+    跨进程互斥锁（fcntl记录锁）
+
+    记录锁按进程持有，同一进程内的线程之间不互斥，调用方需要先持有进程内的锁
+    """
+
+    def __init__(self, path: Path):
+        self._fd = _open(path)
+
+    def acquire(self) -> bool:
+        """非阻塞获取，已被其他进程持有时返回False"""
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def release(self):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+class JobStore:
+    """后台任务状态目录：每个任务一个JSON文件，取消请求以标记文件传递给执行任务的进程"""
+
+    def __init__(self, directory: Path, history_size: int = 20):
+        self.directory = directory
+        self.history_size = history_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, job_id: str, suffix: str = ".json") -> Path:
+        # job_id来自请求路径，只接受uuid4().hex格式，防止路径穿越
+        if not job_id.isalnum():
+            raise ValueError(f"Invalid job id: {job_id}")
+        return self.directory / f"{job_id}{suffix}"
+
+    def save(self, job: Dict):
+        """原子写入任务状态（附带执行进程的pid）"""
+        path = self._path(job["job_id"])
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(job, worker_pid=os.getpid()), f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self) -> List[Dict]:
+        """全部任务，按创建时间倒序"""
+        jobs = [job for job in (self.load(path.stem) for path in self.directory.glob("*.json")) if job is not None]
+        jobs.sort(key=lambda job: job.get("created_at") or 0, reverse=True)
+        return jobs
+
+    def prune(self):
+        """只保留最近history_size个已结束任务的状态文件"""
+        finished = [job for job in self.list() if job.get("status") not in ("pending", "running")]
+        for job in finished[self.history_size:]:
+            for suffix in (".json", ".cancel"):
+                try:
+                    self._path(job["job_id"], suffix).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def request_cancel(self, job_id: str):
+        self._path(job_id, ".cancel").touch()
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return self._path(job_id, ".cancel").exists()
+
+
+class SharedState:
+    """一个共享目录中的全部多进程状态"""
+
+    def __init__(self, directory, history_size: int = 20):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.version = SharedCounter(directory / "collection_version")
+        self.init_lock = InterProcessLock(directory / "init.lock")
+        self.reindex_shadow = SharedText(directory / "reindex_shadow")
+        self.jobs = JobStore(directory / "jobs", history_size=history_size)
+        logger.info(f"Using shared state directory {directory}")
+
@@ -0,0 +1,164 @@
+"""
+向量集合快照 - 导出/导入点ID、payload和向量
+快照目录结构:
+    header.json   元数据（格式版本、模型名称、向量维度、点数量等）
+    vectors.npy   float32向量矩阵 (N, D)，可通过 np.load(mmap_mode="r") 内存映射读取
+    points.jsonl  每行一个点 {"id": ..., "payload": {...}}，顺序与vectors.npy的行一致
+恢复时直接批量写入向量库，无需重新编码
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+HEADER_FILE = "header.json"
+VECTORS_FILE = "vectors.npy"
+POINTS_FILE = "points.jsonl"
+
+_SNAPSHOT_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+class SnapshotError(Exception):
+    """快照格式或内容错误"""
+
+
+def resolve_snapshot_path(snapshot_dir: Path, name: str) -> Path:
+    """将快照名称解析为快照目录下的路径，拒绝包含路径分隔符等非法名称"""
+    if not name or not _SNAPSHOT_NAME_RE.match(name):
+        raise SnapshotError(f"Invalid snapshot name: {name!r}")
+    return Path(snapshot_dir) / name
+
+
+def export_snapshot(vector_service, path: Path, model_name: str, batch_size: int = 256) -> Dict:
+    """
+    将向量集合导出为快照
+
+    向量先逐批写入临时的原始float32文件，最后补上.npy头，内存占用与集合大小无关
+
+    Args:
+        vector_service: 向量检索服务（需实现iter_points）
+        path: 快照目录
+        model_name: 生成向量所用的模型名称，写入快照头
+        batch_size: 每批读取的点数量
+
+    Returns:
+        快照头信息
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    count = 0
+    vector_size = None
+    raw_file = tmp_path / "vectors.raw"
+    try:
+        with open(raw_file, "wb") as raw, open(tmp_path / POINTS_FILE, "w", encoding="utf-8") as points_file:
+            for ids, vectors, payloads in vector_service.iter_points(batch_size=batch_size, with_vectors=True):
+                vectors = np.ascontiguousarray(vectors, dtype="<f4")
+                if vector_size is None:
+                    vector_size = int(vectors.shape[1])
+                elif vectors.shape[1] != vector_size:
+                    raise SnapshotError(f"Inconsistent vector size: {vectors.shape[1]} != {vector_size}")
+
+                raw.write(vectors.tobytes())
+                for point_id, payload in zip(ids, payloads):
+                    points_file.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False))
+                    points_file.write("\n")
+                count += len(ids)
+
+        # 写入.npy头并拼接原始向量数据
+        with open(tmp_path / VECTORS_FILE, "wb") as npy, open(raw_file, "rb") as raw:
+            np.lib.format.write_array_header_1_0(npy, {
+                "descr": "<f4",
+                "fortran_order": False,
+                "shape": (count, vector_size or 0)
+            })
+            shutil.copyfileobj(raw, npy)
+        raw_file.unlink()
+
+        header = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "model_name": model_name,
+            "vector_size": vector_size,
+            "count": count,
+            "collection": getattr(vector_service, "collection_name", None),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        }
+        with open(tmp_path / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False, indent=2)
+
+        # 完整写入后再替换旧快照，避免留下半成品
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    logger.info(f"Exported snapshot with {count} points to {path}")
+    return header
+
+
+def read_snapshot_header(path: Path) -> Dict:
+    """读取并校验快照头"""
+    header_file = Path(path) / HEADER_FILE
+    if not header_file.exists():
+        raise SnapshotError(f"Snapshot not found: {path}")
+
+    with open(header_file, "r", encoding="utf-8") as f:
+        header = json.load(f)
+
+    if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version: {header.get('format_version')}")
+    return header
+
+
+def iter_snapshot(path: Path, batch_size: int = 256) -> Iterator[Tuple[list, np.ndarray, List[Dict]]]:
+    """
+    分批读取快照，向量通过内存映射按需加载
+
+    Yields:
+        (点ID列表, 向量矩阵, payload列表)
+    """
+    path = Path(path)
+    header = read_snapshot_header(path)
+    try:
+        vectors = np.load(path / VECTORS_FILE, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        # 截断或损坏的.npy文件（头部无法解析，或数据长度小于头部声明的形状）
+        raise SnapshotError(f"Corrupt snapshot vectors file: {e}")
+    if vectors.ndim != 2 or vectors.dtype != np.float32 or vectors.shape[1] != (header["vector_size"] or 0):
+        raise SnapshotError(f"Snapshot vectors {vectors.dtype}{vectors.shape} do not match "
+                            f"header vector size {header['vector_size']}")
+    if vectors.shape[0] != header["count"]:
+        raise SnapshotError(f"Snapshot vector count {vectors.shape[0]} does not match header count {header['count']}")
+
+    with open(path / POINTS_FILE, "r", encoding="utf-8") as points_file:
+        ids, payloads = [], []
+        start = 0
+        for line in points_file:
+            point = json.loads(line)
+            ids.append(point["id"])
+            payloads.append(point["payload"])
+            if len(ids) == batch_size:
+                yield ids, np.asarray(vectors[start:start + len(ids)]), payloads
+                start += len(ids)
+                ids, payloads = [], []
+        if ids:
+            yield ids, np.asarray(vectors[start:start + len(ids)]), payloads
+            start += len(ids)
+
+    if start != header["count"]:
+        raise SnapshotError(f"Snapshot point count {start} does not match header count {header['count']}")
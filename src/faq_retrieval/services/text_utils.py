@@ -0,0 +1,36 @@
+"""
+文本处理工具 - 查询文本归一化等
+"""
+import hashlib
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 问句末尾可忽略的标点（NFKC归一化后全角标点已转换为半角）
+_TRAILING_PUNCTUATION = "?!.,;:~。、·"
+
+
+def normalize_text(text: str) -> str:
+    """归一化文本：去除首尾空白并将连续空白合并为单个空格"""
+    if not text:
+        return ""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def normalize_question(text: str) -> str:
+    """
+    归一化问句，用于精确匹配
+    统一全角/半角字符、忽略大小写与所有空白，并去除末尾标点
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _WHITESPACE_RE.sub("", text)
+    return text.rstrip(_TRAILING_PUNCTUATION)
+
+
+def compute_content_hash(question: str, answer: str) -> str:
+    """计算FAQ问答内容的哈希，用于增量同步时判断内容是否变化"""
+    content = f"{question or ''}\x1f{answer or ''}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,28 @@
+"""
+向量检索后端选择
+根据配置创建QdrantService或进程内NumpyVectorService，两者接口一致
+"""
+import logging
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKENDS = ("qdrant", "numpy")
+
+
+def create_vector_service(backend: str = None):
+    """
+    创建向量检索服务
+
+    Args:
+        backend: 后端名称（qdrant/numpy），None表示使用config.VECTOR_BACKEND
+    """
+    backend = (backend or config.VECTOR_BACKEND).lower()
+    if backend == "numpy":
+        from .numpy_vector_service import NumpyVectorService
+        logger.info("Using in-process NumPy vector backend")
+        return NumpyVectorService()
+    if backend == "qdrant":
+        from .qdrant_service import QdrantService
+        return QdrantService()
+    raise ValueError(f"Unknown vector backend: {backend}, expected one of {VECTOR_BACKENDS}")
@@ -0,0 +1,35 @@
+"""
+启动阶段计时 - 记录冷启动各阶段耗时，便于发现启动变慢
+入口模块应在导入其他模块之前先导入本模块，计时从本模块被导入时开始
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_started = time.perf_counter()
+_phases: "OrderedDict[str, float]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def elapsed() -> float:
+    """距启动开始的秒数"""
+    return time.perf_counter() - _started
+
+
+def record_phase(name: str, seconds: float):
+    """记录一个启动阶段的耗时"""
+    with _lock:
+        _phases[name] = round(seconds, 3)
+    logger.info(f"Startup phase '{name}' took {seconds:.3f}s ({elapsed():.3f}s since start)")
+
+
+def get_startup_timings() -> Dict:
+    with _lock:
+        return {
+            "phases": dict(_phases),
+            "since_start": round(elapsed(), 3)
+        }
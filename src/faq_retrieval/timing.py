@@ -0,0 +1,102 @@
+"""
+单次请求的分阶段耗时 - 请求带 X-Debug-Timing 头（或debug_timing参数）时开启，
+各阶段耗时随响应返回；未开启时 stage() 只读取一次ContextVar，几乎没有开销。
+跨线程执行的代码（推理线程池、微批调度线程）需要显式传递当前的 RequestTiming。
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+_current: ContextVar[Optional["RequestTiming"]] = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """一次请求各阶段的累计耗时（同名阶段多次出现时累加）"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+    def get(self, stage: str) -> float:
+        with self._lock:
+            return self._stages.get(stage, 0.0)
+
+    def merge(self, other: "RequestTiming"):
+        """并入另一个记录的各阶段耗时（微批编码时把批次的耗时计入批内每个请求）"""
+        with other._lock:
+            stages = list(other._stages.items())
+        for stage, seconds in stages:
+            self.add(stage, seconds)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            stages = {stage: round(seconds * 1000, 3) for stage, seconds in self._stages.items()}
+        return {
+            "stages_ms": stages,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3)
+        }
+
+    def server_timing_header(self) -> str:
+        """W3C Server-Timing 格式，浏览器开发者工具可直接展示"""
+        data = self.to_dict()
+        entries = [f"{stage};dur={ms}" for stage, ms in data["stages_ms"].items()]
+        entries.append(f"total;dur={data['total_ms']}")
+        return ", ".join(entries)
+
+
+def current() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+@contextmanager
+def activate(timing: Optional[RequestTiming]):
+    """在当前线程/协程中启用timing，退出时恢复"""
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+def record(stage: str, seconds: float):
+    """向当前请求记录一个阶段耗时，未开启时不做任何事"""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(stage, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """记录一段代码的耗时到当前请求"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+
+
+def timed_method(name: str, fn):
+    """包装编码器的tokenize等方法，开启时记录其耗时"""
+    def wrapper(*args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timing.add(name, time.perf_counter() - start)
+    wrapper.__wrapped__ = fn
+    return wrapper
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试asyncio入口使用的有界推理执行器，以及异步检索经Qdrant异步客户端返回真实结果
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.async_search import AsyncSearchService, InferenceBusyError, InferenceExecutor
+
+
+def test_inference_executor_runs_in_worker_thread():
+    executor = InferenceExecutor(max_workers=2, max_pending=4)
+    try:
+        thread_name = asyncio.run(executor.run(lambda: threading.current_thread().name))
+        assert thread_name.startswith("inference")
+        assert executor.get_stats()["pending"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_inference_executor_rejects_when_full():
+    executor = InferenceExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceBusyError):
+            await executor.run(lambda: None)
+        release.set()
+        assert await first is True
+
+    try:
+        asyncio.run(scenario())
+        assert executor.get_stats()["rejected"] == 1
+        assert executor.get_stats()["pending"] == 0
+    finally:
+        executor.shutdown()
+
+
+QUERY_VECTORS = {
+    "如何维修电脑？": [1.0, 0.0, 0.0, 0.0],
+    "忘记密码怎么办？": [0.0, 1.0, 0.0, 0.0],
+    "电脑坏了": [0.9, 0.1, 0.0, 0.0],
+    "密码丢了": [0.1, 0.9, 0.0, 0.0],
+}
+
+
+def fake_embeddings(texts, batch_size=32, use_cache=True):
+    return np.array([QUERY_VECTORS[text] for text in texts], dtype=np.float32)
+
+
+def test_async_search_returns_qdrant_results(monkeypatch):
+    from qdrant_client import AsyncQdrantClient, models
+    from faq_retrieval.config import config
+    from faq_retrieval.services.faq_service import FAQService
+    from faq_retrieval.services.model_manager import model_manager
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "qdrant")
+    monkeypatch.setattr(model_manager, "is_model_loaded", lambda: True)
+    monkeypatch.setattr(model_manager, "generate_embeddings", fake_embeddings)
+    faq_service = FAQService()
+    qdrant = faq_service.vector_service
+    faqs = [
+        {"id": "1", "question": "如何维修电脑？", "answer": "找售后人员进行维修"},
+        {"id": "2", "question": "忘记密码怎么办？", "answer": "联系管理员重置密码"},
+    ]
+    executor = InferenceExecutor(max_workers=1)
+
+    async def scenario():
+        # 本地内存模式的异步客户端，走与远程客户端相同的query_points/query_batch_points接口
+        qdrant.async_client = AsyncQdrantClient(":memory:")
+        await qdrant.async_client.create_collection(
+            qdrant.collection_name, vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE)
+        )
+        await qdrant.async_client.upsert(qdrant.collection_name, points=[
+            models.PointStruct(id=qdrant.point_id_for(faq["id"]), vector=QUERY_VECTORS[faq["question"]],
+                               payload=qdrant.build_payload(faq))
+            for faq in faqs
+        ])
+        search = AsyncSearchService(faq_service, executor)
+        first = await search.search_faqs("电脑坏了", limit=1, exact_match=False)
+        second = await search.search_faqs("电脑坏了", limit=1, exact_match=False)
+        batch = await search.search_faqs_batch([
+            {"text": "电脑坏了", "limit": 1, "similarity": 0.0, "exact_match": False},
+            {"text": "密码丢了", "limit": 1, "similarity": 0.5, "exact_match": False},
+        ])
+        await qdrant.close_async_client()
+        return first, second, batch
+
+    try:
+        first, second, batch = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert first["success"] and not first["cached"]
+    assert [faq["faq_id"] for faq in first["results"]] == ["1"]
+    assert second["cached"] and second["results"] == first["results"]
+    assert batch["success"] and batch["timing"]["encoded_queries"] == 1
+    assert [[faq["faq_id"] for faq in item["results"]] for item in batch["results"]] == [["1"], ["2"]]
+    assert batch["results"][0]["cached"] and not batch["results"][1]["cached"]
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+测试跨请求微批调度器：凑满批大小或等待超时时编码、队列满时拒绝、每个调用方按顺序拿到自己的向量
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.batch_scheduler import BatchQueueFullError, MicroBatchScheduler
+
+
+class RecordingEncoder:
+    """把文本编号编码为[编号, 编号]，并记录每个批次"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return np.array([[float(text), float(text)] for text in texts], dtype=np.float32)
+
+
+def test_flushes_when_batch_is_full():
+    encoder = RecordingEncoder()
+    scheduler = MicroBatchScheduler(encoder, max_batch_size=4, max_wait_ms=10000)
+
+    start = time.monotonic()
+    embeddings = scheduler.encode(["1", "2", "3", "4"], timeout=5)
+
+    # 凑满4条立即编码，不等待10秒的窗口
+    assert time.monotonic() - start < 5
+    assert encoder.batches == [["1", "2", "3", "4"]]
+    assert embeddings[:, 0].tolist() == [1, 2, 3, 4]
+
+
+def test_flushes_partial_batch_after_max_wait():
+    encoder = RecordingEncoder()
+    scheduler = MicroBatchScheduler(encoder, max_batch_size=100, max_wait_ms=50)
+
+    start = time.monotonic()
+    embeddings = scheduler.encode(["1", "2", "3"], timeout=5)
+    elapsed = time.monotonic() - start
+
+    assert 0.04 <= elapsed < 5
+    assert encoder.batches == [["1", "2", "3"]]
+    assert embeddings.shape == (3, 2)
+    assert scheduler.get_stats()["avg_batch_size"] == 3
+
+
+def test_rejects_when_queue_is_full():
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_encoder(texts):
+        started.set()
+        release.wait(5)
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    scheduler = MicroBatchScheduler(blocking_encoder, max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+    first = scheduler.submit("1")
+    assert started.wait(5)
+    queued = [scheduler.submit("2"), scheduler.submit("3")]
+    with pytest.raises(BatchQueueFullError):
+        scheduler.submit("4")
+    assert scheduler.get_stats()["rejected"] == 1
+
+    release.set()
+    for future in [first] + queued:
+        assert future.result(timeout=5).shape == (2,)
+
+
+def test_concurrent_callers_get_their_own_rows_in_order():
+    encoder = RecordingEncoder()
+    scheduler = MicroBatchScheduler(encoder, max_batch_size=64, max_wait_ms=50)
+    callers = 8
+    barrier = threading.Barrier(callers)
+    results = {}
+
+    def caller(index):
+        texts = [str(index * 10 + offset) for offset in range(3)]
+        barrier.wait()
+        results[index] = scheduler.encode(texts, timeout=5)
+
+    threads = [threading.Thread(target=caller, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for index in range(callers):
+        assert results[index][:, 0].tolist() == [index * 10, index * 10 + 1, index * 10 + 2]
+    # 并发请求被合并到更少的批次中
+    assert len(encoder.batches) < callers
+    assert sum(len(batch) for batch in encoder.batches) == callers * 3
+
+
+def test_encode_failure_reaches_every_caller_in_the_batch():
+    def broken_encoder(texts):
+        raise RuntimeError("model crashed")
+
+    scheduler = MicroBatchScheduler(broken_encoder, max_batch_size=2, max_wait_ms=1000)
+    futures = [scheduler.submit("1"), scheduler.submit("2")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(timeout=5)
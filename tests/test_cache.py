@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+测试进程内LRU缓存及查询向量缓存键
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.cache import LRUCache
+
+
+def test_hit_and_miss_counters():
+    """测试命中与未命中统计"""
+    cache = LRUCache(max_size=4)
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_eviction():
+    """测试超出容量时淘汰最久未使用的条目"""
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_ttl_expiration():
+    """测试TTL过期"""
+    cache = LRUCache(max_size=2, ttl=0.05)
+    cache.put("a", 1)
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+class ConstantEncoder:
+    """所有文本都编码为同一个常量向量，用于区分不同的编码器"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def encode(self, texts, **kwargs):
+        return np.full((len(texts), 2), self.value, dtype=np.float32)
+
+
+def test_embedding_cache_is_keyed_by_encoder(monkeypatch):
+    """测试切换编码后端/量化方式后不会命中其他编码器缓存的向量"""
+    from faq_retrieval.config import config
+    from faq_retrieval.services.model_manager import model_manager
+
+    monkeypatch.setattr(model_manager, "embedding_cache", LRUCache(max_size=8))
+    monkeypatch.setattr(model_manager, "batch_scheduler", None)
+    monkeypatch.setattr(model_manager, "_local_model_path", "/models/text2vec")
+
+    torch_namespace = model_manager._embedding_cache_namespace("torch")
+    assert torch_namespace != model_manager._embedding_cache_namespace("torch-int8")
+    monkeypatch.setattr(config, "ONNX_QUANTIZED", True)
+    onnx_int8_namespace = model_manager._embedding_cache_namespace("onnx")
+    monkeypatch.setattr(config, "ONNX_QUANTIZED", False)
+    assert onnx_int8_namespace != model_manager._embedding_cache_namespace("onnx")
+
+    monkeypatch.setattr(model_manager, "model", ConstantEncoder(1.0))
+    monkeypatch.setattr(model_manager, "cache_namespace", torch_namespace)
+    assert model_manager.generate_embeddings(["你好"])[0, 0] == 1.0
+
+    monkeypatch.setattr(model_manager, "model", ConstantEncoder(2.0))
+    monkeypatch.setattr(model_manager, "cache_namespace", onnx_int8_namespace)
+    assert model_manager.generate_embeddings(["你好"])[0, 0] == 2.0
+    assert model_manager.embedding_cache.get_stats()["hits"] == 0
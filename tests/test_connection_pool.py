@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+测试数据库连接池
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.database import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    """模拟数据库连接"""
+
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("connection lost")
+
+    def close(self):
+        self.closed = True
+
+
+def test_connections_are_reused():
+    """测试归还的连接会被复用"""
+    pool = ConnectionPool(FakeConnection, max_size=2)
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    assert pool.get_stats()["created"] == 1
+
+
+def test_acquire_times_out_when_exhausted():
+    """测试连接耗尽时等待超时"""
+    pool = ConnectionPool(FakeConnection, max_size=1, wait_timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.get_stats()["timeouts"] == 1
+
+
+def test_stale_connection_is_replaced():
+    """测试探活失败的连接被丢弃并新建连接"""
+    pool = ConnectionPool(FakeConnection, max_size=1, ping_interval=0)
+    stale = pool.acquire()
+    stale.alive = False
+    pool.release(stale)
+
+    fresh = pool.acquire()
+    assert fresh is not stale
+    assert stale.closed
+    assert pool.get_stats()["ping_failures"] == 1
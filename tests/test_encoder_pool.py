@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+测试编码进程池：多进程编码结果与顺序、工作进程崩溃后自动重启
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.encoder_pool import EncoderWorkerError, EncoderWorkerPool
+
+
+class FakeEncoder:
+    """按文本长度生成向量；遇到"crash"时模拟进程崩溃"""
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        if "crash" in texts:
+            os._exit(1)
+        return np.array([[len(text), os.getpid()] for text in texts], dtype=np.float32)
+
+
+def fake_factory(backend, num_threads):
+    return FakeEncoder()
+
+
+@pytest.fixture
+def pool():
+    pool = EncoderWorkerPool("fake", num_workers=2, request_timeout=10, start_timeout=30,
+                             factory=fake_factory)
+    assert pool.start()
+    yield pool
+    pool.close()
+
+
+def test_encode_in_worker_processes(pool):
+    embeddings = pool.encode(["a", "abc", "ab"])
+    assert pool.get_sentence_embedding_dimension() == 2
+    assert embeddings[:, 0].tolist() == [1, 3, 2]
+    assert int(embeddings[0, 1]) in pool.get_stats()["pids"]
+    assert int(embeddings[0, 1]) != os.getpid()
+
+
+def test_crashed_worker_is_restarted(pool):
+    with pytest.raises(EncoderWorkerError):
+        pool.encode(["crash"])
+
+    deadline = time.time() + 30
+    while pool.get_stats()["restarts"] < 1 and time.time() < deadline:
+        time.sleep(0.1)
+
+    stats = pool.get_stats()
+    assert stats["restarts"] == 1
+    assert stats["alive"] == 2
+    assert stats["errors"] == 1
+    for _ in range(4):
+        assert pool.encode(["abcd"])[0, 0] == 4
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+测试FAQ业务服务（NumPy后端 + 内存仓库，不需要MySQL、Qdrant和模型）
+"""
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.config import config
+from faq_retrieval.services.model_manager import model_manager
+
+SAMPLE_FAQS = [
+    {"id": "1", "question": "如何维修电脑？", "answer": "找售后人员进行维修"},
+    {"id": "2", "question": "忘记密码怎么办？", "answer": "联系管理员重置密码"},
+    {"id": "3", "question": "网络连不上怎么办？", "answer": "重启路由器"},
+]
+
+
+class FakeRepository:
+    """内存中的FAQ仓库"""
+
+    def __init__(self, faqs):
+        self.faqs = {faq["id"]: dict(faq) for faq in faqs}
+
+    def get_all_faqs(self):
+        return [dict(faq) for faq in self.faqs.values()]
+
+    def iter_faq_chunks(self, chunk_size=500):
+        faqs = self.get_all_faqs()
+        for start in range(0, len(faqs), chunk_size):
+            yield faqs[start:start + chunk_size]
+
+    def add_faq(self, faq_id, question, answer):
+        self.faqs[faq_id] = {"id": faq_id, "question": question, "answer": answer}
+        return True
+
+    def add_faqs_bulk(self, faqs):
+        """与MySQL一致：id列为varchar，问题超长的行写入失败"""
+        result = {"written": [], "failed": []}
+        for faq in faqs:
+            if len(faq["question"]) > 100:
+                result["failed"].append({"id": faq["id"], "error": "Data too long for column 'question'"})
+                continue
+            self.add_faq(str(faq["id"]), faq["question"], faq["answer"])
+            result["written"].append(faq["id"])
+        return result
+
+
+def fake_embeddings(texts, batch_size=32, use_cache=True):
+    """按文本哈希生成确定的单位向量"""
+    rows = []
+    for text in texts:
+        seed = int.from_bytes(hashlib.md5(text.encode("utf-8")).digest()[:4], "little")
+        vector = np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+        rows.append(vector / np.linalg.norm(vector))
+    return np.stack(rows)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    from faq_retrieval.services.faq_service import FAQService
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(model_manager, "is_model_loaded", lambda: True)
+    monkeypatch.setattr(model_manager, "generate_embeddings", fake_embeddings)
+    faq_service = FAQService()
+    faq_service.faq_repo = FakeRepository(SAMPLE_FAQS)
+    assert faq_service.vector_service.recreate_collection(16)
+    assert faq_service.vector_service.upsert_points(
+        SAMPLE_FAQS, fake_embeddings([faq["question"] for faq in SAMPLE_FAQS])
+    )
+    assert faq_service.refresh_exact_match_index()
+    return faq_service
+
+
+def test_batch_search_splits_shared_encode_time_across_queries(service, monkeypatch):
+    def slow_embeddings(texts, batch_size=32, use_cache=True):
+        time.sleep(0.2)
+        return fake_embeddings(texts)
+
+    monkeypatch.setattr(model_manager, "generate_embeddings", slow_embeddings)
+    queries = [
+        {"text": "如何维修电脑？", "limit": 3, "similarity": 0.0},
+        {"text": "打印机卡纸了", "limit": 3, "similarity": -1.0},
+        {"text": "投影仪没有信号", "limit": 3, "similarity": -1.0},
+    ]
+    result = service.search_faqs_batch(queries)
+
+    assert result["success"]
+    exact, first, second = result["results"]
+    assert exact["exact_match"] and exact["execution_time"] < 0.1 and "timing" not in exact
+    assert result["timing"]["encoded_queries"] == 2 and result["timing"]["encode"] >= 0.2
+    for encoded in (first, second):
+        assert len(encoded["results"]) == 3
+        # 每条查询只计入一半的编码耗时，而不是整批的耗时
+        assert encoded["timing"]["encode_share"] == pytest.approx(result["timing"]["encode"] / 2, abs=1e-3)
+        assert encoded["timing"]["encode_share"] <= encoded["execution_time"] < result["timing"]["encode"]
+
+
+def test_exact_match_index_not_marked_built_when_load_fails(service, monkeypatch):
+    def broken_iter_points(*args, **kwargs):
+        raise ConnectionError("vector store unavailable")
+        yield
+
+    service.exact_match_index.invalidate()
+    monkeypatch.setattr(service.vector_service, "iter_points", broken_iter_points)
+    assert not service.refresh_exact_match_index()
+    assert not service.exact_match_index.is_built
+
+    result = service.search_faqs("如何维修电脑？", limit=1)
+    assert result["success"] and not result["exact_match"]
+
+
+def test_exact_match_index_reloads_after_ttl(service, monkeypatch):
+    # 其他进程直接写入向量库的FAQ，本进程的索引过期后才能看到
+    faq = {"id": "4", "question": "打印机卡纸了", "answer": "打开后盖取出纸张"}
+    assert service.vector_service.upsert_points([faq], fake_embeddings([faq["question"]]))
+    assert service.exact_match_index.lookup(faq["question"]) is None
+
+    monkeypatch.setattr(config, "EXACT_MATCH_INDEX_TTL", 0.01)
+    time.sleep(0.02)
+    service.start_exact_match_refresh()
+    deadline = time.time() + 5
+    while service.exact_match_index.lookup(faq["question"]) is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert service.exact_match_index.lookup(faq["question"])[0]["faq_id"] == "4"
+
+
+def test_numpy_store_hydrates_from_mysql_and_gates_readiness(monkeypatch):
+    from faq_retrieval.api import routes
+    from faq_retrieval.app import create_app
+    from faq_retrieval.services.faq_service import FAQService
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(config, "NUMPY_SNAPSHOT_NAME", "")
+    monkeypatch.setattr(model_manager, "is_model_loaded", lambda: True)
+    monkeypatch.setattr(model_manager, "generate_embeddings", fake_embeddings)
+    monkeypatch.setattr(model_manager, "get_embedding_dimension", lambda: 16)
+    faq_service = FAQService()
+    faq_service.faq_repo = FakeRepository(SAMPLE_FAQS)
+    monkeypatch.setattr(routes, "_faq_service", faq_service)
+    client = create_app(preload_model=False).test_client()
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["checks"]["hydration"] == "pending"
+
+    assert faq_service.hydrate_vector_store()["success"]
+    assert faq_service.vector_service.get_collection_info()["points_count"] == len(SAMPLE_FAQS)
+    assert faq_service.exact_match_index.lookup("忘记密码怎么办")[0]["faq_id"] == "2"
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["checks"]["hydration"] == "loaded"
+
+
+def test_add_faq_invalidates_cached_search_results(service):
+    query = "打印机卡纸了"
+    first = service.search_faqs(query, limit=5, similarity_threshold=-1.0, exact_match=False)
+    assert not first["cached"] and len(first["results"]) == 3
+    assert service.search_faqs(query, limit=5, similarity_threshold=-1.0, exact_match=False)["cached"]
+
+    assert service.add_single_faq("4", query, "打开后盖取出纸张")["success"]
+    after = service.search_faqs(query, limit=5, similarity_threshold=-1.0, exact_match=False)
+    assert not after["cached"]
+    assert [faq["faq_id"] for faq in after["results"]][0] == "4"
+
+
+def test_numpy_store_with_empty_database_becomes_ready(monkeypatch):
+    from faq_retrieval.api import routes
+    from faq_retrieval.app import create_app
+    from faq_retrieval.services.faq_service import FAQService
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(config, "NUMPY_SNAPSHOT_NAME", "")
+    monkeypatch.setattr(model_manager, "is_model_loaded", lambda: True)
+    faq_service = FAQService()
+    faq_service.faq_repo = FakeRepository([])
+    monkeypatch.setattr(routes, "_faq_service", faq_service)
+    client = create_app(preload_model=False).test_client()
+
+    assert faq_service.hydrate_vector_store()["success"]
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["checks"]["hydration"] == "loaded"
+
+
+def test_version_bump_in_one_worker_invalidates_another(tmp_path, monkeypatch):
+    from faq_retrieval.services.faq_service import FAQService
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(config, "SHARED_STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(model_manager, "is_model_loaded", lambda: True)
+    monkeypatch.setattr(model_manager, "generate_embeddings", fake_embeddings)
+    # 两个FAQService实例各自持有进程内状态，模拟两个工作进程
+    writer, reader = FAQService(), FAQService()
+    for service in (writer, reader):
+        service.faq_repo = FakeRepository(SAMPLE_FAQS)
+        service.vector_service.recreate_collection(16)
+        service.vector_service.upsert_points(SAMPLE_FAQS, fake_embeddings([f["question"] for f in SAMPLE_FAQS]))
+
+    query = "电脑坏了找谁"
+    first = reader.search_faqs(query, limit=2, similarity_threshold=-1.0, exact_match=False)
+    assert not first["cached"]
+    assert reader.search_faqs(query, limit=2, similarity_threshold=-1.0, exact_match=False)["cached"]
+
+    assert writer.add_single_faq("4", "打印机卡纸了", "打开后盖取出纸张")["success"]
+    assert not reader.search_faqs(query, limit=2, similarity_threshold=-1.0, exact_match=False)["cached"]
+    assert reader._collection_version == writer._collection_version
+
+
+def test_incremental_sync_reencodes_only_changed_faqs(service, monkeypatch):
+    encoded = []
+
+    def tracking_embeddings(texts, batch_size=32, use_cache=True):
+        encoded.extend(texts)
+        return fake_embeddings(texts)
+
+    monkeypatch.setattr(model_manager, "generate_embeddings", tracking_embeddings)
+    repo = service.faq_repo
+    repo.faqs["2"]["answer"] = "在登录页点击“忘记密码”自助重置"
+    del repo.faqs["3"]
+    repo.add_faq("4", "打印机卡纸了", "打开后盖取出纸张")
+
+    result = service.initialize_full_data(incremental=True)
+    assert result["success"]
+    assert (result["added_count"], result["updated_count"], result["deleted_count"], result["unchanged_count"]) == (1, 1, 1, 1)
+    assert sorted(encoded) == ["忘记密码怎么办？", "打印机卡纸了"]
+
+    stored = {payload["faq_id"]: payload for _, _, payloads in service.vector_service.iter_points(with_vectors=False)
+              for payload in payloads}
+    assert sorted(stored) == ["1", "2", "4"]
+    assert stored["2"]["answer"] == "在登录页点击“忘记密码”自助重置"
+
+    encoded.clear()
+    result = service.initialize_full_data(incremental=True)
+    assert result["success"] and result["unchanged_count"] == 3 and not encoded
+
+
+def test_bulk_add_reports_invalid_and_failed_rows(service):
+    result = service.add_faqs_bulk([
+        {"id": "4", "question": "打印机卡纸了", "answer": "打开后盖取出纸张"},
+        {"id": "5", "question": "", "answer": "缺少问题"},
+        {"id": True, "question": "布尔ID", "answer": "不是合法ID"},
+        "not a dict",
+        {"id": "6", "question": "长" * 101, "answer": "数据库拒绝"},
+        {"id": 7, "question": "投影仪没有信号", "answer": "检查视频线"},
+    ])
+
+    assert not result["success"] and result["added"] == 2
+    assert [failure["index"] for failure in result["failed"]] == [1, 2, 3, 4]
+    assert "too long" in result["failed"][3]["error"]
+    assert service.exact_match_index.lookup("投影仪没有信号")[0]["faq_id"] == "7"
+
+
+def test_bulk_add_with_int_ids_is_stable_under_incremental_sync(service):
+    assert service.add_faqs_bulk([{"id": 5, "question": "打印机卡纸了", "answer": "打开后盖取出纸张"}])["success"]
+
+    result = service.initialize_full_data(incremental=True)
+    assert result["success"]
+    assert (result["added_count"], result["updated_count"], result["deleted_count"], result["unchanged_count"]) == (0, 0, 0, 4)
+    stored = [payload["faq_id"] for _, _, payloads in service.vector_service.iter_points(with_vectors=False)
+              for payload in payloads]
+    assert sorted(stored) == ["1", "2", "3", "5"]
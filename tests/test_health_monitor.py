@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+测试健康状态后台刷新器：接口读取快照不触发完整检查，deep检查会更新快照
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.health_monitor import HealthMonitor
+
+
+class CountingStatus:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"success": True, "calls": self.calls}
+
+
+def test_snapshot_reads_do_not_run_checks():
+    status_fn = CountingStatus()
+    monitor = HealthMonitor(status_fn, interval=60, stale_after=120)
+    try:
+        snapshots = [monitor.get_snapshot() for _ in range(50)]
+        assert status_fn.calls == 1
+        assert all(snapshot["success"] for snapshot in snapshots)
+        assert snapshots[-1]["age_seconds"] >= 0
+        assert snapshots[-1]["stale"] is False
+
+        monitor.refresh()
+        assert status_fn.calls == 2
+        assert monitor.get_snapshot()["calls"] == 2
+    finally:
+        monitor.stop()
+
+
+def test_failed_check_and_stale_snapshot():
+    def failing():
+        raise RuntimeError("mysql down")
+
+    monitor = HealthMonitor(failing, interval=60, stale_after=0.05)
+    try:
+        snapshot = monitor.get_snapshot()
+        assert snapshot["success"] is False
+        assert "mysql down" in snapshot["message"]
+        time.sleep(0.1)
+        assert monitor.get_snapshot()["stale"] is True
+        assert monitor.get_stats()["failures"] >= 1
+    finally:
+        monitor.stop()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+测试流式建库流水线：有界队列下完整写入、取消时抛出PipelineCancelled、任一阶段失败时把异常抛给调用方且不会卡住
+"""
+import itertools
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.index_pipeline import IndexingPipeline, PipelineCancelled
+
+
+def make_chunks(count=None, size=2):
+    """count为None时无限生成分块（读取阶段不会自己结束）"""
+    for n in itertools.count() if count is None else range(count):
+        yield [{"id": f"{n}-{i}", "question": f"问题{n}-{i}"} for i in range(size)]
+
+
+def encode(questions):
+    return np.ones((len(questions), 4), dtype=np.float32)
+
+
+def run_pipeline(pipeline, timeout=10):
+    """在后台线程运行流水线，超时未结束视为卡住"""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = pipeline.run()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline did not stop"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def test_pipeline_upserts_every_chunk():
+    upserted = []
+    pipeline = IndexingPipeline(make_chunks(5), encode, lambda chunk, embeddings: upserted.extend(chunk) or True,
+                                queue_size=1)
+    summary = run_pipeline(pipeline)
+
+    assert summary["chunks"] == 5
+    assert summary["rows_read"] == summary["rows_encoded"] == summary["rows_upserted"] == 10
+    assert len(upserted) == 10
+
+
+def test_cancel_raises_pipeline_cancelled():
+    cancel_event = threading.Event()
+    pipeline = IndexingPipeline(make_chunks(), encode, lambda chunk, embeddings: True, queue_size=1,
+                                on_chunk=lambda chunk: cancel_event.set(), cancel_event=cancel_event)
+    with pytest.raises(PipelineCancelled):
+        run_pipeline(pipeline)
+    assert pipeline.stats["rows_upserted"] == 2
+
+
+def test_encode_stage_error_reaches_caller():
+    calls = itertools.count()
+
+    def failing_encode(questions):
+        if next(calls) == 1:
+            raise ValueError("encoder crashed")
+        return encode(questions)
+
+    pipeline = IndexingPipeline(make_chunks(), failing_encode, lambda chunk, embeddings: True, queue_size=1)
+    with pytest.raises(ValueError, match="encoder crashed"):
+        run_pipeline(pipeline)
+
+
+def test_upsert_failure_stops_upstream_stages():
+    pipeline = IndexingPipeline(make_chunks(), encode, lambda chunk, embeddings: False, queue_size=1)
+    with pytest.raises(RuntimeError, match="upsert"):
+        run_pipeline(pipeline)
+    assert pipeline.stats["rows_upserted"] == 0
+
+
+def test_read_stage_error_reaches_caller():
+    def broken_chunks():
+        yield from make_chunks(1)
+        raise ConnectionError("MySQL connection lost")
+
+    pipeline = IndexingPipeline(broken_chunks(), encode, lambda chunk, embeddings: True, queue_size=1)
+    with pytest.raises(ConnectionError):
+        run_pipeline(pipeline)
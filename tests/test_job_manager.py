@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+测试后台初始化任务：同一时间只允许一个任务、运行中取消、进度上报、历史任务数量上限
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.job_manager import InitializationJob, JobConflictError, JobManager
+
+
+class SteppedService:
+    """按分块写入的FAQ服务替身，每写完一块等待测试放行下一块"""
+
+    CHUNKS = 4
+    CHUNK_SIZE = 25
+
+    def __init__(self, blocking=True):
+        self.blocking = blocking
+        self._lock = threading.Lock()
+        self.faq_repo = self
+        self.chunk_done = threading.Semaphore(0)
+        self.next_chunk = threading.Semaphore(0)
+
+    def get_faq_count(self):
+        return self.CHUNKS * self.CHUNK_SIZE
+
+    def try_begin_initialization(self):
+        return self._lock.acquire(blocking=False)
+
+    def initialize_full_data(self, cancel_event=None, progress=None, lock_held=False, **kwargs):
+        try:
+            for _ in range(self.CHUNKS):
+                if cancel_event.is_set():
+                    return {"success": False, "message": "cancelled"}
+                for key in ("rows_read", "rows_encoded", "rows_upserted"):
+                    progress[key] += self.CHUNK_SIZE
+                if self.blocking:
+                    self.chunk_done.release()
+                    assert self.next_chunk.acquire(timeout=5)
+            return {"success": True, "message": "done"}
+        finally:
+            self._lock.release()
+
+
+def wait_finished(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.is_active and time.time() < deadline:
+        time.sleep(0.01)
+    assert not job.is_active
+
+
+def test_second_start_is_rejected_while_a_job_runs():
+    service = SteppedService()
+    manager = JobManager(service)
+    job = manager.start_initialization()
+    assert service.chunk_done.acquire(timeout=5)
+
+    with pytest.raises(JobConflictError):
+        manager.start_initialization()
+
+    for _ in range(SteppedService.CHUNKS):
+        service.next_chunk.release()
+    wait_finished(job)
+    assert job.status == InitializationJob.SUCCEEDED
+    # 上一个任务结束后可以再次启动
+    service.blocking = False
+    wait_finished(manager.start_initialization())
+
+
+def test_cancel_stops_job_between_chunks_and_reports_progress():
+    service = SteppedService()
+    manager = JobManager(service)
+    job = manager.start_initialization(recreate_collection=False)
+    assert service.chunk_done.acquire(timeout=5)
+
+    status = manager.get_job(job.job_id).to_dict()
+    assert status["status"] == InitializationJob.RUNNING
+    assert status["params"] == {"recreate_collection": False, "incremental": False}
+    assert status["progress"]["rows_total"] == 100
+    assert status["progress"]["rows_upserted"] == 25
+    assert status["progress"]["eta_seconds"] is not None
+
+    assert manager.cancel(job.job_id).to_dict()["cancel_requested"]
+    service.next_chunk.release()
+    wait_finished(job)
+
+    status = job.to_dict()
+    assert status["status"] == InitializationJob.CANCELLED
+    assert status["progress"]["rows_upserted"] == 25 and status["progress"]["eta_seconds"] is None
+    assert status["finished_at"] is not None
+
+
+def test_failed_initialization_is_reported():
+    class FailingService(SteppedService):
+        def initialize_full_data(self, **kwargs):
+            self._lock.release()
+            raise RuntimeError("MySQL unavailable")
+
+    manager = JobManager(FailingService())
+    job = manager.start_initialization()
+    wait_finished(job)
+    assert job.status == InitializationJob.FAILED
+    assert job.result == {"success": False, "message": "MySQL unavailable"}
+
+
+def test_job_history_keeps_most_recent_jobs():
+    manager = JobManager(SteppedService(blocking=False), history_size=2)
+    jobs = []
+    for _ in range(3):
+        job = manager.start_initialization()
+        wait_finished(job)
+        jobs.append(job)
+
+    assert [job.job_id for job in manager.list_jobs()] == [jobs[2].job_id, jobs[1].job_id]
+    assert manager.get_job(jobs[0].job_id) is None
+    assert manager.cancel("unknown") is None
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+测试监控指标：直方图累计分桶、Prometheus文本格式输出、/metrics接口按路由统计请求
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.metrics import MetricsRegistry, _Metric
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_latency_seconds", "Test latency", ("stage",), buckets=(0.01, 0.1, 1))
+    for value in (0.005, 0.05, 0.05, 5):
+        latency.labels("encode").observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_latency_seconds histogram" in lines
+    assert 'test_latency_seconds_bucket{stage="encode",le="0.01"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="encode",le="0.1"} 3' in lines
+    assert 'test_latency_seconds_bucket{stage="encode",le="1"} 3' in lines
+    assert 'test_latency_seconds_bucket{stage="encode",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{stage="encode"} 4' in lines
+
+
+def test_counter_and_gauge():
+    registry = MetricsRegistry()
+    requests_total = registry.counter("test_requests_total", "Test requests", ("route",))
+    requests_total.labels("/search").inc()
+    requests_total.labels("/search").inc(2)
+    queue_depth = registry.gauge("test_queue_depth", "Test queue depth")
+    queue_depth.set_function(lambda: 7)
+
+    text = registry.render()
+    assert 'test_requests_total{route="/search"} 3' in text
+    assert "test_queue_depth 7" in text
+    with pytest.raises(ValueError):
+        requests_total.inc()
+    with pytest.raises(ValueError):
+        registry.counter("test_requests_total", "Duplicate")
+
+
+def test_metric_subclass_must_implement_samples():
+    class Incomplete(_Metric):
+        def _new_child(self):
+            return object()
+
+    with pytest.raises(TypeError):
+        Incomplete("test_incomplete", "Missing _samples")
+
+
+def test_metrics_endpoint_counts_requests_per_route():
+    from faq_retrieval.app import create_app
+
+    client = create_app(preload_model=False).test_client()
+    assert client.get("/livez").status_code == 200
+    assert client.get("/no-such-endpoint").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert 'faq_http_requests_total{method="GET",route="/livez",status="200"}' in text
+    assert 'faq_http_requests_total{method="GET",route="unmatched",status="404"}' in text
+    assert 'faq_http_request_duration_seconds_bucket{method="GET",route="/livez",le="+Inf"}' in text
+    assert "# TYPE faq_stage_duration_seconds histogram" in text
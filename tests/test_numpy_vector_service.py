@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试进程内NumPy向量检索后端
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.numpy_vector_service import NumpyVectorService
+
+SAMPLE_FAQS = [
+    {"id": "1", "question": "如何维修电脑？", "answer": "找售后人员进行维修"},
+    {"id": "2", "question": "忘记密码怎么办？", "answer": "联系管理员重置密码"},
+    {"id": "3", "question": "网络连不上怎么办？", "answer": "重启路由器"},
+]
+
+
+def _make_service():
+    service = NumpyVectorService()
+    service.recreate_collection(3)
+    embeddings = np.eye(3, dtype=np.float32)
+    assert service.upsert_points(SAMPLE_FAQS, embeddings)
+    return service
+
+
+def test_search_returns_top_k_in_score_order():
+    """测试返回按相似度排序的top-k结果"""
+    service = _make_service()
+    results = service.search_similar(np.array([0.1, 0.9, 0.3]), limit=2)
+
+    assert [r["faq_id"] for r in results] == ["2", "3"]
+    assert results[0]["score"] > results[1]["score"]
+    assert results[0]["answer"] == "联系管理员重置密码"
+
+
+def test_score_threshold_filters_results():
+    """测试相似度阈值过滤"""
+    service = _make_service()
+    results = service.search_similar(np.array([1.0, 0.0, 0.0]), limit=5, score_threshold=0.5)
+
+    assert [r["faq_id"] for r in results] == ["1"]
+    assert abs(results[0]["score"] - 1.0) < 1e-6
+
+
+def test_upsert_overwrites_existing_id_and_appends_new():
+    """测试按FAQ ID覆盖已有点并追加新点"""
+    service = _make_service()
+    service.upsert_single_point(
+        {"id": "1", "question": "电脑坏了怎么办？", "answer": "联系技术支持"},
+        np.array([0.0, 0.0, 1.0])
+    )
+    service.upsert_single_point(
+        {"id": "4", "question": "如何重装系统？", "answer": "使用恢复分区"},
+        np.array([1.0, 0.0, 0.0])
+    )
+
+    assert service.get_collection_info()["points_count"] == 4
+    results = service.search_similar(np.array([1.0, 0.0, 0.0]), limit=1)
+    assert results[0]["faq_id"] == "4"
+
+
+def test_commit_reindex_keeps_previous_collections_for_rollback(monkeypatch):
+    from faq_retrieval.config import config
+
+    monkeypatch.setattr(config, "QDRANT_KEEP_OLD_COLLECTIONS", 3)
+    service = NumpyVectorService()
+    names = []
+    for faq in SAMPLE_FAQS:
+        shadow = service.begin_reindex(3)
+        assert service.upsert_points([faq], np.eye(3, dtype=np.float32)[:1], collection_name=shadow)
+        assert service.commit_reindex(shadow)
+        names.append(shadow)
+
+    # 保留数大于已有旧集合数时不能丢弃任何旧集合
+    assert service.rollback_collection() == names[1]
+    assert [p["faq_id"] for p in service.get_all_points()] == ["2"]
+    assert service.rollback_collection() == names[0]
+    assert [p["faq_id"] for p in service.get_all_points()] == ["1"]
+
+
+def test_commit_reindex_without_retention_drops_old_collections(monkeypatch):
+    from faq_retrieval.config import config
+
+    monkeypatch.setattr(config, "QDRANT_KEEP_OLD_COLLECTIONS", 0)
+    service = _make_service()
+    assert service.recreate_collection(3)
+    assert service.rollback_collection() is None
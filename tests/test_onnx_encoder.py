@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+测试编码后端一致度统计与ONNX编码器的池化
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.onnx_encoder import OnnxEncoder, cosine_agreement, top_k_overlap
+
+
+def test_cosine_agreement_identical_vectors():
+    vectors = np.random.default_rng(0).standard_normal((10, 8)).astype(np.float32)
+    agreement = cosine_agreement(vectors, vectors * 2.0)
+    assert agreement["count"] == 10
+    assert agreement["min"] > 0.9999
+
+
+def test_cosine_agreement_detects_drift():
+    rng = np.random.default_rng(1)
+    reference = rng.standard_normal((50, 8)).astype(np.float32)
+    candidate = reference + rng.standard_normal((50, 8)).astype(np.float32)
+    agreement = cosine_agreement(reference, candidate)
+    assert agreement["mean"] < 0.9
+    assert agreement["min"] <= agreement["p05"] <= agreement["mean"]
+
+
+def test_top_k_overlap():
+    vectors = np.random.default_rng(2).standard_normal((20, 8)).astype(np.float32)
+    assert top_k_overlap(vectors, vectors, k=5) == 1.0
+    assert top_k_overlap(vectors[:5], vectors[:5], k=5) is None
+
+
+def test_mean_pooling_ignores_padding():
+    encoder = OnnxEncoder.__new__(OnnxEncoder)
+    encoder.encoder_config = {"pooling": "mean"}
+    hidden = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]], dtype=np.float32)
+    attention_mask = np.array([[1, 1, 0]])
+    assert np.allclose(encoder._pool(hidden, attention_mask), [[2.0, 2.0]])
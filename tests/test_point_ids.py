@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+测试Qdrant点ID的确定性，以及批量上传何时使用多进程
+"""
+import sys
+import uuid
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.services.qdrant_service import stable_point_id
+
+
+def test_stable_point_id_is_valid_uuid():
+    point_id = stable_point_id("faq_001")
+    assert uuid.UUID(point_id).version == 5
+    assert stable_point_id("faq_002") != point_id
+
+
+def test_stable_point_id_is_pinned():
+    # 点ID写入持久化的集合中，命名空间变化会导致所有FAQ产生重复点
+    assert stable_point_id("faq_001") == "5d155aaf-5553-5606-b820-8668ba343f71"
+
+
+def test_stable_point_id_treats_int_and_str_ids_alike():
+    assert stable_point_id(42) == stable_point_id("42")
+
+
+def test_upload_uses_process_pool_only_for_large_writes(monkeypatch):
+    import numpy as np
+    from faq_retrieval.config import config
+    from faq_retrieval.services.qdrant_service import QdrantService
+
+    calls = []
+
+    class RecordingClient:
+        def upload_collection(self, **kwargs):
+            calls.append(kwargs["parallel"])
+
+    monkeypatch.setattr(config, "QDRANT_UPLOAD_PARALLEL", 4)
+    monkeypatch.setattr(config, "QDRANT_UPLOAD_BATCH_SIZE", 10)
+    monkeypatch.setattr(config, "QDRANT_UPLOAD_PARALLEL_MIN_POINTS", 100)
+    service = QdrantService()
+    service.client = RecordingClient()
+    for points in (1, 99, 100):
+        service._upload(list(range(points)), np.zeros((points, 2)), [{}] * points)
+    assert calls == [1, 1, 4]
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+测试请求分阶段计时与采样剖析：微批编码耗时计入批内请求、采样剖析能看到繁忙线程的调用栈、剖析接口默认关闭且需管理权限
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval import profiler, timing
+from faq_retrieval.services.batch_scheduler import MicroBatchScheduler
+
+
+def fake_encode(texts):
+    timing.record("tokenize", 0.001)
+    return np.ones((len(texts), 2), dtype=np.float32)
+
+
+def test_stages_recorded_only_when_enabled():
+    with timing.stage("normalize"):
+        pass
+    assert timing.current() is None
+
+    request_timing = timing.RequestTiming()
+    with timing.activate(request_timing):
+        with timing.stage("normalize"):
+            pass
+        timing.record("vector_search", 0.002)
+        timing.record("vector_search", 0.003)
+    assert timing.current() is None
+
+    result = request_timing.to_dict()
+    assert list(result["stages_ms"]) == ["normalize", "vector_search"]
+    assert result["stages_ms"]["vector_search"] == pytest.approx(5.0)
+    assert "vector_search;dur=5.0" in request_timing.server_timing_header()
+
+
+def test_micro_batch_timing_is_credited_once_per_request():
+    scheduler = MicroBatchScheduler(fake_encode, max_batch_size=8, max_wait_ms=20)
+    traced = timing.RequestTiming()
+    with timing.activate(traced):
+        embeddings = scheduler.encode(["a", "b", "c"], timeout=10)
+    untraced = scheduler.encode(["d"], timeout=10)
+
+    assert embeddings.shape == (3, 2) and untraced.shape == (1, 2)
+    stages = traced.to_dict()["stages_ms"]
+    assert stages["tokenize"] == pytest.approx(1.0)
+    assert stages["batch_queue_wait"] >= 0
+
+
+def test_sample_cpu_profile_sees_busy_thread():
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name="busy-worker")
+    worker.start()
+    try:
+        content, stats = profiler.sample_cpu_profile(0.3, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert stats["samples"] > 0
+    lines = content.splitlines()
+    assert any(line.startswith("busy-worker;") and "busy_loop (test_profiling.py" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_only_one_capture_at_a_time():
+    thread = threading.Thread(target=profiler.sample_cpu_profile, args=(0.5,))
+    thread.start()
+    time.sleep(0.1)
+    try:
+        with pytest.raises(profiler.ProfilerBusyError):
+            profiler.sample_cpu_profile(0.1)
+    finally:
+        thread.join()
+
+
+def test_profile_endpoint_requires_opt_in_and_admin_access(monkeypatch):
+    from faq_retrieval.app import create_app
+    from faq_retrieval.config import config
+
+    client = create_app(preload_model=False).test_client()
+    body = {"seconds": 0.05}
+    assert client.post("/api/v1/admin/profile", json=body).status_code == 404
+
+    monkeypatch.setattr(config, "PROFILING_ENABLED", True)
+    remote = {"REMOTE_ADDR": "10.0.0.8"}
+    assert client.post("/api/v1/admin/profile", json=body, environ_base=remote).status_code == 403
+    assert client.post("/api/v1/admin/profile", json=body).status_code == 200
+
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secret")
+    assert client.post("/api/v1/admin/profile", json=body).status_code == 403
+    response = client.post("/api/v1/admin/profile", json=body, environ_base=remote,
+                           headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+测试QdrantService与真实qdrant-client的配合（本地内存模式，不需要Qdrant服务器）
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from qdrant_client import QdrantClient
+
+from faq_retrieval.services.qdrant_service import QdrantService
+
+FAQS = [
+    {"id": "1", "question": "如何维修电脑？", "answer": "找售后人员进行维修"},
+    {"id": "2", "question": "忘记密码怎么办？", "answer": "联系管理员重置密码"},
+    {"id": "3", "question": "网络连不上怎么办？", "answer": "重启路由器"},
+]
+
+
+@pytest.fixture
+def qdrant():
+    service = QdrantService()
+    service.client = QdrantClient(":memory:")
+    assert service.recreate_collection(4)
+    assert service.upsert_points(FAQS, np.eye(3, 4, dtype=np.float32))
+    return service
+
+
+def test_search_batch_returns_results_per_query(qdrant):
+    queries = np.array([[1, 0, 0, 0], [0, 0.1, 1, 0]], dtype=np.float32)
+    results = qdrant.search_batch(queries, limits=[2, 1], score_thresholds=[0.5, 0.5])
+
+    assert results is not None
+    assert [[faq["faq_id"] for faq in result] for result in results] == [["1"], ["3"]]
+    assert results[0][0]["answer"] == "找售后人员进行维修"
+    assert results[0][0]["score"] == pytest.approx(1.0)
+
+
+def test_search_similar_returns_nearest_faq(qdrant):
+    results = qdrant.search_similar(np.array([0, 1, 0.1, 0], dtype=np.float32), limit=2, score_threshold=0.5)
+
+    assert [faq["faq_id"] for faq in results] == ["2"]
+    assert results[0]["question"] == "忘记密码怎么办？"
+
+
+def test_collection_info_reports_alias_target_and_counts(qdrant):
+    info = qdrant.get_collection_info()
+
+    assert info["name"] == qdrant.collection_name
+    assert info["alias_target"].startswith(f"{qdrant.collection_name}__")
+    assert info["points_count"] == info["vectors_count"] == 3
+
+
+def test_upsert_single_point_overwrites_by_faq_id(qdrant):
+    faq = {"id": "2", "question": "密码忘了怎么办？", "answer": "在登录页自助重置"}
+    assert qdrant.upsert_single_point(faq, np.array([0, 0, 0, 1], dtype=np.float32))
+
+    results = qdrant.search_similar(np.array([0, 0, 0, 1], dtype=np.float32), limit=3, score_threshold=0.5)
+    assert [(item["faq_id"], item["answer"]) for item in results] == [("2", "在登录页自助重置")]
+    assert qdrant.get_collection_info()["points_count"] == 3
+
+
+def _faq_ids(qdrant, collection_name=None):
+    points, _ = qdrant.client.scroll(collection_name or qdrant.collection_name, limit=100)
+    return sorted(point.payload["faq_id"] for point in points)
+
+
+def test_commit_reindex_switches_alias_and_keeps_one_old_collection(qdrant, monkeypatch):
+    from faq_retrieval.config import config
+
+    monkeypatch.setattr(config, "QDRANT_KEEP_OLD_COLLECTIONS", 1)
+    first = qdrant.get_alias_target()
+    shadow = qdrant.begin_reindex(4)
+    assert shadow > first
+    assert qdrant.upsert_points(FAQS[:1], np.eye(1, 4, dtype=np.float32), collection_name=shadow)
+    # 重建期间检索仍使用原集合
+    assert _faq_ids(qdrant) == ["1", "2", "3"]
+
+    assert qdrant.commit_reindex(shadow)
+    assert qdrant.get_alias_target() == shadow and _faq_ids(qdrant) == ["1"]
+    assert qdrant.recreate_collection(4)
+    assert first not in qdrant._list_collection_names()
+
+    assert qdrant.rollback_collection() == shadow
+    assert _faq_ids(qdrant) == ["1"]
+
+
+def test_abort_reindex_leaves_live_collection_untouched(qdrant):
+    live = qdrant.get_alias_target()
+    shadow = qdrant.begin_reindex(4)
+    assert qdrant.abort_reindex(shadow)
+
+    assert shadow not in qdrant._list_collection_names()
+    assert qdrant.get_alias_target() == live and _faq_ids(qdrant) == ["1", "2", "3"]
+
+
+def _legacy_service():
+    """旧版部署：数据直接保存在与别名同名的集合中"""
+    service = QdrantService()
+    service.client = QdrantClient(":memory:")
+    service._create_collection(service.collection_name, 4)
+    service._upload([service.point_id_for(faq["id"]) for faq in FAQS], np.eye(3, 4, dtype=np.float32),
+                    [service.build_payload(faq) for faq in FAQS], service.collection_name)
+    return service
+
+
+def test_first_commit_moves_legacy_collection_aside():
+    service = _legacy_service()
+    shadow = service.begin_reindex(4)
+    assert service.upsert_points(FAQS[:1], np.eye(1, 4, dtype=np.float32), collection_name=shadow)
+
+    assert service.commit_reindex(shadow)
+    assert service.get_alias_target() == shadow and _faq_ids(service) == ["1"]
+    # 旧数据保留在排在新集合之前的版本化集合中，可以回滚
+    assert service.rollback_collection() is not None
+    assert _faq_ids(service) == ["1", "2", "3"]
+
+
+def test_legacy_data_survives_failed_alias_creation(monkeypatch):
+    service = _legacy_service()
+    shadow = service.begin_reindex(4)
+
+    def broken_update(**kwargs):
+        raise ConnectionError("Qdrant went away")
+
+    monkeypatch.setattr(service.client, "update_collection_aliases", broken_update)
+    assert not service.commit_reindex(shadow)
+    assert service.abort_reindex(shadow)
+    monkeypatch.undo()
+
+    assert service.ensure_collection_exists(4)
+    assert service.get_alias_target() is not None
+    assert _faq_ids(service) == ["1", "2", "3"]
+
+
+def test_faq_added_in_another_worker_during_rebuild_reaches_shadow(qdrant, tmp_path, monkeypatch):
+    from faq_retrieval.config import config
+    from faq_retrieval.services.faq_service import FAQService
+    from faq_retrieval.services.model_manager import model_manager
+
+    class Repository:
+        def add_faq(self, faq_id, question, answer):
+            return True
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "qdrant")
+    monkeypatch.setattr(config, "SHARED_STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(model_manager, "is_model_loaded", lambda: True)
+    monkeypatch.setattr(model_manager, "generate_embeddings",
+                        lambda texts, **kwargs: np.tile(np.array([0, 0, 0, 1], dtype=np.float32), (len(texts), 1)))
+    # 两个FAQService实例模拟两个工作进程，连接同一个Qdrant
+    rebuilding, other = FAQService(), FAQService()
+    for service in (rebuilding, other):
+        service.vector_service.client = qdrant.client
+        service.faq_repo = Repository()
+
+    shadow = rebuilding.vector_service.begin_reindex(4)
+    rebuilding._set_reindex_shadow(shadow)
+    assert other.add_single_faq("4", "打印机卡纸了", "打开后盖取出纸张")["success"]
+    assert rebuilding.vector_service.commit_reindex(shadow)
+    rebuilding._set_reindex_shadow(None)
+
+    assert _faq_ids(qdrant) == ["4"]
+    assert other._current_reindex_shadow() is None
+
+
+def _record_calls(monkeypatch, client, *method_names):
+    """记录客户端方法的关键字参数，调用仍交给真实客户端"""
+    calls = {name: [] for name in method_names}
+    for name in method_names:
+        original = getattr(client, name)
+
+        def recorder(*args, _name=name, _original=original, **kwargs):
+            calls[_name].append(kwargs)
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(client, name, recorder)
+    return calls
+
+
+@pytest.fixture
+def quantized_config(monkeypatch):
+    from faq_retrieval.config import config
+
+    for name, value in {"QDRANT_HNSW_M": 32, "QDRANT_HNSW_EF_CONSTRUCT": 200, "QDRANT_VECTORS_ON_DISK": True,
+                        "QDRANT_SCALAR_QUANTIZATION": True, "QDRANT_QUANTIZATION_QUANTILE": 0.95,
+                        "QDRANT_QUANTIZATION_ALWAYS_RAM": False, "QDRANT_QUANTIZATION_RESCORE": False,
+                        "QDRANT_QUANTIZATION_OVERSAMPLING": 3.0, "QDRANT_SEARCH_HNSW_EF": 64}.items():
+        monkeypatch.setattr(config, name, value)
+    return config
+
+
+def test_create_collection_passes_hnsw_and_quantization_config(quantized_config, monkeypatch):
+    service = QdrantService()
+    service.client = QdrantClient(":memory:")
+    calls = _record_calls(monkeypatch, service.client, "create_collection")
+    assert service.recreate_collection(4)
+
+    kwargs = calls["create_collection"][0]
+    assert (kwargs["vectors_config"].size, kwargs["vectors_config"].on_disk) == (4, True)
+    assert (kwargs["hnsw_config"].m, kwargs["hnsw_config"].ef_construct) == (32, 200)
+    scalar = kwargs["quantization_config"].scalar
+    assert (scalar.type, scalar.quantile, scalar.always_ram) == ("int8", 0.95, False)
+
+
+def test_search_params_use_request_values_or_config_defaults(quantized_config):
+    params = QdrantService._search_params(hnsw_ef=256, exact=True)
+    assert (params.hnsw_ef, params.exact) == (256, True)
+    assert (params.quantization.rescore, params.quantization.oversampling) == (False, 3.0)
+
+    params = QdrantService._search_params()
+    assert (params.hnsw_ef, params.exact) == (64, False)
+
+    quantized_config.QDRANT_SCALAR_QUANTIZATION = False
+    assert QdrantService._search_params().quantization is None
+
+
+# 本地模式总是精确检索并对search_params给出警告，这里只检查请求内容
+@pytest.mark.filterwarnings("ignore:Local mode performs exact")
+def test_search_requests_carry_search_params(qdrant, quantized_config, monkeypatch):
+    calls = _record_calls(monkeypatch, qdrant.client, "query_points", "query_batch_points")
+    query = np.array([1, 0, 0, 0], dtype=np.float32)
+
+    assert qdrant.search_similar(query, limit=1, hnsw_ef=128, exact=True)
+    params = calls["query_points"][0]["search_params"]
+    assert (params.hnsw_ef, params.exact, params.quantization.oversampling) == (128, True, 3.0)
+
+    assert qdrant.search_batch(np.stack([query, query]), limits=[1, 1], score_thresholds=[0.0, 0.0],
+                               hnsw_efs=[None, 32], exacts=[False, True])
+    requests = calls["query_batch_points"][0]["requests"]
+    assert [(request.params.hnsw_ef, request.params.exact) for request in requests] == [(64, False), (32, True)]
+    assert all(request.params.quantization.rescore is False for request in requests)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+测试多进程共享状态：跨进程初始化锁、任务状态跨进程查询与取消
+"""
+import multiprocessing
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+pytest.importorskip("fcntl")
+from faq_retrieval.services.job_manager import InitializationJob, JobManager
+from faq_retrieval.services.shared_state import InterProcessLock, SharedState
+
+
+def _hold_lock(path, acquired, release):
+    lock = InterProcessLock(path)
+    assert lock.acquire()
+    acquired.set()
+    release.wait(10)
+
+
+def test_init_lock_excludes_other_processes_and_is_freed_on_exit(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    acquired, release = ctx.Event(), ctx.Event()
+    child = ctx.Process(target=_hold_lock, args=(tmp_path / "init.lock", acquired, release))
+    child.start()
+    try:
+        assert acquired.wait(10)
+        lock = InterProcessLock(tmp_path / "init.lock")
+        assert not lock.acquire()
+    finally:
+        release.set()
+        child.join(10)
+    assert lock.acquire()
+    lock.release()
+
+
+class BlockingService:
+    """初始化一直运行到被取消的FAQ服务替身"""
+
+    def __init__(self, shared_state):
+        self.shared_state = shared_state
+        self._lock = threading.Lock()
+        self.faq_repo = self
+        self.started = threading.Event()
+
+    def get_faq_count(self):
+        return 10
+
+    def try_begin_initialization(self):
+        if not self._lock.acquire(blocking=False):
+            return False
+        if not self.shared_state.init_lock.acquire():
+            self._lock.release()
+            return False
+        return True
+
+    def initialize_full_data(self, cancel_event=None, lock_held=False, **kwargs):
+        try:
+            self.started.set()
+            cancel_event.wait(10)
+            return {"success": False, "message": "cancelled"}
+        finally:
+            self.shared_state.init_lock.release()
+            self._lock.release()
+
+
+def test_job_status_and_cancel_across_workers(tmp_path):
+    owner = JobManager(BlockingService(SharedState(tmp_path)), store=SharedState(tmp_path).jobs, sync_interval=0.05)
+    other_state = SharedState(tmp_path)
+    other = JobManager(BlockingService(other_state), store=other_state.jobs, sync_interval=0.05)
+
+    job = owner.start_initialization()
+    assert owner.faq_service.started.wait(5)
+    stored = other.get_job(job.job_id)
+    assert stored is not None and stored.is_active
+    assert [j.job_id for j in other.list_jobs()] == [job.job_id]
+    assert other.get_job("../etc/passwd") is None
+
+    assert other.cancel(job.job_id).to_dict()["cancel_requested"]
+    deadline = time.time() + 5
+    while job.is_active and time.time() < deadline:
+        time.sleep(0.05)
+    assert job.status == InitializationJob.CANCELLED
+    time.sleep(0.1)
+    assert other.get_job(job.job_id).status == InitializationJob.CANCELLED
+
+
+def test_prefork_refuses_numpy_backend(monkeypatch):
+    from faq_retrieval import prefork
+    from faq_retrieval.config import config
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    assert prefork.main(["--workers", "2"]) == 1
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试向量集合快照：导出后导入新的向量库内容一致、模型不一致时需要force、损坏或截断的向量文件被拒绝
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+from faq_retrieval.config import config
+from faq_retrieval.services.model_manager import model_manager
+from faq_retrieval.services.numpy_vector_service import NumpyVectorService
+from faq_retrieval.services.snapshot import (VECTORS_FILE, SnapshotError, export_snapshot, iter_snapshot,
+                                             read_snapshot_header)
+
+FAQS = [
+    {"id": "1", "question": "如何维修电脑？", "answer": "找售后人员进行维修"},
+    {"id": "2", "question": "忘记密码怎么办？", "answer": "联系管理员重置密码"},
+    {"id": "3", "question": "网络连不上怎么办？", "answer": "重启路由器"},
+]
+
+
+def _points(vector_service):
+    """{点ID: (向量, payload)}"""
+    points = {}
+    for ids, vectors, payloads in vector_service.iter_points(with_vectors=True):
+        for point_id, vector, payload in zip(ids, vectors, payloads):
+            points[point_id] = (np.asarray(vector), payload)
+    return points
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    source = NumpyVectorService()
+    source.recreate_collection(8)
+    vectors = np.random.default_rng(0).standard_normal((len(FAQS), 8)).astype(np.float32)
+    assert source.upsert_points(FAQS, vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    path = tmp_path / "faq_snapshot"
+    export_snapshot(source, path, model_name="text2vec-test", batch_size=2)
+    return source, path
+
+
+@pytest.fixture
+def target(monkeypatch):
+    from faq_retrieval.services.faq_service import FAQService
+
+    monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(model_manager, "model_name", "text2vec-test")
+    return FAQService()
+
+
+def test_export_then_import_restores_vectors_and_payloads(snapshot, target):
+    source, path = snapshot
+    header = read_snapshot_header(path)
+    assert (header["count"], header["vector_size"], header["model_name"]) == (3, 8, "text2vec-test")
+
+    result = target.import_snapshot(path=str(path))
+    assert result["success"] and result["processed_count"] == 3
+
+    expected, restored = _points(source), _points(target.vector_service)
+    assert sorted(restored) == sorted(expected)
+    for point_id, (vector, payload) in expected.items():
+        np.testing.assert_allclose(restored[point_id][0], vector, rtol=1e-6)
+        assert restored[point_id][1] == payload
+    assert target.exact_match_index.lookup("忘记密码怎么办")[0]["faq_id"] == "2"
+
+
+def test_model_mismatch_requires_force(snapshot, target, monkeypatch):
+    _, path = snapshot
+    monkeypatch.setattr(model_manager, "model_name", "another-model")
+
+    result = target.import_snapshot(path=str(path))
+    assert not result["success"] and "does not match" in result["message"]
+    assert target.vector_service.get_collection_info()["points_count"] == 0
+
+    assert target.import_snapshot(path=str(path), force=True)["success"]
+    assert target.vector_service.get_collection_info()["points_count"] == 3
+
+
+def test_truncated_vectors_file_is_rejected(snapshot, target):
+    _, path = snapshot
+    vectors_file = path / VECTORS_FILE
+    data = vectors_file.read_bytes()
+    vectors_file.write_bytes(data[:-16])
+
+    with pytest.raises(SnapshotError):
+        list(iter_snapshot(path))
+    result = target.import_snapshot(path=str(path))
+    assert not result["success"] and "Corrupt" in result["message"]
+
+
+def test_corrupt_vectors_header_is_rejected(snapshot):
+    _, path = snapshot
+    (path / VECTORS_FILE).write_bytes(b"not a numpy file")
+
+    with pytest.raises(SnapshotError):
+        list(iter_snapshot(path))
+
+
+def test_vector_size_mismatch_with_header_is_rejected(snapshot):
+    _, path = snapshot
+    np.save(path / VECTORS_FILE, np.zeros((3, 4), dtype=np.float32))
+
+    with pytest.raises(SnapshotError, match="vector size"):
+        list(iter_snapshot(path))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+测试启动开销：导入服务模块和应用时不应导入torch/sentence_transformers/qdrant_client，也不应扫描模型缓存目录；
+就绪探针在Qdrant不可用时应快速失败
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+IMPORT_CHECK = """
+import sys
+sys.path.insert(0, {src!r})
+import faq_retrieval.app
+from faq_retrieval.services import model_manager
+print('torch' in sys.modules, 'sentence_transformers' in sys.modules, 'qdrant_client' in sys.modules,
+      model_manager._local_model_path is None)
+"""
+
+
+def test_services_import_defers_heavy_dependencies():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK.format(src=str(project_root / "src"))],
+        capture_output=True, text=True, check=True, timeout=120
+    ).stdout.split()
+    assert output[-4:] == ["False", "False", "False", "True"]
+
+
+def test_qdrant_probe_fails_fast_when_unreachable(monkeypatch):
+    import socket
+    import time
+
+    sys.path.insert(0, str(project_root / "src"))
+    from faq_retrieval.config import config
+    from faq_retrieval.services.qdrant_service import QdrantService
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(config, "QDRANT_HOST", "127.0.0.1")
+    monkeypatch.setattr(config, "QDRANT_PORT", port)
+    monkeypatch.setattr(config, "QDRANT_PREFER_GRPC", False)
+    service = QdrantService()
+    start = time.time()
+    assert not service.ping()
+    assert time.time() - start < config.QDRANT_PROBE_TIMEOUT + 3